@@ -1,17 +1,18 @@
 
 import os, io, time, json, yaml, uuid
-import pandas as pd
+from datetime import datetime, timezone
 import streamlit as st
-from utils.schemas import Ticket, Evaluation
+# utils.gsheets defers gspread/google-auth/pandas to the first Sheets call;
+# the Gemini client is imported where it is used.
 from utils.gsheets import append_ticket, append_evaluation, read_df
-from utils.gsheets import HEADERS  # for column order
-from utils.gemini_eval import evaluate_with_gemini
+from app.services.schema import TicketRow, EvaluationRow  # canonical column order
+from app.services.metrics import count, span
 
 st.set_page_config(page_title="Smart Support Hub", page_icon="🛠️", layout="wide")
 
 st.title("🛠️ Smart Support Hub — TMS Support")
 
-with st.sidebar:
+with st.sidebar, span("rerun.sidebar"):
     st.header("Settings")
     # Load rubric
     from pathlib import Path
@@ -51,7 +52,7 @@ pass_threshold: 75
 
 tab1, tab2 = st.tabs(["📥 Ticket Intake", "🧪 Draft Evaluation"])
 
-with tab1:
+with tab1, span("rerun.tab.intake"):
     st.subheader("Create / Log Support Ticket")
     with st.form(key="ticket_form"):
         col1, col2, col3 = st.columns(3)
@@ -63,10 +64,13 @@ with tab1:
             product = st.text_input("Product", value="TMS")
             module = st.text_input("Module", value="Connectors")
             reporter = st.text_input("Reporter (email)", value="")
+            owner = st.text_input("Owner (email)", value=(st.session_state.get("user") or {}).get("email", ""),
+                                  help="Whose work queue the ticket goes to; defaults to you.")
         with col3:
             ticket_id = st.text_input("Ticket ID (optional, will auto-generate if empty)", value="")
             status = st.selectbox("Status", ["New","In Progress","Pending Customer","Resolved","Closed"], index=0)
             attachments = st.text_area("Attachment filenames (comma-separated)", placeholder="error.log, screenshot.png")
+            uploads = st.file_uploader("Upload attachments (logs are scanned, not pasted)", accept_multiple_files=True)
 
         submitted = st.form_submit_button("Save Ticket to Google Sheets")
         if submitted:
@@ -74,29 +78,51 @@ with tab1:
                 st.error("Title and Severity are required.")
             else:
                 tid = ticket_id.strip() or f"TCK-{uuid.uuid4().hex[:8].upper()}"
+                agent = (st.session_state.get("user") or {}).get("email", "")
                 att_list = [a.strip() for a in attachments.split(",") if a.strip()]
-                t = Ticket(
-                    ticket_id=tid,
+                summaries, staged = [], []
+                from app.services import attachments as att_store
+                if uploads:
+                    # staged without a ticket; linked to it only once the row is saved
+                    with st.spinner("Storing and scanning attachments..."):
+                        for up in uploads:
+                            m = att_store.ingest(up, up.name, uploaded_by=agent)
+                            staged.append(m["id"])
+                            att_list.append(m["ref"])
+                            if m["summary_text"]:
+                                summaries.append(m["summary_text"])
+                now = datetime.now(timezone.utc)
+                # Same `tickets` layout as the main app; the reporter is the requester,
+                # created_by is the signed-in agent saving the ticket.
+                t = TicketRow(
+                    id=tid,
+                    date=now.date().isoformat(),
+                    requester=reporter,
                     title=title,
-                    description=st.text_area if False else st.session_state.get("ticket_desc", ""),  # placeholder no-op
+                    description=st.session_state.get("ticket_desc", ""),
+                    links_attachments="; ".join(att_list),
+                    owner=owner.strip() or agent,
+                    status=status,
+                    notes="\n\n".join(summaries),
+                    created_by=agent,
+                    created_at=now.isoformat(),
                     severity=severity,
                     product=product,
                     module=module,
                     locale=locale,
-                    reporter=reporter,
-                    attachments=att_list,
-                    status=status,
                 )
-                # Build row in fixed order
-                row = [
-                    pd.Timestamp.utcnow().isoformat(),
-                    t.ticket_id, t.title, st.session_state.get("ticket_desc",""), t.severity,
-                    t.product, t.module, t.locale, t.reporter, ";".join(t.attachments), t.status
-                ]
                 try:
-                    append_ticket(row)
-                    st.success(f"Ticket saved: {t.ticket_id}")
+                    append_ticket(t.to_dict())
+                    att_store.attach_to_ticket(t.id, staged)
+                    try:
+                        from app.services import work_queue
+                        work_queue.apply([t.to_dict()])
+                    except Exception:
+                        # derived state; the change feed or a rebuild catches up
+                        count("queue.apply_failed")
+                    st.success(f"Ticket saved: {t.id}")
                 except Exception as e:
+                    att_store.discard_staged(staged)
                     st.error(f"Failed to write to Google Sheets: {e}")
 
     st.markdown("#### Ticket Description")
@@ -105,12 +131,12 @@ with tab1:
     st.divider()
     st.subheader("Recent Tickets")
     try:
-        df_t = read_df("tickets")
-        st.dataframe(df_t.tail(50), use_container_width=True)
+        from app.ui.live import recent_table
+        recent_table("recent_tickets", "tickets", lambda: read_df("tickets"), unique="id")
     except Exception as e:
         st.warning(f"Cannot load tickets yet: {e}")
 
-with tab2:
+with tab2, span("rerun.tab.evaluation"):
     st.subheader("Evaluate a Draft Response (STRICT)")
     colA, colB = st.columns(2)
     with colA:
@@ -120,6 +146,8 @@ with tab2:
         eval_product = st.text_input("Product", value="TMS", key="prod_eval")
         eval_module = st.text_input("Module", value="Connectors", key="mod_eval")
         ticket_ctx = st.text_area("Paste ticket text / context", height=150)
+        eval_logs = st.file_uploader("Logs for context (only their error summary is sent)", accept_multiple_files=True,
+                                     key="eval_logs")
     with colB:
         draft = st.text_area("Paste the draft support response to evaluate", height=230, placeholder="Proposed customer reply / solution...")
 
@@ -130,8 +158,14 @@ with tab2:
         else:
             with st.spinner("Evaluating with Gemini..."):
                 try:
+                    from utils.gemini_eval import evaluate_with_gemini
+                    from app.services import attachments as att_store
+                    log_ctx = [att_store.context_for(eval_ticket_id.strip())]
+                    for up in eval_logs or []:
+                        log_ctx.append(att_store.ingest(up, up.name, ticket_id=eval_ticket_id.strip())["summary_text"])
+                    log_ctx = [x for x in dict.fromkeys(log_ctx) if x]
                     result = evaluate_with_gemini(
-                        ticket=ticket_ctx,
+                        ticket=ticket_ctx + ("\n\nAttached logs (error summary):\n" + "\n\n".join(log_ctx) if log_ctx else ""),
                         draft=draft,
                         rubric_yaml=rubric_yaml,
                         severity=eval_severity,
@@ -157,21 +191,21 @@ with tab2:
                         st.write("\n".join(f"- {f}" for f in failures))
 
                     # Persist
-                    row = [
-                        pd.Timestamp.utcnow().isoformat(),
-                        eval_ticket_id or "",
-                        len(draft),
-                        "v1",
-                        model,
-                        float(raw),
-                        "TRUE" if passed else "FALSE",
-                        verdict,
-                        rationale,
-                        "; ".join(failures),
-                        int(lat) if lat is not None else ""
-                    ]
+                    row = EvaluationRow(
+                        timestamp=datetime.now(timezone.utc).isoformat(),
+                        ticket_id=eval_ticket_id or "",
+                        draft_len=len(draft),
+                        rubric_version="v1",
+                        model=model,
+                        raw_score=float(raw),
+                        **{"pass": "TRUE" if passed else "FALSE"},
+                        verdict=verdict,
+                        rationale=rationale,
+                        failures="; ".join(failures),
+                        evaluator_latency_ms=int(lat) if lat is not None else "",
+                    )
                     try:
-                        append_evaluation(row)
+                        append_evaluation(row.to_row())
                         st.success("Evaluation saved to Google Sheets.")
                     except Exception as e:
                         st.error(f"Failed to save evaluation: {e}")
@@ -181,7 +215,7 @@ with tab2:
     st.divider()
     st.subheader("Recent Evaluations")
     try:
-        df_e = read_df("evaluations")
-        st.dataframe(df_e.tail(50), use_container_width=True)
+        from app.ui.live import recent_table
+        recent_table("recent_evaluations", "evaluations", lambda: read_df("evaluations"))
     except Exception as e:
         st.warning(f"Cannot load evaluations yet: {e}")
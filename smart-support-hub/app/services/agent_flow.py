@@ -0,0 +1,113 @@
+# file: smart-support-hub/app/services/agent_flow.py
+"""
+Service steps of the agent page (parse -> evaluate -> save), without Streamlit.
+
+app/ui/pages.py renders around these calls and tools/loadtest.py drives the same
+functions, so load numbers reflect the code agents actually run.
+"""
+from __future__ import annotations
+import json
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+from app.services import eval_queue
+from app.services.metrics import span
+from app.services.sheets_client import append_log_row, ensure_sheets_and_headers, upsert_user
+from app.services.ticket_index import upsert_ticket
+from app.services.ticket_parser import parse_ticket_text
+from app.services.validators import sanitize_prompt_payload
+
+# Form fields copied as-is into the `tickets` row; the rest comes from the evaluation.
+FORM_FIELDS = (
+    "id", "date", "requester", "title", "issue_type", "description", "links_attachments", "involved_teams_people",
+    "investigation_steps", "resolution_workaround", "owner", "status", "severity", "notes",
+)
+
+
+def log_event(user_email: str, ticket_id: str, prompt: str, response: str, status: str,
+              missing: str = "", score: Any = "") -> None:
+    append_log_row(
+        {
+            "ticket_id": ticket_id,
+            "user_email": user_email,
+            "prompt": prompt,
+            "model_response": response,
+            "result_status": status,
+            "missing_sections": missing,
+            "compliance_score": score,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+    )
+
+
+def register(user: Mapping[str, str]) -> None:
+    ensure_sheets_and_headers()
+    upsert_user(user["email"], user["name"])
+
+
+def parse(user: Mapping[str, str], raw: str) -> Dict[str, Any]:
+    """Parse pasted ticket text and log it; a parse error is logged, then re-raised."""
+    prompt = sanitize_prompt_payload((raw or "")[:5000])
+    try:
+        register(user)
+        parsed = parse_ticket_text(raw or "")
+    except Exception as e:
+        log_event(user["email"], "", prompt, f"ParseError: {e}", "ParseError")
+        raise
+    log_event(user["email"], parsed.get("id", "") or "N/A", prompt, json.dumps(parsed, ensure_ascii=False), "Parsed")
+    return parsed
+
+
+def submit_evaluation(user: Mapping[str, str], ticket_id: str, draft: str) -> int:
+    """Log the pending evaluation and queue it for the workers; returns the job id."""
+    register(user)
+    payload = sanitize_prompt_payload(draft)
+    log_event(user["email"], ticket_id, payload, "", "Pending")
+    with span("queue.enqueue"):
+        job_id = eval_queue.enqueue(ticket_id, user["email"], {"draft": draft, "payload": payload})
+    # no worker process running: evaluate in this one rather than leaving the job queued
+    from app.workers.eval_worker import ensure_worker
+    ensure_worker()
+    return job_id
+
+
+def issue_type_confirmed(form: Mapping[str, Any]) -> bool:
+    """The agent ticked "issue type verified" or changed the type the parser suggested."""
+    suggested = form.get("issue_type_suggested") or ""
+    return bool(form.get("issue_type_confirmed")) or bool(suggested and form.get("issue_type") != suggested)
+
+
+def ticket_row(form: Mapping[str, Any], res: Mapping[str, Any], user: Mapping[str, str]) -> Dict[str, Any]:
+    summary = res.get("summary") or {}
+    row = {f: form.get(f, "") for f in FORM_FIELDS}
+    row.update(
+        owner=form.get("owner") or user["email"],
+        status=form.get("status") or "Open",
+        issue_type=form.get("issue_type") or "Other",
+        severity=form.get("severity") or "",
+        # training labels for app.services.issue_classifier; unconfirmed suggestions are not used
+        issue_type_confirmed="TRUE" if issue_type_confirmed(form) else "",
+        structured_summary_problem=summary.get("problem", ""),
+        structured_summary_cause=summary.get("cause", ""),
+        structured_summary_steps=summary.get("steps", ""),
+        structured_summary_resolution=summary.get("resolution", ""),
+        structured_summary_cross_team=summary.get("cross_team", ""),
+        compliance_score=res.get("compliance_score", 100),
+        created_by=user["email"],
+        created_at=datetime.utcnow().isoformat(),
+    )
+    if not row["severity"]:
+        del row["severity"]  # an update keeps the severity set at intake; a new ticket ranks as S2
+    return row
+
+
+def save_ticket(form: Mapping[str, Any], res: Mapping[str, Any], user: Mapping[str, str],
+                job: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """Upsert the ticket; one save per evaluation job, so a double click or retried rerun never appends twice."""
+    row = ticket_row(form, res, user)
+    return upsert_ticket(row, idempotency_key=save_key(row["id"], job) if job else None)
+
+
+def save_key(ticket_id: str, job: Mapping[str, Any]) -> str:
+    # job ids restart when the queue database is reset; the ticket and enqueue time do not repeat
+    return f"save:{ticket_id}:{job['id']}:{float(job['created_at']):.6f}"
@@ -0,0 +1,79 @@
+# file: smart-support-hub/app/services/archive.py
+from __future__ import annotations
+import csv
+import gzip
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.services import data_cache
+from app.services.local_store import data_dir
+from app.services.metrics import span
+from app.services.schema import SheetRow, iter_rows, row_type_for
+from app.services import sheets_client as sc
+
+
+def _archive_path(title: str) -> Path:
+    base = sc.partition_bounds(title)[0]
+    return data_dir("archive", base) / f"{title}.csv.gz"
+
+
+def archive_partition(title: str, delete: bool = True) -> Dict[str, object]:
+    """
+    Roll one partition into `<data_dir>/archive/<base>/<title>.csv.gz`, verify the
+    row count, then (optionally) delete the worksheet to free spreadsheet cells.
+    """
+    sh = sc.open_spreadsheet()
+    ws = sh.worksheet(title)
+    with span("sheets.get_all_values"):
+        values = ws.get_all_values()
+    path = _archive_path(title)
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", newline="", compresslevel=9) as fh:
+        csv.writer(fh).writerows(values)
+    with gzip.open(tmp, "rt", encoding="utf-8", newline="") as fh:
+        written = sum(1 for _ in csv.reader(fh))
+    if written != len(values):
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"Archive of {title} wrote {written} rows, expected {len(values)}")
+    os.replace(tmp, path)
+    if delete:
+        with span("sheets.del_worksheet"):
+            sh.del_worksheet(ws)
+        with sc._known_lock:
+            sc._known_ws.discard(title)
+        data_cache.bump(sc.dataset_of(title))
+    return {"partition": title, "rows": max(len(values) - 1, 0), "file": str(path), "bytes": path.stat().st_size,
+            "deleted": delete}
+
+
+def archive_partitions(base: str, keep: int = 3, delete: bool = True) -> List[Dict[str, object]]:
+    """Archive every partition of `base` except the newest `keep` ones (the current one is always kept)."""
+    parts = sc.list_partitions(base)
+    current = sc.partition_name(base)
+    old = [t for t in parts if t != current]
+    keep_old = max(keep - 1, 0) if current in parts else max(keep, 0)
+    return [archive_partition(t, delete=delete) for t in old[: max(len(old) - keep_old, 0)]]
+
+
+def list_archived(base: str) -> List[str]:
+    return sorted(p.name[: -len(".csv.gz")] for p in data_dir("archive", base).glob("*.csv.gz"))
+
+
+def read_archived(base: str, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[SheetRow]:
+    """Rows from archived partitions overlapping [start, end] (caller filters by created_at)."""
+    for title in list_archived(base):
+        bounds = sc.partition_bounds(title)
+        if bounds is None:
+            continue
+        _, p_start, p_end = bounds
+        if (start is not None and p_end < start) or (end is not None and p_start > end):
+            continue
+        with gzip.open(_archive_path(title), "rt", encoding="utf-8", newline="") as fh:
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            cls = row_type_for(title, header)
+            if cls is None:
+                continue
+            yield from iter_rows(reader, cls)
@@ -0,0 +1,181 @@
+# file: smart-support-hub/app/services/attachments.py
+"""
+Attachment ingestion: uploads are split into fixed-size chunks kept in the local
+content-addressed store (app.services.blob_store, so identical chunks and files
+are stored once) and described by a manifest row in `<data_dir>/attachments.sqlite`.
+
+Text/log files are scanned with app.services.log_scan while they are spooled to
+disk; only the compact summary is attached to the ticket and evaluation context,
+never the raw file. Sheets keep `name (att:<id>)` references. Uploads made before
+their ticket exists are staged (`ticket_id=""`) and linked once the save succeeds.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from app.services import blob_store, log_scan
+from app.services.local_store import connect, data_dir
+from app.services.metrics import span
+
+CHUNK_BYTES = 4 * 1024 * 1024
+SCAN_SUFFIXES = (".log", ".txt", ".out", ".err", ".trace", ".json", ".csv")
+REF_CHARS = 12
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attachments (
+    id TEXT NOT NULL,
+    ticket_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    chunks TEXT NOT NULL,
+    summary TEXT,
+    uploaded_by TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (id, ticket_id)
+);
+CREATE INDEX IF NOT EXISTS attachments_ticket ON attachments(ticket_id, created_at);
+"""
+
+
+def _conn() -> sqlite3.Connection:
+    return connect("attachments", _SCHEMA)
+
+
+def scannable(name: str) -> bool:
+    return name.lower().endswith(SCAN_SUFFIXES)
+
+
+def ingest(fileobj: BinaryIO, name: str, ticket_id: str = "", uploaded_by: str = "") -> Dict[str, Any]:
+    """
+    Store one upload (a file-like object, e.g. Streamlit's UploadedFile) and, for log-like
+    files, scan it. Returns the manifest: {"id", "ref", "name", "bytes", "summary", "summary_text"}.
+    """
+    if hasattr(fileobj, "seek"):
+        # a file already stored (same upload on a rerun, or on another ticket) is not chunked
+        # or scanned again: hashing it is much cheaper
+        known = _lookup(_sha256(fileobj))
+        fileobj.seek(0)
+        if known and (known["summary"] or not scannable(name)):
+            if ticket_id:
+                attach_to_ticket(ticket_id, [known["id"]])
+            return _manifest(known["id"], name, known["bytes"], known["summary"])
+    digest = hashlib.sha256()
+    chunks: List[str] = []
+    size = 0
+    spool = None
+    if scannable(name):
+        # mmap needs a real file: spool the upload while chunking it, scan, then drop the copy
+        spool = tempfile.NamedTemporaryFile(dir=data_dir("attachments", "tmp"), delete=False)
+    try:
+        with span("attachments.store"):
+            while True:
+                block = fileobj.read(CHUNK_BYTES)
+                if not block:
+                    break
+                digest.update(block)
+                chunks.append(blob_store.put_bytes(block))
+                size += len(block)
+                if spool:
+                    spool.write(block)
+        summary = None
+        if spool:
+            spool.close()
+            with span("attachments.scan"):
+                summary = log_scan.scan(Path(spool.name))
+            summary["file"] = name
+    finally:
+        if spool:
+            spool.close()
+            os.unlink(spool.name)
+
+    att_id = digest.hexdigest()
+    with closing(_conn()) as conn:
+        conn.execute(
+            "INSERT INTO attachments (id, ticket_id, name, bytes, chunks, summary, uploaded_by, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id, ticket_id) DO UPDATE SET name = excluded.name",
+            (att_id, ticket_id, name, size, json.dumps(chunks), json.dumps(summary) if summary else None,
+             uploaded_by, time.time()),
+        )
+    return _manifest(att_id, name, size, summary)
+
+
+def _sha256(fileobj: BinaryIO) -> str:
+    digest = hashlib.sha256()
+    for block in iter(lambda: fileobj.read(CHUNK_BYTES), b""):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def _lookup(att_id: str) -> Optional[Dict[str, Any]]:
+    with closing(_conn()) as conn:
+        row = conn.execute("SELECT id, bytes, summary FROM attachments WHERE id = ? LIMIT 1", (att_id,)).fetchone()
+    if row is None:
+        return None
+    return {"id": row["id"], "bytes": row["bytes"], "summary": json.loads(row["summary"]) if row["summary"] else None}
+
+
+def _manifest(att_id: str, name: str, size: int, summary: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "id": att_id,
+        "ref": f"{name} (att:{att_id[:REF_CHARS]})",
+        "name": name,
+        "bytes": size,
+        "summary": summary,
+        "summary_text": log_scan.summary_text(summary) if summary else "",
+    }
+
+
+def attach_to_ticket(ticket_id: str, att_ids: List[str]) -> None:
+    """
+    Link attachments ingested without a ticket (`ticket_id=""`, staged until the ticket is
+    saved) or already stored for another ticket; the staged rows are consumed.
+    """
+    with closing(_conn()) as conn:
+        for att_id in att_ids:
+            conn.execute(
+                "INSERT OR IGNORE INTO attachments (id, ticket_id, name, bytes, chunks, summary, uploaded_by, created_at)"
+                " SELECT id, ?, name, bytes, chunks, summary, uploaded_by, created_at FROM attachments"
+                " WHERE id = ? LIMIT 1",
+                (ticket_id, att_id),
+            )
+            if ticket_id:
+                conn.execute("DELETE FROM attachments WHERE id = ? AND ticket_id = ''", (att_id,))
+
+
+def discard_staged(att_ids: List[str]) -> None:
+    """Drop staged manifests of a save that failed (their chunks stay in the blob store)."""
+    with closing(_conn()) as conn:
+        conn.executemany("DELETE FROM attachments WHERE id = ? AND ticket_id = ''", [(a,) for a in att_ids])
+
+
+def for_ticket(ticket_id: str) -> List[Dict[str, Any]]:
+    with closing(_conn()) as conn:
+        rows = conn.execute(
+            "SELECT id, name, bytes, summary FROM attachments WHERE ticket_id = ? ORDER BY created_at", (ticket_id,)
+        ).fetchall()
+    return [_manifest(r["id"], r["name"], r["bytes"], json.loads(r["summary"]) if r["summary"] else None)
+            for r in rows]
+
+
+def context_for(ticket_id: str, max_chars: int = 3000) -> str:
+    """Attachment summaries of a ticket, sized for an evaluation prompt."""
+    parts = [a["summary_text"] for a in for_ticket(ticket_id) if a["summary_text"]] if ticket_id else []
+    text = "\n\n".join(parts)
+    return text if len(text) <= max_chars else text[: max_chars - 1] + "…"
+
+
+def open_stream(att_id: str) -> Iterator[bytes]:
+    """Original bytes of an attachment, chunk by chunk (`att_id` may be the short ref prefix)."""
+    with closing(_conn()) as conn:
+        row = conn.execute("SELECT chunks FROM attachments WHERE id LIKE ? LIMIT 1", (att_id + "%",)).fetchone()
+    if row is None:
+        raise KeyError(f"attachment {att_id} not found")
+    for digest in json.loads(row["chunks"]):
+        yield blob_store.get_bytes(digest)
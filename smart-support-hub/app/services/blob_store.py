@@ -0,0 +1,125 @@
+# file: smart-support-hub/app/services/blob_store.py
+"""
+Local content-addressed store for large log payloads (prompts, model responses).
+
+A payload is stored once under its SHA-256, compressed with zstd when the
+`zstandard` package is installed and gzip otherwise; the sheet cell keeps a
+reference plus a short preview:
+
+    blob:<sha256> <first PREVIEW_CHARS characters>…
+
+`resolve()` turns such a cell back into the full payload (plain cells pass
+through), so viewers can fetch lazily. Set BLOB_STORE=off to keep payloads inline.
+"""
+from __future__ import annotations
+import contextlib
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.services.local_store import data_dir
+
+MIN_CHARS = int(os.getenv("BLOB_MIN_CHARS", "200"))  # shorter values stay inline
+PREVIEW_CHARS = 120
+PREFIX = "blob:"
+
+_REF = re.compile(r"^blob:([0-9a-f]{64})(?:\s|$)")
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def enabled() -> bool:
+    return (os.getenv("BLOB_STORE") or "on").lower() not in ("off", "0", "false")
+
+
+def _path(digest: str) -> Path:
+    return data_dir("blobs", digest[:2]) / digest
+
+
+def _compress(data: bytes) -> bytes:
+    try:
+        import zstandard
+    except ImportError:
+        return gzip.compress(data, compresslevel=6)
+    return zstandard.ZstdCompressor(level=10).compress(data)
+
+
+def _decompress(raw: bytes) -> bytes:
+    if raw[:4] == _ZSTD_MAGIC:
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(raw)
+    return gzip.decompress(raw)
+
+
+def put_bytes(data: bytes) -> str:
+    """Store raw bytes (deduplicated) and return their digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    p = _path(digest)
+    if not p.exists():
+        # unique temp file per writer: threads of one process may store the same blob at once
+        fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=f"{digest}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_compress(data))
+            os.replace(tmp, p)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+    return digest
+
+
+def get_bytes(digest: str) -> bytes:
+    """Raw bytes for `digest`; raises KeyError if it is not in this store."""
+    p = _path(digest)
+    if not p.exists():
+        raise KeyError(f"blob {digest} not found in {p.parent}")
+    return _decompress(p.read_bytes())
+
+
+def put(payload: str) -> str:
+    """Store `payload` (deduplicated) and return its digest."""
+    return put_bytes(payload.encode("utf-8"))
+
+
+def get(digest: str) -> str:
+    """Full payload for `digest`; raises KeyError if it is not in this store."""
+    return get_bytes(digest).decode("utf-8")
+
+
+def ref_of(cell: Any) -> Optional[str]:
+    """Digest referenced by a sheet cell, or None for inline values."""
+    m = _REF.match(str(cell or ""))
+    return m.group(1) if m else None
+
+
+def externalize(value: Any) -> Any:
+    """Sheet cell for `value`: large strings become `blob:<digest> <preview>`, the rest is unchanged."""
+    if not enabled() or not isinstance(value, str) or len(value) < MIN_CHARS or ref_of(value):
+        return value
+    digest = put(value)
+    preview = " ".join(value[:PREVIEW_CHARS].split())
+    return f"{PREFIX}{digest} {preview}…"
+
+
+def resolve(cell: Any) -> Any:
+    """Inverse of `externalize`; returns the cell as-is if it is inline or the blob is missing."""
+    digest = ref_of(cell)
+    if not digest:
+        return cell
+    try:
+        return get(digest)
+    except KeyError:
+        return cell
+
+
+def stats() -> Dict[str, Any]:
+    n = size = 0
+    for p in data_dir("blobs").glob("*/*"):
+        if not p.name.endswith(".tmp"):
+            n += 1
+            size += p.stat().st_size
+    return {"blobs": n, "bytes": size}
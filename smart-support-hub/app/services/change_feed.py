@@ -0,0 +1,252 @@
+# file: smart-support-hub/app/services/change_feed.py
+"""
+Change feed: one poller per deployment detects rows appended to the watched
+worksheets and publishes them; open dashboards fetch only events newer than
+their cursor and append them to the view they already have.
+
+The poller keeps a per-worksheet cursor (last sheet row seen) and probes
+`A<cursor+1>:<last col>` of every worksheet in a single values_batch_get, which
+returns just the new rows (nothing when there are none). Between full probes
+(FEED_PROBE_S) it only probes datasets whose data_cache version moved, i.e. that
+were written through the app. A SQLite lease makes one process the poller; the
+others only read events. Rows the app rewrites in place (ticket upserts) are
+published directly with `publish`, so the feed can carry several versions of a
+row: readers keep the latest per id (`latest_by`). Only the newest KEEP_EVENTS
+events are kept; a reader whose cursor fell behind them is told to resync
+(reload from Sheets) instead of silently missing rows. Edits made by hand in
+Sheets to existing rows are not detected.
+"""
+from __future__ import annotations
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.services import data_cache
+from app.services.local_store import connect
+from app.services.metrics import count, span
+
+DATASETS = ("tickets", "evaluations", "log")
+POLL_S = float(os.getenv("FEED_POLL_S", "3"))
+PROBE_S = float(os.getenv("FEED_PROBE_S", "30"))  # probe even without a version bump (edits made in Sheets)
+KEEP_EVENTS = 20_000
+LEASE_S = 15.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    dataset TEXT NOT NULL,
+    title TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_dataset ON events(dataset, seq);
+CREATE TABLE IF NOT EXISTS cursors (title TEXT PRIMARY KEY, last_row INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS poller (id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT NOT NULL, expires REAL NOT NULL);
+"""
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+def _conn() -> sqlite3.Connection:
+    return connect("change_feed", _SCHEMA)
+
+
+def latest_seq() -> int:
+    with closing(_conn()) as conn:
+        return int(conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0])
+
+
+def since(seq: int, datasets: Sequence[str] = DATASETS,
+          limit: int = 5000) -> Tuple[int, Dict[str, List[Dict[str, Any]]], bool]:
+    """
+    Events after `seq` -> (new cursor, {dataset: [row dicts in feed order]}, resync). `resync` is True
+    when events after `seq` were already pruned (KEEP_EVENTS): the caller must reload its data from
+    Sheets and restart from the returned cursor, since the events returned are not all it missed.
+    """
+    marks = ",".join("?" * len(datasets))
+    with closing(_conn()) as conn:
+        # one read snapshot, bounded by `top`: an event committed between the two reads
+        # would otherwise sit below the returned cursor without having been returned
+        conn.execute("BEGIN")
+        top, oldest = conn.execute("SELECT COALESCE(MAX(seq), 0), MIN(seq) FROM events").fetchone()
+        top = int(top)
+        rows = conn.execute(
+            f"SELECT seq, dataset, payload FROM events WHERE seq > ? AND seq <= ? AND dataset IN ({marks})"
+            " ORDER BY seq LIMIT ?",
+            (seq, top, *datasets, limit),
+        ).fetchall()
+        conn.execute("COMMIT")
+    if oldest is not None and int(oldest) > seq + 1:
+        return max(top, seq), {d: [] for d in datasets}, True
+    out: Dict[str, List[Dict[str, Any]]] = {d: [] for d in datasets}
+    for r in rows:
+        out[r["dataset"]].append(json.loads(r["payload"]))
+    # a full page means there may be more; resume after the last one returned
+    return (int(rows[-1]["seq"]) if len(rows) == limit else max(top, seq)), out, False
+
+
+def latest_by(rows: Sequence[Dict[str, Any]], unique: str) -> List[Dict[str, Any]]:
+    """
+    The latest version of each row, by its `unique` value (e.g. "id"), in feed order. Rows with
+    a blank value are separate sheet rows (the poller publishes each appended row once and
+    only rows with an id are updated in place), so they are all kept, never merged.
+    """
+    latest: Dict[Any, Dict[str, Any]] = {}
+    for i, r in enumerate(rows):
+        key = str(r.get(unique, "") or "").strip()
+        latest[key or (None, i)] = r
+    return list(latest.values())
+
+
+def changed_rows(title: str, seq: int) -> Tuple[int, List[int], bool]:
+    """
+    Sheet rows of worksheet `title` with events after `seq` -> (new cursor, sorted rows, complete).
+    `complete` is False when events after `seq` may already have been pruned (KEEP_EVENTS).
+    """
+    with closing(_conn()) as conn:
+        conn.execute("BEGIN")
+        top, oldest = conn.execute("SELECT COALESCE(MAX(seq), 0), MIN(seq) FROM events").fetchone()
+        rows = conn.execute(
+            "SELECT DISTINCT row FROM events WHERE title = ? AND seq > ? AND seq <= ? ORDER BY row",
+            (title, seq, top),
+        ).fetchall()
+        conn.execute("COMMIT")
+    return max(int(top), seq), [int(r["row"]) for r in rows], oldest is None or int(oldest) <= seq + 1
+
+
+def publish(dataset: str, title: str, row: int, payload: Dict[str, Any]) -> int:
+    """
+    Publish a row changed in place (the poller only sees appended rows), e.g. an upsert
+    that rewrote a ticket's status. Readers get it as a later version of the same row.
+    """
+    with closing(_conn()) as conn:
+        cur = conn.execute(
+            "INSERT INTO events (dataset, title, row, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+            (dataset, title, row, json.dumps(payload, ensure_ascii=False), time.time()),
+        )
+        return int(cur.lastrowid)
+
+
+# ---------- poller ----------
+
+def _titles(sheets: Dict[str, Any], dataset: str) -> List[str]:
+    from app.services import sheets_client as sc
+    base = [dataset] if dataset in sheets else []
+    return base + (sc.list_partitions(dataset, titles=list(sheets)) if dataset in sc.PARTITIONED else [])
+
+
+def poll_once(sh=None, datasets: Sequence[str] = DATASETS) -> int:
+    """One probe of the given datasets; publishes new rows and returns how many."""
+    from app.services import sheets_client as sc
+    sh = sh or sc.open_spreadsheet()
+    with span("feed.list_worksheets"):
+        sheets = {ws.title: ws for ws in sh.worksheets()}
+    plan = [(d, t) for d in datasets for t in _titles(sheets, d)]
+    if not plan:
+        return 0
+    headers = sc.header_rows([t for _, t in plan], sh)
+    with closing(_conn()) as conn:
+        cursors = {r["title"]: int(r["last_row"]) for r in conn.execute("SELECT title, last_row FROM cursors")}
+
+    # First run: every worksheet starts at its current end (dashboards load existing rows
+    # themselves). Worksheets that appear later (new partitions) are read from row 2.
+    baseline = not cursors
+    ranges: List[str] = []
+    probes: List[Tuple[str, str, int]] = []
+    for d, t in plan:
+        first = cursors.get(t, 1) + 1
+        if first > getattr(sheets[t], "row_count", first):
+            continue
+        if baseline:
+            ranges.append(sc._a1(t, "A2:A"))
+            probes.append((d, t, -1))
+        else:
+            ranges.append(sc._a1(t, f"A{first}:{sc._col_letter(max(len(headers[t]), 1))}"))
+            probes.append((d, t, first))
+    if not ranges:
+        return 0
+    with span("feed.probe"):
+        resp = sh.values_batch_get(ranges)
+
+    published = 0
+    now = time.time()
+    with closing(_conn()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for (d, t, first), vr in zip(probes, resp.get("valueRanges", [])):
+                vals = vr.get("values", [])
+                if first < 0:
+                    last = 1 + len(vals)
+                else:
+                    hdr = headers[t]
+                    # blank rows (cleared by hand, gaps) advance the cursor but are not events
+                    events = [(d, t, first + i, json.dumps({h: (v[j] if j < len(v) else "") for j, h in enumerate(hdr) if h},
+                                                           ensure_ascii=False), now)
+                              for i, v in enumerate(vals) if any(str(c).strip() for c in v)]
+                    conn.executemany(
+                        "INSERT INTO events (dataset, title, row, payload, created_at) VALUES (?, ?, ?, ?, ?)", events
+                    )
+                    published += len(events)
+                    last = first - 1 + len(vals)
+                conn.execute(
+                    "INSERT INTO cursors (title, last_row) VALUES (?, ?)"
+                    " ON CONFLICT(title) DO UPDATE SET last_row = excluded.last_row",
+                    (t, last),
+                )
+            conn.execute("DELETE FROM events WHERE seq <= (SELECT MAX(seq) FROM events) - ?", (KEEP_EVENTS,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return published
+
+
+def _hold_lease() -> bool:
+    now = time.time()
+    with closing(_conn()) as conn:
+        conn.execute("DELETE FROM poller WHERE expires < ?", (now,))
+        conn.execute("INSERT OR IGNORE INTO poller (id, owner, expires) VALUES (1, ?, ?)", (_OWNER, now + LEASE_S))
+        cur = conn.execute("UPDATE poller SET expires = ? WHERE id = 1 AND owner = ?", (now + LEASE_S, _OWNER))
+        return cur.rowcount == 1
+
+
+def run_poller(stop: Optional[threading.Event] = None, interval: float = POLL_S) -> None:
+    """Poll loop; only the process holding the lease touches Sheets."""
+    stop = stop or threading.Event()
+    seen: Dict[str, int] = {}
+    last_probe = 0.0
+    while not stop.is_set():
+        try:
+            if _hold_lease():
+                full = time.time() - last_probe >= PROBE_S
+                if full:
+                    # edits made by hand in Sheets: the modified time moves, cached reads are invalidated
+                    from app.services import sheets_client as sc
+                    data_cache.note_remote_stamp(sc.modified_time())
+                versions = {d: data_cache.version(d) for d in DATASETS}
+                due = [d for d in DATASETS if versions[d] != seen.get(d)]
+                if full:
+                    due, last_probe = list(DATASETS), time.time()
+                if due:
+                    poll_once(datasets=due)
+                    seen.update({d: versions[d] for d in due})
+        except Exception:
+            count("feed.poll_failed")
+        stop.wait(interval)
+
+
+def ensure_poller() -> None:
+    """Start the background poller thread in this process (idempotent)."""
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=run_poller, name="change-feed-poller", daemon=True)
+            _thread.start()
@@ -0,0 +1,178 @@
+# file: smart-support-hub/app/services/data_cache.py
+"""
+Versioned read-through cache shared by every Streamlit session and process.
+
+Each logical dataset ("tickets", "log", "users", "evaluations") has a monotonically
+increasing version in a local SQLite file. Writers bump it (sheets_client and
+utils.gsheets do so on every append/update); readers get the cached payload only
+while it was produced at the current version. Edits made directly in the Sheet are
+caught by the change-feed poller, which compares the spreadsheet's modified time
+(`note_remote_stamp`) and bumps every dataset when it moved. A short lease makes sure only one
+process fetches from Sheets per change while the others wait for its result.
+"""
+from __future__ import annotations
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.services.local_store import connect
+from app.services.metrics import count, observe
+
+# Optional age cap on entries, off by default: versions (app writes and `note_remote_stamp`) invalidate.
+MAX_AGE_S = float(os.getenv("DATA_CACHE_MAX_AGE_S", "0"))
+# Decoded payloads kept per process; keys include date ranges, so the set is unbounded otherwise.
+LOCAL_MAX_ENTRIES = int(os.getenv("DATA_CACHE_LOCAL_ENTRIES", "64"))
+LEASE_S = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_name ON entries(name);
+CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS remote (id INTEGER PRIMARY KEY CHECK (id = 1), stamp TEXT NOT NULL);
+"""
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+# Per-process LRU of decoded payloads: key -> (version, created_at, value)
+_local: "OrderedDict[str, Tuple[int, float, Any]]" = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _conn() -> sqlite3.Connection:
+    return connect("data_cache", _SCHEMA)
+
+
+def version(name: str) -> int:
+    with closing(_conn()) as conn:
+        row = conn.execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone()
+        return int(row["version"]) if row else 0
+
+
+def bump(name: str) -> int:
+    """Mark `name` as changed; every cached read of it becomes stale. Returns the new version."""
+    with closing(_conn()) as conn:
+        conn.execute(
+            "INSERT INTO versions (name, version) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            (name,),
+        )
+        row = conn.execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone()
+        conn.execute("DELETE FROM entries WHERE name = ? AND version < ?", (name, row["version"]))
+        return int(row["version"])
+
+
+def _remember(key: str, entry: Tuple[int, float, Any]) -> None:
+    with _local_lock:
+        _local[key] = entry
+        _local.move_to_end(key)
+        while len(_local) > LOCAL_MAX_ENTRIES:
+            _local.popitem(last=False)
+
+
+def _fresh(ver: int, created_at: float, current: int) -> bool:
+    return ver == current and (not MAX_AGE_S or time.time() - created_at < MAX_AGE_S)
+
+
+def _load_entry(conn: sqlite3.Connection, key: str) -> Optional[Tuple[int, float, bytes]]:
+    row = conn.execute("SELECT version, created_at, payload FROM entries WHERE key = ?", (key,)).fetchone()
+    return (int(row["version"]), float(row["created_at"]), row["payload"]) if row else None
+
+
+def _try_lease(conn: sqlite3.Connection, key: str) -> bool:
+    now = time.time()
+    conn.execute("DELETE FROM leases WHERE key = ? AND expires < ?", (key, now))
+    cur = conn.execute("INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+                       (key, _OWNER, now + LEASE_S))
+    return cur.rowcount == 1
+
+
+def cached(name: str, key: str, loader: Callable[[], Any], wait_s: float = LEASE_S) -> Any:
+    """
+    Return `loader()` for dataset `name`, shared across sessions/processes until
+    `bump(name)` is called. `key` distinguishes different reads of the same dataset.
+    """
+    full_key = f"{name}:{key}"
+    with closing(_conn()) as conn:
+        current = int((conn.execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone() or [0])[0])
+        with _local_lock:
+            hit = _local.get(full_key)
+            if hit:
+                _local.move_to_end(full_key)
+        if hit and _fresh(hit[0], hit[1], current):
+            count("cache.hit.local")
+            return hit[2]
+
+        deadline = time.time() + wait_s
+        while True:
+            entry = _load_entry(conn, full_key)
+            if entry and _fresh(entry[0], entry[1], current):
+                value = pickle.loads(entry[2])
+                _remember(full_key, (entry[0], entry[1], value))
+                count("cache.hit.shared")
+                return value
+            if _try_lease(conn, full_key) or time.time() > deadline:
+                break
+            time.sleep(0.1)  # another process is fetching this version
+
+        try:
+            t0 = time.perf_counter()
+            value = loader()
+            observe(f"cache.miss.{name}", (time.perf_counter() - t0) * 1000.0)
+            created = time.time()
+            conn.execute(
+                "INSERT INTO entries (key, name, version, payload, created_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET version = excluded.version, payload = excluded.payload,"
+                " created_at = excluded.created_at",
+                (full_key, name, current, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), created),
+            )
+            _remember(full_key, (current, created, value))
+            return value
+        finally:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (full_key, _OWNER))
+
+
+def note_remote_stamp(stamp: Optional[str]) -> bool:
+    """
+    Version check for edits made outside the app: `stamp` is the spreadsheet's modified
+    time. When it differs from the last one seen, every dataset is bumped (app writes move
+    it too, which only costs one extra reload). Returns True if it bumped.
+    """
+    if not stamp:
+        return False
+    with closing(_conn()) as conn:
+        row = conn.execute("SELECT stamp FROM remote WHERE id = 1").fetchone()
+        if row and row["stamp"] == stamp:
+            return False
+        conn.execute("INSERT INTO remote (id, stamp) VALUES (1, ?) ON CONFLICT(id) DO UPDATE SET stamp = excluded.stamp",
+                     (stamp,))
+    invalidate_all()
+    return True
+
+
+def invalidate_all() -> None:
+    """Bump every known dataset (admin escape hatch after editing the Sheet by hand)."""
+    with closing(_conn()) as conn:
+        names = [r["name"] for r in conn.execute("SELECT name FROM versions")]
+    for n in names or ["tickets", "log", "users", "evaluations"]:
+        bump(n)
+    with _local_lock:
+        _local.clear()
+
+
+def stats() -> Dict[str, Any]:
+    with closing(_conn()) as conn:
+        versions = {r["name"]: r["version"] for r in conn.execute("SELECT name, version FROM versions")}
+        n, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM entries").fetchone()
+    return {"versions": versions, "entries": n, "bytes": size}
@@ -0,0 +1,286 @@
+# file: smart-support-hub/app/services/eval_queue.py
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+
+from app.services.local_store import connect
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# A running job whose worker died is re-claimed once its lease expires; live workers renew it.
+LEASE_S = float(os.getenv("EVAL_JOB_LEASE_S", "180"))
+MAX_ATTEMPTS = int(os.getenv("EVAL_JOB_MAX_ATTEMPTS", "3"))
+# Workers record a heartbeat at least this often; none within it means nobody drains the queue.
+HEARTBEAT_S = float(os.getenv("EVAL_WORKER_HEARTBEAT_S", "15"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id TEXT NOT NULL,
+    user_email TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_after REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_run_after ON jobs(status, run_after);
+CREATE INDEX IF NOT EXISTS jobs_user_ticket ON jobs(user_email, ticket_id);
+CREATE TABLE IF NOT EXISTS workers (name TEXT PRIMARY KEY, seen REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS log_outbox (
+    job_id INTEGER PRIMARY KEY,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_try REAL NOT NULL,
+    error TEXT
+);
+"""
+
+
+def _conn() -> sqlite3.Connection:
+    return connect("eval_queue", _SCHEMA)
+
+
+def _as_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job.get("result") else None
+    return job
+
+
+def enqueue(ticket_id: str, user_email: str, payload: Dict[str, Any], max_attempts: int = MAX_ATTEMPTS) -> int:
+    """Persist an evaluation job and return its id."""
+    now = time.time()
+    with closing(_conn()) as conn:
+        cur = conn.execute(
+            "INSERT INTO jobs (ticket_id, user_email, payload, status, max_attempts, run_after, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (ticket_id, user_email, json.dumps(payload, ensure_ascii=False), QUEUED, max_attempts, now, now, now),
+        )
+        return int(cur.lastrowid)
+
+
+def claim(worker: str, lease_s: float = LEASE_S) -> Optional[Dict[str, Any]]:
+    """
+    Atomically take the oldest runnable job (or one whose lease expired with attempts left).
+    An expired job that used up its attempts (it keeps killing its worker) is failed instead.
+    """
+    now = time.time()
+    conn = _conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        dead = [r["id"] for r in conn.execute(
+            "SELECT id FROM jobs WHERE status = ? AND lease_until < ? AND attempts >= max_attempts", (RUNNING, now)
+        )]
+        if dead:
+            marks = ",".join("?" * len(dead))
+            conn.execute(
+                f"UPDATE jobs SET status = ?, error = COALESCE(error, 'worker lost: lease expired on the last attempt'),"
+                f" lease_until = NULL, updated_at = ? WHERE id IN ({marks})",
+                (FAILED, now, *dead),
+            )
+            conn.executemany("INSERT OR REPLACE INTO log_outbox (job_id, attempts, next_try) VALUES (?, 0, ?)",
+                             [(d, now) for d in dead])
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE (status = ? AND run_after <= ?)"
+            " OR (status = ? AND lease_until < ? AND attempts < max_attempts) ORDER BY id LIMIT 1",
+            (QUEUED, now, RUNNING, now),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, lease_until = ?, updated_at = ?"
+            " WHERE id = ?",
+            (RUNNING, worker, now + lease_s, now, row["id"]),
+        )
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        conn.execute("COMMIT")
+        return _as_dict(job)
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def renew(job_id: int, worker: str, lease_s: float = LEASE_S) -> bool:
+    """Extend the lease of a job this worker still holds; False once another worker took it over."""
+    now = time.time()
+    with closing(_conn()) as conn:
+        cur = conn.execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+            (now + lease_s, now, job_id, RUNNING, worker),
+        )
+        return cur.rowcount == 1
+
+
+def _finish(job_id: int, worker: Optional[str], sql: str, args: tuple, log: bool) -> bool:
+    """Apply a terminal/requeue update only if `worker` still holds the job; queue its Sheets log row."""
+    conn = _conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(
+            sql + " WHERE id = ? AND status = ?" + (" AND worker = ?" if worker else ""),
+            (*args, job_id, RUNNING, *((worker,) if worker else ())),
+        )
+        owned = cur.rowcount == 1
+        if owned and log:
+            conn.execute("INSERT OR REPLACE INTO log_outbox (job_id, attempts, next_try) VALUES (?, 0, ?)",
+                         (job_id, time.time()))
+        conn.execute("COMMIT")
+        return owned
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def complete(job_id: int, result: Dict[str, Any], worker: Optional[str] = None) -> bool:
+    """
+    Store the result (the Sheets log row is written afterwards from the outbox). With `worker`,
+    only the current lease holder may complete: returns False if the lease was lost.
+    """
+    return _finish(
+        job_id, worker,
+        "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_until = NULL, updated_at = ?",
+        (DONE, json.dumps(result, ensure_ascii=False), time.time()), log=True,
+    )
+
+
+def fail(job_id: int, error: str, worker: Optional[str] = None) -> str:
+    """
+    Record a failed attempt; requeue with exponential backoff until max_attempts. Returns the new
+    status (or the current one, untouched, when `worker` no longer holds the job).
+    """
+    now = time.time()
+    conn = _conn()
+    try:
+        # read and decide in the write transaction: a re-claim in between would change `attempts`
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT status, attempts, max_attempts, worker FROM jobs WHERE id = ?",
+                           (job_id,)).fetchone()
+        if row is None or row["status"] != RUNNING or (worker and row["worker"] != worker):
+            conn.execute("COMMIT")
+            return row["status"] if row else FAILED
+        status = QUEUED if row["attempts"] < row["max_attempts"] else FAILED
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, run_after = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+            (status, error[:2000], now + min(2 ** row["attempts"], 60), now, job_id),
+        )
+        if status == FAILED:
+            conn.execute("INSERT OR REPLACE INTO log_outbox (job_id, attempts, next_try) VALUES (?, 0, ?)",
+                         (job_id, now))
+        conn.execute("COMMIT")
+        return status
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def expire(job_id: int, error: str) -> bool:
+    """Fail a job that is still waiting in the queue (nobody claimed it in time); False if it was claimed."""
+    now = time.time()
+    conn = _conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status = ?",
+                           (FAILED, error[:2000], now, job_id, QUEUED))
+        if cur.rowcount:
+            conn.execute("INSERT OR REPLACE INTO log_outbox (job_id, attempts, next_try) VALUES (?, 0, ?)",
+                         (job_id, now))
+        conn.execute("COMMIT")
+        return cur.rowcount == 1
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def heartbeat(worker: str) -> None:
+    with closing(_conn()) as conn:
+        conn.execute("INSERT INTO workers (name, seen) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET seen = excluded.seen",
+                     (worker, time.time()))
+
+
+def workers_alive(within_s: float = HEARTBEAT_S) -> int:
+    """Workers that heartbeated within `within_s` (0 = nobody is draining the queue)."""
+    now = time.time()
+    with closing(_conn()) as conn:
+        conn.execute("DELETE FROM workers WHERE seen < ?", (now - 100 * within_s,))
+        return int(conn.execute("SELECT COUNT(*) FROM workers WHERE seen >= ?", (now - within_s,)).fetchone()[0])
+
+
+def claim_logs(limit: int = 20, lease_s: float = 60.0) -> List[Dict[str, Any]]:
+    """
+    Finished jobs whose Sheets log row is due, reserved for `lease_s` so concurrent workers
+    do not write the same row twice (an unconfirmed row is retried after the reservation).
+    """
+    now = time.time()
+    conn = _conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT jobs.* FROM log_outbox JOIN jobs ON jobs.id = log_outbox.job_id"
+            " WHERE log_outbox.next_try <= ? ORDER BY log_outbox.job_id LIMIT ?",
+            (now, limit),
+        ).fetchall()
+        conn.executemany("UPDATE log_outbox SET next_try = ? WHERE job_id = ?", [(now + lease_s, r["id"]) for r in rows])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return [_as_dict(r) for r in rows]
+
+
+def log_written(job_id: int) -> None:
+    with closing(_conn()) as conn:
+        conn.execute("DELETE FROM log_outbox WHERE job_id = ?", (job_id,))
+
+
+def log_failed(job_id: int, error: str) -> None:
+    """Retry the log row later, with backoff capped at 5 minutes."""
+    with closing(_conn()) as conn:
+        conn.execute(
+            "UPDATE log_outbox SET attempts = attempts + 1, error = ?,"
+            " next_try = ? + MIN(300, 5 * (1 << MIN(attempts, 6))) WHERE job_id = ?",
+            (error[:2000], time.time(), job_id),
+        )
+
+
+def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+    with closing(_conn()) as conn:
+        return _as_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def latest_job(user_email: str, ticket_id: str) -> Optional[Dict[str, Any]]:
+    """Most recent job for this agent/ticket, so a reopened tab can pick up its result."""
+    with closing(_conn()) as conn:
+        return _as_dict(conn.execute(
+            "SELECT * FROM jobs WHERE user_email = ? AND ticket_id = ? ORDER BY id DESC LIMIT 1",
+            (user_email, ticket_id),
+        ).fetchone())
+
+
+def counts() -> Dict[str, int]:
+    with closing(_conn()) as conn:
+        out = {r["status"]: r["n"] for r in conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+        out["log_pending"] = int(conn.execute("SELECT COUNT(*) FROM log_outbox").fetchone()[0])
+    return out
@@ -0,0 +1,253 @@
+# file: smart-support-hub/app/services/exporter.py
+"""
+Streaming export of worksheets to Parquet or gzipped CSV.
+
+Rows are paged from Sheets in fixed-size chunks and written incrementally, so
+memory stays at one chunk regardless of sheet size. Output goes to
+`<data_dir>/exports/<title>/<title>-<first>-<last>.<ext>` (sheet row numbers);
+a file is renamed into place and the per-sheet watermark in `state.json` is
+advanced only once it is complete, so an interrupted run resumes from the last
+finished file and an incremental run exports only rows appended since.
+
+Rows the app rewrites in place (ticket upserts) are found through the change feed
+(app.services.change_feed, cursor `feed_seq` in the state) and re-exported to
+`<title>-updates-<from seq>-<to seq>.<ext>` with a leading `sheet_row` column;
+a later file supersedes earlier ones for the same row. A content hash of every
+exported row is kept in `<data_dir>/export_rows.sqlite`, so an event whose row reads
+back unchanged (an appended row the poller published after this export already
+paged it) is not exported again. Edits made by hand in the Sheet publish no event
+and still need a full export.
+"""
+from __future__ import annotations
+import csv
+import gzip
+import hashlib
+import json
+import os
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.services.local_store import connect, data_dir
+from app.services.metrics import span
+from app.services.schema import arrow_schema, columns_from_values, row_type_for, to_arrow
+from app.services import sheets_client as sc
+
+CHUNK_ROWS = 5000
+ROWS_PER_FILE = 100_000
+FORMATS = ("parquet", "csv")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS row_hashes (
+    title TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (title, row)
+) WITHOUT ROWID;
+"""
+
+
+def _state_path() -> Path:
+    return data_dir("exports") / "state.json"
+
+
+def load_state() -> Dict[str, Dict[str, Any]]:
+    p = _state_path()
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+
+def _row_hash(row: Sequence[Any], width: int) -> str:
+    cells = [str(c) for c in row[:width]] + [""] * (width - len(row))
+    return hashlib.blake2b("\x1f".join(cells).encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _known_hashes(title: str, first: int, last: int) -> Dict[int, str]:
+    with closing(connect("export_rows", _SCHEMA)) as conn:
+        return {int(r["row"]): r["hash"] for r in conn.execute(
+            "SELECT row, hash FROM row_hashes WHERE title = ? AND row BETWEEN ? AND ?", (title, first, last))}
+
+
+def _remember(title: str, hashes: List[Tuple[int, str]]) -> None:
+    with closing(connect("export_rows", _SCHEMA)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT OR REPLACE INTO row_hashes (title, row, hash) VALUES (?, ?, ?)",
+                         [(title, r, h) for r, h in hashes])
+        conn.execute("COMMIT")
+
+
+def _save_state(state: Dict[str, Dict[str, Any]]) -> None:
+    p = _state_path()
+    tmp = p.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+class _Writer:
+    """One output file; Parquet via pyarrow (optional dependency) or gzipped CSV."""
+
+    def __init__(self, path: Path, fields: Sequence[str], fmt: str):
+        self.path, self.fields, self.fmt = path, list(fields), fmt
+        self.rows = 0
+        self.hashes: List[Tuple[int, str]] = []  # (sheet row, content hash), stored once the file is in place
+        if fmt == "parquet":
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow) — or use format 'csv'") from e
+            self._pq = pq.ParquetWriter(str(path), arrow_schema(self.fields), compression="zstd")
+        else:
+            self._fh = gzip.open(path, "wt", encoding="utf-8", newline="")
+            self._csv = csv.writer(self._fh)
+            self._csv.writerow(self.fields)
+
+    def write(self, values: List[List[str]]) -> None:
+        if self.fmt == "parquet":
+            self._pq.write_table(to_arrow(columns_from_values(values, self.fields)))
+        else:
+            width = len(self.fields)
+            self._csv.writerows((r + [""] * (width - len(r)))[:width] for r in values)
+        self.rows += len(values)
+
+    def close(self) -> None:
+        if self.fmt == "parquet":
+            self._pq.close()
+        else:
+            self._fh.close()
+
+
+def _blank(row: Sequence[Any]) -> bool:
+    return not any(str(c).strip() for c in row)
+
+
+def _finish(writer: _Writer, final: Path, state: Dict[str, Dict[str, Any]], title: str,
+            st: Dict[str, Any], **progress: Any) -> Dict[str, Any]:
+    """Rename a complete file into place and checkpoint the watermark with it."""
+    writer.close()
+    os.replace(writer.path, final)
+    _remember(title, writer.hashes)
+    st = dict(st, files=st.get("files", []) + [final.name], **progress)
+    state[title] = st
+    _save_state(state)
+    return st
+
+
+def _export_updates(sh, title: str, rows: List[int], last_col: str, fields: List[str], fmt: str,
+                    out_dir: Path, name: str, chunk_rows: int) -> Optional[_Writer]:
+    """
+    Re-read rows changed in place; written with their sheet row so they supersede the earlier export.
+    Rows whose content hash matches what was last exported for them are skipped.
+    """
+    writer: Optional[_Writer] = None
+    width = len(fields)
+    for i in range(0, len(rows), chunk_rows):
+        batch = rows[i:i + chunk_rows]
+        with span("sheets.values_batch_get"):
+            resp = sh.values_batch_get([sc._a1(title, f"A{r}:{last_col}{r}") for r in batch])
+        known = _known_hashes(title, batch[0], batch[-1])
+        values, hashes = [], []
+        for r, vr in zip(batch, resp.get("valueRanges", [])):
+            got = vr.get("values", [])
+            if not got or _blank(got[0]):
+                continue
+            h = _row_hash(got[0], width)
+            if known.get(r) != h:
+                values.append([str(r)] + list(got[0]))
+                hashes.append((r, h))
+        if values:
+            if writer is None:
+                writer = _Writer(out_dir / f"{name}.tmp", ["sheet_row"] + fields, fmt)
+            writer.write(values)
+            writer.hashes.extend(hashes)
+    return writer
+
+
+def export_worksheet(title: str, fmt: str = "parquet", incremental: bool = True, chunk_rows: int = CHUNK_ROWS,
+                     rows_per_file: int = ROWS_PER_FILE, sh=None) -> Dict[str, Any]:
+    """Export one worksheet; returns {"sheet", "rows", "updated", "files", "last_row"}."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    sh = sh or sc.open_spreadsheet()
+    header = sc.header_rows([title], sh, refresh=True)[title]
+    cls = row_type_for(title, header)
+    fields = list(cls.FIELDS) if cls else [h for h in header if h]
+    width = len(fields)
+
+    state = load_state()
+    st = state.get(title, {})
+    out_dir = data_dir("exports", title)
+    for stale in out_dir.glob("*.tmp"):
+        stale.unlink()
+    ext = "parquet" if fmt == "parquet" else "csv.gz"
+    last_col = sc._col_letter(max(width, 1))
+    written: List[str] = []
+    updated = 0
+
+    # Rows rewritten in place (ticket upserts) since the last run, from the change feed; the cursor is
+    # taken before any read, so a change made while this run pages is exported again by the next one.
+    from app.services import change_feed
+    feed_seq = int(st.get("feed_seq", 0))
+    top, changed, complete = change_feed.changed_rows(title, feed_seq)
+    if incremental and "feed_seq" in st and not complete:
+        incremental = False  # changes may have been pruned from the feed: export everything again
+    if incremental and "feed_seq" in st:
+        rows = [r for r in changed if 2 <= r <= int(st.get("last_row", 1))]
+        name = f"{title}-updates-{feed_seq + 1:09d}-{top:09d}.{ext}"
+        writer = _export_updates(sh, title, rows, last_col, fields, fmt, out_dir, name, chunk_rows) if rows else None
+        if writer is not None:
+            updated = writer.rows
+            st = _finish(writer, out_dir / name, state, title, st, feed_seq=top)
+            written.append(str(out_dir / name))
+
+    next_row = int(st.get("last_row", 1)) + 1 if incremental else 2
+    total = 0
+    writer = None
+    file_first = next_row
+    while True:
+        rng = sc._a1(title, f"A{next_row}:{last_col}{next_row + chunk_rows - 1}")
+        with span("sheets.values_batch_get"):
+            values = sh.values_batch_get([rng]).get("valueRanges", [{}])[0].get("values", [])
+        # Sheets drops trailing blank rows from a range, so a short page is not the end: only an
+        # empty one is. Blank rows inside the data (cleared by hand) are skipped.
+        done = not values
+        data = [r for r in values if not _blank(r)]
+        if data:
+            if writer is None:
+                file_first = next_row
+                writer = _Writer(out_dir / f"{title}-{file_first:09d}.{ext}.tmp", fields, fmt)
+            writer.write(data)
+            writer.hashes.extend((next_row + i, _row_hash(r, width)) for i, r in enumerate(values) if not _blank(r))
+            total += len(data)
+        next_row += len(values)
+        if writer is not None and (done or writer.rows >= rows_per_file):
+            final = out_dir / f"{title}-{file_first:09d}-{next_row - 1:09d}.{ext}"
+            st = _finish(writer, final, state, title, st, last_row=next_row - 1, format=fmt, fields=fields,
+                         feed_seq=top)
+            written.append(str(final))
+            writer = None
+        if done:
+            break
+    if st.get("feed_seq") != top:
+        st = state[title] = dict(st, feed_seq=top)
+        _save_state(state)
+    return {"sheet": title, "rows": total, "updated": updated, "files": written,
+            "last_row": int(st.get("last_row", next_row - 1))}
+
+
+def export_titles(bases: Sequence[str] = ("tickets", "log", "users", "evaluations"), sh=None) -> List[str]:
+    """Worksheets to export: each base sheet that exists plus its time partitions."""
+    sh = sh or sc.open_spreadsheet()
+    titles = [ws.title for ws in sh.worksheets()]
+    out = []
+    for base in bases:
+        if base in titles:
+            out.append(base)
+        if base in sc.PARTITIONED:
+            out.extend(sc.list_partitions(base, titles=titles))
+    return out
+
+
+def export_all(fmt: str = "parquet", incremental: bool = True, bases: Optional[Sequence[str]] = None,
+               chunk_rows: int = CHUNK_ROWS) -> List[Dict[str, Any]]:
+    sh = sc.open_spreadsheet()
+    titles = export_titles(bases or ("tickets", "log", "users", "evaluations"), sh)
+    return [export_worksheet(t, fmt, incremental, chunk_rows, sh=sh) for t in titles]
@@ -0,0 +1,180 @@
+# file: smart-support-hub/app/services/issue_classifier.py
+"""
+Local issue-type classifier: multinomial naive Bayes over hashed word unigrams and
+bigrams, in NumPy.
+
+Trained on `tickets` rows whose `issue_type` an agent confirmed (`issue_type_confirmed`:
+the agent changed the suggested type or ticked "issue type verified"), so the model does
+not just learn the suggestions it made. Training and inference both use `ticket_text`
+(title and description). The model is a single `.npz` under
+`<data_dir>/models/`; inference is vectorised over a whole batch of texts.
+`classify()` returns the heuristic guess whenever the model is missing or its
+confidence is below MIN_CONFIDENCE.
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services.local_store import data_dir
+from app.services.metrics import timed
+
+# numpy is imported on first use (it is on the startup import blacklist).
+if TYPE_CHECKING:
+    import numpy as np
+
+ISSUE_TYPES = ("Access", "Sync", "Bug", "Report", "Enhancement", "Other")
+N_FEATURES = 1 << 18
+ALPHA = 0.1  # additive smoothing
+MIN_CONFIDENCE = float(os.getenv("ISSUE_CLASSIFIER_MIN_CONFIDENCE", "0.6"))
+MIN_TRAIN_ROWS = 50
+MAX_TEXT_CHARS = 4000
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]{2,}")
+_model: Optional[Dict[str, "np.ndarray"]] = None
+_model_mtime: float = -1.0
+_model_lock = threading.Lock()
+
+
+def model_path() -> Path:
+    return data_dir("models") / "issue_type.npz"
+
+
+def ticket_text(title: str, description: str) -> str:
+    """The text the model sees, for training rows and parsed tickets alike."""
+    return f"{title or ''}\n{description or ''}"
+
+
+def _features(text: str) -> List[int]:
+    toks = _TOKEN_RE.findall((text or "")[:MAX_TEXT_CHARS].lower())
+    grams = toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+    # crc32 rather than hash(): stable across processes (PYTHONHASHSEED) and runs
+    return [zlib.crc32(g.encode("utf-8")) & (N_FEATURES - 1) for g in grams]
+
+
+def _encode(texts: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Flattened feature ids plus the document index of each (a COO sparse matrix without values)."""
+    import numpy as np
+    feats = [_features(t) for t in texts]
+    lengths = np.fromiter((len(f) for f in feats), dtype=np.int64, count=len(feats))
+    flat = np.fromiter((i for f in feats for i in f), dtype=np.int64, count=int(lengths.sum()))
+    docs = np.repeat(np.arange(len(feats), dtype=np.int64), lengths)
+    return flat, docs
+
+
+def train(texts: Sequence[str], labels: Sequence[str]) -> Dict[str, "np.ndarray"]:
+    import numpy as np
+    classes = np.array(sorted(set(labels)))
+    y = np.searchsorted(classes, np.asarray(labels))
+    flat, docs = _encode(texts)
+    counts = np.zeros((len(classes), N_FEATURES), dtype=np.float64)
+    np.add.at(counts, (y[docs], flat), 1.0)
+    prior = np.log(np.bincount(y, minlength=len(classes)) / len(y))
+    log_prob = np.log(counts + ALPHA) - np.log(counts.sum(axis=1, keepdims=True) + ALPHA * N_FEATURES)
+    return {"classes": classes, "prior": prior.astype(np.float32),
+            "log_prob": np.ascontiguousarray(log_prob.T, dtype=np.float32)}  # (features, classes)
+
+
+def predict_proba(model: Dict[str, "np.ndarray"], texts: Sequence[str]) -> "np.ndarray":
+    """(len(texts), n_classes) posterior probabilities."""
+    import numpy as np
+    flat, docs = _encode(texts)
+    scores = np.tile(model["prior"], (len(texts), 1)).astype(np.float64)
+    if len(flat):
+        # gather each token's class log-probs, then sum per document in one pass
+        starts = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+        scores[docs[starts]] += np.add.reduceat(model["log_prob"][flat], starts, axis=0)
+    scores -= scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    return scores / scores.sum(axis=1, keepdims=True)
+
+
+def save(model: Dict[str, "np.ndarray"], path: Optional[Path] = None) -> Path:
+    import numpy as np
+    path = path or model_path()
+    tmp = path.with_name(path.name + ".tmp.npz")
+    np.savez_compressed(tmp, **model)
+    os.replace(tmp, path)
+    return path
+
+
+def load() -> Optional[Dict[str, "np.ndarray"]]:
+    """Current model, reloaded when the file changes (after a retrain); None if not trained."""
+    global _model, _model_mtime
+    p = model_path()
+    try:
+        mtime = p.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    with _model_lock:
+        if mtime != _model_mtime:
+            import numpy as np
+            with np.load(p, allow_pickle=False) as z:
+                _model = {k: z[k] for k in z.files}
+            _model_mtime = mtime
+        return _model
+
+
+def _decide(model: Dict[str, "np.ndarray"], texts: Sequence[str], fallback: Callable[[str], str],
+            min_confidence: float) -> List[Tuple[str, float, str]]:
+    proba = predict_proba(model, texts)
+    best = proba.argmax(axis=1)
+    out = []
+    for t, k, p in zip(texts, best, proba[range(len(texts)), best]):
+        label = str(model["classes"][k])
+        if p >= min_confidence and label in ISSUE_TYPES:
+            out.append((label, float(p), "model"))
+        else:
+            out.append((fallback(t), float(p), "heuristic"))
+    return out
+
+
+@timed("classifier.classify")
+def classify(texts: Sequence[str], fallback: Callable[[str], str],
+             min_confidence: float = MIN_CONFIDENCE) -> List[Tuple[str, float, str]]:
+    """[(issue_type, confidence, source)] per text; source is "model" or "heuristic"."""
+    model = load()
+    if model is None or not texts:
+        return [(fallback(t), 0.0, "heuristic") for t in texts]
+    return _decide(model, texts, fallback, min_confidence)
+
+
+def training_rows() -> Tuple[List[str], List[str]]:
+    """(text, issue_type) from tickets whose known issue type an agent confirmed."""
+    from app.services import sheets_client as sc
+    df = sc.read_columns("tickets", ["title", "description", "issue_type", "issue_type_confirmed"], typed=False)
+    df = df[df["issue_type"].isin(ISSUE_TYPES) & (df["issue_type_confirmed"].astype(str).str.upper() == "TRUE")]
+    texts = [ticket_text(t, d) for t, d in zip(df["title"].astype(str), df["description"].astype(str))]
+    return texts, df["issue_type"].tolist()
+
+
+def retrain(holdout: float = 0.2, seed: int = 7) -> Dict[str, object]:
+    """Fit on confirmed tickets, report held-out accuracy, then refit on everything and save."""
+    import numpy as np
+    from app.services.ticket_parser import _guess_issue_type
+    texts, labels = training_rows()
+    if len(texts) < MIN_TRAIN_ROWS:
+        raise RuntimeError(f"Need at least {MIN_TRAIN_ROWS} confirmed tickets to train, found {len(texts)}")
+    order = np.random.default_rng(seed).permutation(len(texts))
+    n_test = max(int(len(texts) * holdout), 1)
+    test, fit = order[:n_test], order[n_test:]
+    m = train([texts[i] for i in fit], [labels[i] for i in fit])
+    truth = [labels[i] for i in test]
+    test_texts = [texts[i] for i in test]
+    proba = predict_proba(m, test_texts)
+    model_pred = [str(m["classes"][k]) for k in proba.argmax(axis=1)]
+    combined = _decide(m, test_texts, _guess_issue_type, MIN_CONFIDENCE)
+    path = save(train(texts, labels))
+    acc = lambda pred: sum(p == t for p, t in zip(pred, truth)) / len(truth)  # noqa: E731
+    return {
+        "rows": len(texts),
+        "classes": sorted(set(labels)),
+        "holdout": n_test,
+        "accuracy_model": round(acc(model_pred), 3),
+        "accuracy_with_fallback": round(acc([c[0] for c in combined]), 3),
+        "accuracy_heuristic": round(acc([_guess_issue_type(t) for t in test_texts]), 3),
+        "path": str(path),
+    }
@@ -0,0 +1,41 @@
+# file: smart-support-hub/app/services/local_store.py
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+PKG_ROOT = Path(__file__).resolve().parents[2]
+
+_initialized: set = set()
+_init_lock = threading.Lock()
+
+
+def data_dir(*parts: str) -> Path:
+    """
+    Local state directory (queues, caches, indexes). Defaults to `<app root>/.data`,
+    override with env SSH_DATA_DIR. Sub-directories are created on demand.
+    """
+    base = Path(os.getenv("SSH_DATA_DIR") or (PKG_ROOT / ".data"))
+    p = base.joinpath(*parts)
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def connect(name: str, schema: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open `<data_dir>/<name>.sqlite` in WAL mode (autocommit) so Streamlit sessions and
+    worker processes can share it. `schema` DDL runs once per process per database.
+    """
+    conn = sqlite3.connect(str(data_dir() / f"{name}.sqlite"), timeout=30, isolation_level=None,
+                           check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    if schema and name not in _initialized:
+        with _init_lock:
+            conn.executescript(schema)
+            _initialized.add(name)
+    return conn
@@ -0,0 +1,191 @@
+# file: smart-support-hub/app/services/log_scan.py
+"""
+Error-signature extraction from large log files.
+
+The file is memory-mapped and matched with byte regexes directly on the map, so
+multi-hundred-MB logs are scanned without reading them into Python strings.
+Error lines are normalised into signatures (timestamps, ids, numbers, paths and
+quoted values replaced by placeholders), deduplicated with counts and first/last
+time seen; Python and Java stack traces are folded into their exception line and
+top frames. The result is a small dict, and `summary_text()` renders the compact
+text that goes into tickets and evaluation prompts.
+"""
+from __future__ import annotations
+import mmap
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Plain keyword alternation over a lower-cased copy of each chunk: the engine scans for
+# literals quickly, whereas (?i:...) or a leading \b makes it retry at every byte (~5x
+# slower). Case (Exception, Traceback stay literal) and word boundaries are checked
+# afterwards in `_accept`, on the original bytes and only on the rare hits.
+KEYWORD_RE = re.compile(rb"error|fatal|critical|severe|exception|traceback \(most recent call last\)")
+_LEVELS = frozenset((b"error", b"fatal", b"critical", b"severe"))
+_CHUNK = 8 << 20
+_OVERLAP = len("traceback (most recent call last)") - 1
+_WORD = frozenset(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+TS_RE = re.compile(rb"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})")
+# Java/JS "at f(...)" / "at f (...)" / "at file.js:1:2", "... 12 more", Python 'File "..."'. The
+# indented source line under a Python frame, and its 3.11+ caret line, only count right after it.
+FRAME_RE = re.compile(rb"\A[ \t]+(?:at [^\s(]+ ?\(|at [^\s(]+:\d+|File \"|\.\.\. \d+ (?:more|common frames omitted))")
+SOURCE_RE = re.compile(rb"\A[ \t]+\S")
+CARET_RE = re.compile(rb"\A[ \t]+[~^]+[ \t\r]*\Z")
+EXC_RE = re.compile(rb"\A(?:Caused by: )?[\w.$]+(?:Error|Exception|Exit|Interrupt)\b")
+
+_NORMALISE = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), ""),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.I), "<hex>"),
+    (re.compile(r"\b[0-9a-f]{16,}\b", re.I), "<hash>"),
+    (re.compile(r"(?:[A-Za-z]:)?(?:[\\/][\w.\-]+){2,}"), "<path>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+MAX_SIGNATURES = 5000  # distinct signatures tracked; later new ones are only counted as "other"
+MAX_FRAMES = 30
+TOP_N = 10
+
+
+def normalise(line: str) -> str:
+    s = line
+    for rx, repl in _NORMALISE:
+        s = rx.sub(repl, s)
+    return s.strip(" -:[]|")[:300]
+
+
+def _hits(mm: mmap.mmap, size: int) -> Iterator[Tuple[int, int]]:
+    """(start, end) of keyword candidates, any case, searched chunk by chunk."""
+    pos = 0
+    while pos < size:
+        end = min(size, pos + _CHUNK)
+        buf = mm[pos:min(size, end + _OVERLAP)].lower()  # same offsets: ASCII-only case change
+        for m in KEYWORD_RE.finditer(buf):
+            if m.start() >= end - pos:
+                break  # seen again, whole, by the next chunk
+            yield pos + m.start(), pos + m.end()
+        pos = end
+
+
+def _accept(mm: mmap.mmap, start: int, end: int, size: int) -> bool:
+    word = mm[start:end]
+    before = mm[start - 1] if start else 0
+    after = mm[end] if end < size else 0
+    if word == b"Error" or word == b"Exception":
+        # a class name (ValueError) or a level/label token ("[Error]", "level=Error", "... Error: x");
+        # not a longer word such as "ErrorCode" or "Errors"
+        return after not in _WORD
+    if word.startswith(b"Traceback"):
+        return True
+    # level words in any case (ERROR, error, Fatal), as whole words only
+    return word.lower() in _LEVELS and before not in _WORD and after not in _WORD
+
+
+def _ts(raw: bytes) -> Optional[str]:
+    m = TS_RE.search(raw[:64])
+    return f"{m.group(1).decode()}T{m.group(2).decode()}" if m else None
+
+
+def _trace(mm: mmap.mmap, pos: int, limit: int) -> Tuple[List[str], List[str], int]:
+    """Stack frames and exception lines following an error line -> (frames, exceptions, end offset)."""
+    frames: List[str] = []
+    excs: List[str] = []
+    prev = b""  # what the last line was: b"File", b"source" or b""
+    while pos < limit and len(frames) < MAX_FRAMES:
+        nl = mm.find(b"\n", pos, limit)
+        end = limit if nl < 0 else nl
+        line = mm[pos:end]
+        if FRAME_RE.match(line):
+            frames.append(line.decode("utf-8", "replace").strip())
+            prev = b"File" if line.lstrip().startswith(b"File ") else b""
+        elif prev == b"File" and SOURCE_RE.match(line):
+            frames.append(line.decode("utf-8", "replace").strip())
+            prev = b"source"
+        elif prev == b"source" and CARET_RE.match(line):
+            prev = b""
+        elif EXC_RE.match(line):
+            # "java.lang.NullPointerException: ..." / "Caused by: ..." / "ValueError: ..." closing a traceback
+            excs.append(line.decode("utf-8", "replace").strip())
+        else:
+            break
+        pos = end + 1
+    return frames, excs, pos
+
+
+def scan(path: Path) -> Dict[str, Any]:
+    """Scan one file; returns sizes, error counts, time window, top signatures and stack traces."""
+    path = Path(path)
+    size = path.stat().st_size
+    sigs: Dict[str, Dict[str, Any]] = {}
+    per_minute: Counter = Counter()
+    other = errors = 0
+    first_ts = last_ts = None
+    if size == 0:
+        return {"file": path.name, "bytes": 0, "errors": 0, "signatures": [], "other_signatures": 0}
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+        for m_start, m_end in _hits(mm, size):
+            if m_start < pos or not _accept(mm, m_start, m_end, size):
+                continue  # inside a line or trace already taken, or not a whole keyword
+            start = mm.rfind(b"\n", 0, m_start) + 1
+            nl = mm.find(b"\n", m_end)
+            end = size if nl < 0 else nl
+            line = mm[start:end]
+            frames, excs, pos = _trace(mm, end + 1, size)
+            errors += 1
+            text = line.decode("utf-8", "replace").strip()
+            ts = _ts(line)
+            if ts:
+                first_ts = first_ts or ts
+                last_ts = ts
+                per_minute[ts[:16]] += 1
+            python_tb = text.endswith("Traceback (most recent call last):")
+            # Python: the exception is the last line and the innermost frame the last one; Java: both come first
+            head = (excs[-1] if python_tb else excs[0]) if excs else text
+            code = [f for f in frames if f.startswith(("at ", "File "))]
+            top = code[-3:] if python_tb else code[:3]
+            key = normalise(head) + ("" if not top else " @ " + " | ".join(normalise(f) for f in top))
+            sig = sigs.get(key)
+            if sig is None:
+                if len(sigs) >= MAX_SIGNATURES:
+                    other += 1
+                    continue
+                sig = sigs[key] = {"signature": normalise(head), "count": 0, "first": ts, "last": ts,
+                                   "sample": text[:300], "frames": top}
+            sig["count"] += 1
+            if ts:
+                sig["first"] = sig["first"] or ts
+                sig["last"] = ts
+    top_sigs = sorted(sigs.values(), key=lambda s: -s["count"])
+    peak = per_minute.most_common(1)
+    return {
+        "file": path.name,
+        "bytes": size,
+        "errors": errors,
+        "distinct": len(sigs),
+        "other_signatures": other,
+        "window": {"first": first_ts, "last": last_ts},
+        "peak_minute": {"minute": peak[0][0], "errors": peak[0][1]} if peak else None,
+        "signatures": top_sigs[:TOP_N],
+    }
+
+
+def summary_text(summary: Dict[str, Any], max_chars: int = 1500) -> str:
+    """Compact, prompt-sized rendering of `scan()` output (never the raw log)."""
+    w = summary.get("window") or {}
+    lines = [
+        f"Log {summary['file']} ({summary['bytes'] / 1_048_576:.1f} MiB): {summary['errors']} error lines, "
+        f"{summary.get('distinct', 0)} distinct signatures"
+        + (f", {w['first']} .. {w['last']}" if w.get("first") else "")
+        + (f"; peak {summary['peak_minute']['errors']}/min at {summary['peak_minute']['minute']}"
+           if summary.get("peak_minute") else "")
+    ]
+    for s in summary.get("signatures", []):
+        lines.append(f"- x{s['count']} {s['signature']}" + (f" [{s['first']} .. {s['last']}]" if s.get("first") else ""))
+        if s.get("frames"):
+            lines.append(f"    {s['frames'][-1 if s['frames'][-1].startswith('File ') else 0][:160]}")
+    out = "\n".join(lines)
+    return out if len(out) <= max_chars else out[: max_chars - 1] + "…"
@@ -0,0 +1,177 @@
+# file: smart-support-hub/app/services/metrics.py
+from __future__ import annotations
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Deque, Dict, Iterator, List, Optional
+
+# Per-operation reservoir of recent latencies (ms). Bounded so long-running
+# Streamlit processes keep constant memory.
+_WINDOW = int(os.getenv("METRICS_WINDOW", "2048"))
+
+_lock = threading.Lock()
+_samples: Dict[str, Deque[float]] = {}
+_counts: Dict[str, int] = {}
+_sums: Dict[str, float] = {}
+_errors: Dict[str, int] = {}
+_events: Dict[str, int] = {}  # plain counters (cache hits, fallbacks, swallowed failures): no latency
+_server_started = False
+
+
+def observe(name: str, ms: float, error: bool = False) -> None:
+    """Record one latency sample (milliseconds) for operation `name`."""
+    with _lock:
+        buf = _samples.get(name)
+        if buf is None:
+            buf = _samples[name] = deque(maxlen=_WINDOW)
+        buf.append(ms)
+        _counts[name] = _counts.get(name, 0) + 1
+        _sums[name] = _sums.get(name, 0.0) + ms
+        if error:
+            _errors[name] = _errors.get(name, 0) + 1
+
+
+def count(name: str, n: int = 1) -> None:
+    """Count `n` occurrences of event `name` (no latency sample; see `counters`)."""
+    with _lock:
+        _events[name] = _events.get(name, 0) + n
+
+
+def counters() -> Dict[str, int]:
+    with _lock:
+        return dict(sorted(_events.items()))
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block and record it under `name` (errors are counted, then re-raised)."""
+    t0 = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        observe(name, (time.perf_counter() - t0) * 1000.0, error=failed)
+
+
+def timed(name: str):
+    """Decorator form of `span`."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def snapshot() -> List[Dict[str, float]]:
+    """Summary per operation: count, errors, mean and p50/p95/p99 over the recent window."""
+    with _lock:
+        items = [(n, list(buf)) for n, buf in _samples.items()]
+        counts, sums, errors = dict(_counts), dict(_sums), dict(_errors)
+    out = []
+    for name, vals in sorted(items):
+        out.append({
+            "operation": name,
+            "count": counts.get(name, 0),
+            "errors": errors.get(name, 0),
+            "total_ms": round(sums.get(name, 0.0), 1),
+            "mean_ms": round(sums.get(name, 0.0) / max(counts.get(name, 1), 1), 1),
+            "p50_ms": round(percentile(vals, 50), 1),
+            "p95_ms": round(percentile(vals, 95), 1),
+            "p99_ms": round(percentile(vals, 99), 1),
+        })
+    return out
+
+
+def reset() -> None:
+    with _lock:
+        _samples.clear()
+        _counts.clear()
+        _sums.clear()
+        _errors.clear()
+        _events.clear()
+
+
+def prometheus_text() -> str:
+    """Render all operations (summary type) and event counters in the Prometheus text exposition format."""
+    lines = [
+        "# HELP ssh_operation_latency_ms Latency of Smart Support Hub operations in milliseconds.",
+        "# TYPE ssh_operation_latency_ms summary",
+    ]
+    err_lines = [
+        "# HELP ssh_operation_errors_total Failed operations.",
+        "# TYPE ssh_operation_errors_total counter",
+    ]
+    for row in snapshot():
+        op = row["operation"].replace("\\", "\\\\").replace('"', '\\"')
+        for q, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lines.append(f'ssh_operation_latency_ms{{operation="{op}",quantile="{q}"}} {row[key]}')
+        lines.append(f'ssh_operation_latency_ms_count{{operation="{op}"}} {row["count"]}')
+        lines.append(f'ssh_operation_latency_ms_sum{{operation="{op}"}} {row["total_ms"]}')
+        err_lines.append(f'ssh_operation_errors_total{{operation="{op}"}} {row["errors"]}')
+    event_lines = [
+        "# HELP ssh_events_total Events counted by Smart Support Hub (cache hits, fallbacks, swallowed failures).",
+        "# TYPE ssh_events_total counter",
+    ]
+    for name, n in counters().items():
+        ev = name.replace("\\", "\\\\").replace('"', '\\"')
+        event_lines.append(f'ssh_events_total{{event="{ev}"}} {n}')
+    return "\n".join(lines + err_lines + event_lines) + "\n"
+
+
+def start_exporter(port: Optional[int] = None, host: str = "127.0.0.1") -> bool:
+    """
+    Serve `/metrics` (Prometheus text) on a background thread, once per process.
+    Port comes from the argument or env METRICS_PORT; returns False when disabled.
+    """
+    global _server_started
+    port = port or int(os.getenv("METRICS_PORT", "0") or 0)
+    if not port:
+        return False
+    with _lock:
+        if _server_started:
+            return True
+        _server_started = True
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError:
+        # Another Streamlit process already owns the port.
+        return False
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return True
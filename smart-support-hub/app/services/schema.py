@@ -0,0 +1,285 @@
+# file: smart-support-hub/app/services/schema.py
+"""
+Canonical worksheet schemas and compact row types.
+
+Every sheet layout is defined once here; sheets_client, utils.gsheets and the
+pages import the header lists from this module. Row types are plain
+`__slots__` classes over string cells (what Sheets returns), so bulk paths can
+move hundreds of thousands of rows without per-row dicts or pydantic models.
+Column helpers transpose sheet values straight into columns for pandas/Arrow.
+"""
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Type
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+TICKETS_HEADERS = [
+    "id","date","requester","title","issue_type","description","links_attachments","involved_teams_people",
+    "investigation_steps","resolution_workaround","owner","status","notes",
+    "structured_summary_problem","structured_summary_cause","structured_summary_steps","structured_summary_resolution",
+    "structured_summary_cross_team","compliance_score","created_by","created_at",
+    "severity","product","module","locale","issue_type_confirmed"
+]
+LOG_HEADERS = [
+    "ticket_id","user_email","prompt","model_response","result_status","missing_sections","compliance_score","created_at"
+]
+USERS_HEADERS = ["email","name","role","active","created_at"]
+EVALUATIONS_HEADERS = [
+    "timestamp","ticket_id","draft_len","rubric_version","model","raw_score","pass","verdict","rationale","failures",
+    "evaluator_latency_ms"
+]
+# Layout the first intake form wrote to `tickets`; kept to read old rows and exports.
+LEGACY_TICKETS_HEADERS = [
+    "timestamp","ticket_id","title","description","severity","product","module","locale","reporter","attachments","status"
+]
+# Legacy column -> current field, for moving rows between the legacy and current layouts.
+LEGACY_ALIASES = {"timestamp": "created_at", "ticket_id": "id", "reporter": "requester", "attachments": "links_attachments"}
+LEGACY_SOURCES = {new: old for old, new in LEGACY_ALIASES.items()}
+
+# Logical types for analytics/export; every other column is a string.
+COLUMN_TYPES: Dict[str, str] = {
+    "date": "date",
+    "created_at": "datetime",
+    "timestamp": "datetime",
+    "compliance_score": "float",
+    "raw_score": "float",
+    "draft_len": "int",
+    "evaluator_latency_ms": "int",
+    "pass": "bool",
+    "active": "bool",
+}
+
+
+def _cell(v: Any) -> str:
+    return "" if v is None else str(v)
+
+
+class SheetRow:
+    """Base for fixed-layout rows. Subclasses set `FIELDS` and `__slots__` to the sheet headers."""
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    def __init__(self, *values: Any, **fields: Any):
+        n = len(values)
+        for i, name in enumerate(self.FIELDS):
+            setattr(self, name, values[i] if i < n else fields.get(name, ""))
+
+    @classmethod
+    def from_row(cls, values: Sequence[Any]):
+        """Build from a positional sheet row (short rows are padded, extra cells dropped)."""
+        return cls(*values[: len(cls.FIELDS)])
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]):
+        return cls(*(d.get(f, "") for f in cls.FIELDS))
+
+    def to_row(self) -> List[str]:
+        return [_cell(getattr(self, f)) for f in self.FIELDS]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and self.to_row() == other.to_row()
+
+    def __repr__(self) -> str:
+        key = self.FIELDS[0] if self.FIELDS else ""
+        return f"{type(self).__name__}({key}={getattr(self, key, '')!r})"
+
+
+class TicketRow(SheetRow):
+    __slots__ = FIELDS = tuple(TICKETS_HEADERS)
+
+
+class LogRow(SheetRow):
+    __slots__ = FIELDS = tuple(LOG_HEADERS)
+
+
+class UserRow(SheetRow):
+    __slots__ = FIELDS = tuple(USERS_HEADERS)
+
+
+class EvaluationRow(SheetRow):
+    __slots__ = FIELDS = tuple(EVALUATIONS_HEADERS)
+
+
+class LegacyTicketRow(SheetRow):
+    __slots__ = FIELDS = tuple(LEGACY_TICKETS_HEADERS)
+
+
+ROW_TYPES: Dict[str, Type[SheetRow]] = {
+    "tickets": TicketRow,
+    "log": LogRow,
+    "users": UserRow,
+    "evaluations": EvaluationRow,
+}
+
+
+def row_type_for(sheet_name: str, header: Optional[Sequence[str]] = None) -> Optional[Type[SheetRow]]:
+    """
+    Row type for a worksheet title, including time partitions such as `log_2026_10`.
+    When the actual header row is given it wins (old `tickets` sheets may use the legacy layout).
+    """
+    if header:
+        hdr = [h.strip() for h in header]
+        for cls in (TicketRow, LogRow, UserRow, EvaluationRow, LegacyTicketRow):
+            n = min(len(hdr), len(cls.FIELDS))
+            # a sheet created before columns were appended to a layout still matches it
+            if n >= 2 and hdr[:n] == list(cls.FIELDS[:n]):
+                return cls
+        return None
+    base = sheet_name.split("_", 1)[0] if sheet_name not in ROW_TYPES else sheet_name
+    return ROW_TYPES.get(base)
+
+
+def align_to_header(row: Mapping[str, Any], header: Sequence[str]) -> List[str]:
+    """Cells of `row` in the order of an actual header row (legacy column names included)."""
+    out = []
+    for h in header:
+        h = h.strip()
+        v = row.get(h)
+        if (v is None or v == "") and h in LEGACY_ALIASES:
+            v = row.get(LEGACY_ALIASES[h])
+        out.append(_cell(v))
+    return out
+
+
+def convert_row(row: SheetRow, cls: Type[SheetRow]) -> SheetRow:
+    """`row` as a `cls` row, fields matched by name (legacy column names included)."""
+    if type(row) is cls:
+        return row
+    d = row.to_dict()
+    for old, new in LEGACY_ALIASES.items():
+        if not d.get(new) and d.get(old):
+            d[new] = d[old]
+    return cls.from_dict(d)
+
+
+# ---------- bulk conversions ----------
+
+def iter_rows(values: Iterable[Sequence[Any]], cls: Type[SheetRow]) -> Iterator[SheetRow]:
+    """Lazily wrap raw sheet values (without the header row) in row objects."""
+    make = cls.from_row
+    for v in values:
+        yield make(v)
+
+
+def columns_from_values(values: Sequence[Sequence[Any]], fields: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    Transpose raw sheet values (no header) into {column: cells}, padding ragged rows.
+    No per-row objects are created, so this is the fast path for analytics.
+    """
+    width = len(fields)
+    if not values:
+        return {f: [] for f in fields}
+    padded = (row if len(row) >= width else list(row) + [""] * (width - len(row)) for row in values)
+    cols = list(zip(*padded))
+    return {f: list(cols[i]) for i, f in enumerate(fields)}
+
+
+def columns_from_rows(rows: Sequence[SheetRow], cls: Type[SheetRow]) -> Dict[str, List[Any]]:
+    return {f: [getattr(r, f) for r in rows] for f in cls.FIELDS}
+
+
+def to_frame(columns: Mapping[str, List[Any]], typed: bool = False) -> "pd.DataFrame":
+    import pandas as pd
+
+    df = pd.DataFrame(dict(columns), copy=False)
+    return coerce_types(df) if typed else df
+
+
+def coerce_types(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Apply COLUMN_TYPES to the columns present (invalid cells become NaN/NaT)."""
+    import pandas as pd
+
+    for col in df.columns:
+        kind = COLUMN_TYPES.get(col)
+        if kind in ("datetime", "date"):
+            df[col] = pd.to_datetime(df[col], errors="coerce", utc=(kind == "datetime"))
+        elif kind in ("float", "int"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        elif kind == "bool":
+            df[col] = df[col].astype(str).str.upper().map({"TRUE": True, "FALSE": False})
+    return df
+
+
+def rows_from_frame(df: "pd.DataFrame", cls: Type[SheetRow]) -> Iterator[SheetRow]:
+    """Row objects from a DataFrame in schema order; missing columns become empty cells."""
+    aligned = df.reindex(columns=list(cls.FIELDS)).fillna("")
+    make = cls.from_row
+    for values in aligned.itertuples(index=False, name=None):
+        yield make(values)
+
+
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%d.%m.%Y")
+
+
+def _parse_datetime(s: str) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(s[:-1] + "+00:00" if s.endswith("Z") else s)
+    except ValueError:
+        for fmt in _DATE_FORMATS + ("%m/%d/%Y %H:%M:%S",):
+            try:
+                dt = datetime.strptime(s, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    # naive values are UTC (the app writes datetime.utcnow()), as in coerce_types
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _typed(kind: str, cell: Any) -> Any:
+    """One sheet cell as `kind`; blank or unparseable cells become None (null), never an error."""
+    s = "" if cell is None else str(cell).strip()
+    if not s:
+        return None
+    if kind in ("float", "int"):
+        try:
+            v = float(s.replace(",", ""))
+        except ValueError:
+            return None
+        if kind == "float":
+            return v
+        return int(v) if v.is_integer() else None
+    if kind == "bool":
+        return {"TRUE": True, "FALSE": False}.get(s.upper())
+    dt = _parse_datetime(s)
+    if kind == "date":
+        return dt.date() if dt else None
+    return dt
+
+
+def _arrow_type(field: str) -> "pa.DataType":
+    import pyarrow as pa
+
+    kind = COLUMN_TYPES.get(field)
+    return {
+        "date": pa.date32(), "datetime": pa.timestamp("us", tz="UTC"), "float": pa.float64(), "int": pa.int64(),
+        "bool": pa.bool_(),
+    }.get(kind, pa.string())
+
+
+def to_arrow(columns: Mapping[str, List[Any]]) -> "pa.Table":
+    """Arrow table typed per COLUMN_TYPES (see `arrow_schema`); bad cells in typed columns become null."""
+    import pyarrow as pa
+
+    out = {}
+    for k, v in columns.items():
+        kind = COLUMN_TYPES.get(k)
+        if kind is None:
+            out[k] = pa.array(["" if c is None else str(c) for c in v], type=pa.string())
+        else:
+            out[k] = pa.array([_typed(kind, c) for c in v], type=_arrow_type(k))
+    return pa.table(out)
+
+
+def arrow_schema(fields: Sequence[str]) -> "pa.Schema":
+    import pyarrow as pa
+
+    return pa.schema([(f, _arrow_type(f)) for f in fields])
@@ -1,31 +1,35 @@
 # file: smart-support-hub/app/services/sheets_client.py
 from __future__ import annotations
+import os
 import re
-from typing import Dict, Any, List
-import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
-from app.config import load_settings
-from app.auth.roles import DEFAULT_ROLE
-
-TICKETS_HEADERS = [
-    "id","date","requester","title","issue_type","description","links_attachments","involved_teams_people",
-    "investigation_steps","resolution_workaround","owner","status","notes",
-    "structured_summary_problem","structured_summary_cause","structured_summary_steps","structured_summary_resolution",
-    "structured_summary_cross_team","compliance_score","created_by","created_at"
-]
-LOG_HEADERS = [
-    "ticket_id","user_email","prompt","model_response","result_status","missing_sections","compliance_score","created_at"
-]
-USERS_HEADERS = ["email","name","role","active","created_at"]
+import threading
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Sequence, Tuple
+from app.services.metrics import span, timed
+from app.services import blob_store, data_cache
+from app.services.schema import (
+    LEGACY_SOURCES, TICKETS_HEADERS, LOG_HEADERS, USERS_HEADERS, SheetRow, TicketRow, LogRow, align_to_header,
+    columns_from_rows, convert_row, iter_rows, row_type_for, to_frame,
+)
+
+# pandas and the gspread/google-auth stack are imported on first use so the
+# login screen renders without paying for them.
+if TYPE_CHECKING:
+    import gspread
+    import pandas as pd
 
 SCOPE = ["https://www.googleapis.com/auth/spreadsheets","https://www.googleapis.com/auth/drive"]
 
+@timed("sheets.auth")
 def _client() -> gspread.Client:
+    from app.config import load_settings
     s = load_settings()
     info = s.gcp_service_account
     if not info:
         raise RuntimeError("Service Account not configured")
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     creds = Credentials.from_service_account_info(info, scopes=SCOPE)
     return gspread.authorize(creds)
 
@@ -34,55 +38,407 @@ def _extract_sheet_id(sid_or_url: str) -> str:
     return m.group(1) if m else sid_or_url
 
 def _open() -> gspread.Spreadsheet:
+    # settings are read on first use, so tools can swap `_open` for a fake backend
+    from app.config import load_settings
     s = load_settings()
     sid = _extract_sheet_id(s.google_sheet_id or "")
     if not sid:
         raise RuntimeError("GOOGLE_SHEET_ID missing")
-    return _client().open_by_key(sid)
+    gc = _client()
+    with span("sheets.open"):
+        return gc.open_by_key(sid)
 
 # Public helpers (لتجنّب ModuleNotFoundError مع الصفحات)
 def open_spreadsheet() -> gspread.Spreadsheet:
     return _open()
 
+def modified_time(sh=None) -> Optional[str]:
+    """The spreadsheet's Drive modified time (moves on every edit, by hand too); None if unavailable."""
+    sh = sh or _open()
+    try:
+        with span("sheets.modified_time"):
+            return str(sh.get_lastUpdateTime())
+    except Exception:
+        return None
+
 def get_df(sheet_name: str) -> pd.DataFrame:
-    sh = _open()
-    ws = sh.worksheet(sheet_name)
-    return pd.DataFrame(ws.get_all_records())
+    import pandas as pd
+
+    def load():
+        ws = _open().worksheet(sheet_name)
+        with span("sheets.get_all_records"):
+            return pd.DataFrame(ws.get_all_records())
+
+    return data_cache.cached(dataset_of(sheet_name), f"get_df:{sheet_name}", load)
 
-def _ensure_headers(ws: gspread.Worksheet, headers: List[str]):
-    values = ws.row_values(1)
+def dataset_of(sheet_name: str) -> str:
+    """Cache/version name of a worksheet: partitions share their base sheet's version."""
+    b = partition_bounds(sheet_name)
+    return b[0] if b else sheet_name
+
+def ensure_headers(ws: gspread.Worksheet, headers: List[str]) -> List[str]:
+    """
+    Write the header row of an empty worksheet, or append columns added to the layout since
+    the sheet was created. Other layouts (e.g. the legacy tickets sheet) are left as they are;
+    rows are written by header name, see `_append_row`. Returns the resulting header.
+    """
+    values = [v.strip() for v in ws.row_values(1)]
     if not values:
         ws.append_row(headers)
+        values = list(headers)
+    elif len(values) < len(headers) and values == list(headers[: len(values)]):
+        if getattr(ws, "col_count", len(headers)) < len(headers):
+            ws.add_cols(len(headers) - ws.col_count)
+        ws.batch_update([{"range": f"A1:{_col_letter(len(headers))}1", "values": [list(headers)]}])
+        values = list(headers)
+    _header_cache.pop(ws.title, None)
+    return values
 
+@timed("sheets.ensure_sheets_and_headers")
 def ensure_sheets_and_headers():
     sh = _open()
     existing = {ws.title for ws in sh.worksheets()}
-    if "tickets" not in existing:
-        ws = sh.add_worksheet(title="tickets", rows=2000, cols=len(TICKETS_HEADERS) + 5)
-        ws.append_row(TICKETS_HEADERS)
-    else:
-        _ensure_headers(sh.worksheet("tickets"), TICKETS_HEADERS)
+    for title, headers in (("tickets", TICKETS_HEADERS), ("log", LOG_HEADERS), ("users", USERS_HEADERS)):
+        if title not in existing:
+            _create_ws(sh, title, headers, rows=2000)
+        else:
+            ensure_headers(sh.worksheet(title), headers)
+
+_create_lock = threading.Lock()
+
+def _create_ws(sh: gspread.Spreadsheet, title: str, headers: List[str], rows: int) -> gspread.Worksheet:
+    """
+    Create a worksheet with its header row. Another session or process may create the same
+    title first: the duplicate-title APIError is absorbed by reopening that sheet. The header
+    is written to A1 (not appended), so the creator and a loser writing it are idempotent.
+    """
+    with _create_lock:
+        try:
+            ws = sh.add_worksheet(title=title, rows=rows, cols=len(headers) + 5)
+        except Exception:
+            try:
+                ws = sh.worksheet(title)
+            except Exception:
+                pass
+            else:
+                if not ws.row_values(1):
+                    _write_header(ws, headers)
+                return ws
+            raise
+        _write_header(ws, headers)
+        return ws
+
+def _write_header(ws: gspread.Worksheet, headers: List[str]) -> None:
+    ws.batch_update([{"range": f"A1:{_col_letter(len(headers))}1", "values": [list(headers)]}])
+    _header_cache.pop(ws.title, None)
+
+# ---------- time partitions ----------
+# Append-only sheets are written to one worksheet per period (`log_2026_10`, or
+# `log_2026_q4` when SHEETS_PARTITIONING=quarterly; "none" keeps a single sheet).
+# The unsuffixed base sheet still holds rows written before partitioning.
+PARTITIONED = {"tickets": TICKETS_HEADERS, "log": LOG_HEADERS}
+PARTITION_ROWS = 2000
 
-    if "log" not in existing:
-        ws = sh.add_worksheet(title="log", rows=2000, cols=len(LOG_HEADERS) + 5)
-        ws.append_row(LOG_HEADERS)
+_PART_RE = re.compile(r"^(?P<base>[a-z]+)_(?P<year>\d{4})_(?:(?P<month>\d{2})|q(?P<quarter>[1-4]))$")
+_known_ws: set = set()
+_known_lock = threading.Lock()
+
+def partition_scheme() -> str:
+    return (os.getenv("SHEETS_PARTITIONING") or "monthly").lower()
+
+def partition_name(base: str, when: Optional[datetime] = None) -> str:
+    """Worksheet title that rows created at `when` (default now, UTC) are written to."""
+    scheme = partition_scheme()
+    if base not in PARTITIONED or scheme == "none":
+        return base
+    when = when or datetime.now(timezone.utc)
+    if scheme == "quarterly":
+        return f"{base}_{when.year}_q{(when.month - 1) // 3 + 1}"
+    return f"{base}_{when.year}_{when.month:02d}"
+
+def partition_bounds(title: str) -> Optional[Tuple[str, date, date]]:
+    """(base, first_day, last_day) for a partition title, None for non-partition sheets."""
+    m = _PART_RE.match(title)
+    if not m or m.group("base") not in PARTITIONED:
+        return None
+    year = int(m.group("year"))
+    if m.group("quarter"):
+        first_month, months = (int(m.group("quarter")) - 1) * 3 + 1, 3
     else:
-        _ensure_headers(sh.worksheet("log"), LOG_HEADERS)
+        first_month, months = int(m.group("month")), 1
+    start = date(year, first_month, 1)
+    nxt = first_month + months
+    end = date(year + (nxt - 1) // 12, (nxt - 1) % 12 + 1, 1)
+    return m.group("base"), start, date.fromordinal(end.toordinal() - 1)
+
+def _row_time(row: SheetRow) -> Optional[datetime]:
+    raw = str(getattr(row, "created_at", "") or getattr(row, "timestamp", "") or "")
+    try:
+        return datetime.fromisoformat(raw[:19]) if raw else None
+    except ValueError:
+        return None
+
+def _partition_ws(sh: gspread.Spreadsheet, title: str, headers: List[str]) -> gspread.Worksheet:
+    """Open a partition, creating it with headers on first use (titles cached per process)."""
+    with _known_lock:
+        known = title in _known_ws
+    if not known:
+        existing = {ws.title for ws in sh.worksheets()}
+        if title not in existing:
+            with span("sheets.add_partition"):
+                _create_ws(sh, title, headers, rows=PARTITION_ROWS)
+        with _known_lock:
+            _known_ws.update(existing | {title})
+    return sh.worksheet(title)
+
+def list_partitions(base: str, sh: Optional[gspread.Spreadsheet] = None,
+                    titles: Optional[List[str]] = None) -> List[str]:
+    """Partition titles of `base`, oldest first."""
+    if titles is None:
+        titles = [ws.title for ws in (sh or _open()).worksheets()]
+    parts = [t for t in titles if (b := partition_bounds(t)) and b[0] == base]
+    return sorted(parts, key=lambda t: partition_bounds(t)[1])
+
+def partitions_for_range(base: str, start: Optional[date] = None, end: Optional[date] = None,
+                         sh: Optional[gspread.Spreadsheet] = None, include_base: bool = True) -> List[str]:
+    """Worksheets that can hold rows of `base` created between start and end (inclusive)."""
+    titles = [ws.title for ws in (sh or _open()).worksheets()]
+    out = []
+    for t in list_partitions(base, titles=titles):
+        _, p_start, p_end = partition_bounds(t)
+        if (start is None or p_end >= start) and (end is None or p_start <= end):
+            out.append(t)
+    return ([base] if include_base and base in titles else []) + out
+
+def _in_range(row: SheetRow, start: Optional[date], end: Optional[date]) -> bool:
+    if start is None and end is None:
+        return True
+    ts = _row_time(row)
+    if ts is None:
+        return False
+    d = ts.date()
+    return (start is None or d >= start) and (end is None or d <= end)
+
+def read_partitioned(base: str, start: Optional[date] = None, end: Optional[date] = None,
+                     include_archived: bool = False) -> List[SheetRow]:
+    """
+    Fan-out read: only the partitions overlapping [start, end] (plus the base sheet)
+    are fetched, then rows are filtered by `created_at`. Archived partitions are read
+    from local files when `include_archived` is set. Rows come back as the base's row
+    type; a legacy-layout sheet is mapped by column name.
+    """
+    sh = _open()
+    want = row_type_for(base)
+    rows: List[SheetRow] = []
+    if include_archived:
+        from app.services.archive import read_archived
+        rows.extend(r for r in read_archived(base, start, end) if _in_range(r, start, end))
+    titles = partitions_for_range(base, start, end, sh)
+    if not titles:
+        return rows
+    with span("sheets.values_batch_get"):
+        resp = sh.values_batch_get([_a1(t) for t in titles])
+    for vr in resp.get("valueRanges", []):
+        values = vr.get("values", [])
+        if not values:
+            continue
+        cls = row_type_for(_range_title(vr.get("range", "")), values[0])
+        if cls is None:
+            continue
+        rows.extend(convert_row(r, want) if want else r for r in iter_rows(values[1:], cls) if _in_range(r, start, end))
+    return rows
+
+def get_df_range(base: str, start: Optional[date] = None, end: Optional[date] = None,
+                 columns: Optional[Sequence[str]] = None, keep_undated: bool = False) -> pd.DataFrame:
+    """DataFrame over the partitions of `base` covering [start, end], optionally column-projected (cached)."""
+    def load():
+        if columns:
+            return read_columns(base, columns, start, end, keep_undated=keep_undated)
+        import pandas as pd
+
+        rows = read_partitioned(base, start, end)
+        return pd.DataFrame(columns_from_rows(rows, row_type_for(base)))
 
-    if "users" not in existing:
-        ws = sh.add_worksheet(title="users", rows=2000, cols=len(USERS_HEADERS) + 5)
-        ws.append_row(USERS_HEADERS)
+    key = f"range:{start}:{end}:{','.join(columns or [])}:{int(keep_undated)}"
+    return data_cache.cached(base, key, load)
+
+# ---------- projected batch reads ----------
+# Header rows are cached per worksheet title, so a projection resolves to A1
+# column ranges without extra calls; all ranges go out in one values_batch_get.
+_header_cache: Dict[str, List[str]] = {}
+
+def _a1(title: str, rng: str = "") -> str:
+    quoted = "'" + title.replace("'", "''") + "'"
+    return f"{quoted}!{rng}" if rng else quoted
+
+def _range_title(a1: str) -> str:
+    title = a1.rsplit("!", 1)[0]
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title
+
+def _col_letter(n: int) -> str:
+    """1 -> A, 27 -> AA."""
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+def clear_header_cache() -> None:
+    _header_cache.clear()
+
+def header_rows(titles: Sequence[str], sh: Optional[gspread.Spreadsheet] = None,
+                refresh: bool = False) -> Dict[str, List[str]]:
+    """Header row of each worksheet; uncached ones are fetched together in one batch call."""
+    missing = [t for t in titles if refresh or t not in _header_cache]
+    if missing:
+        sh = sh or _open()
+        with span("sheets.values_batch_get"):
+            resp = sh.values_batch_get([_a1(t, "1:1") for t in missing])
+        for t, vr in zip(missing, resp.get("valueRanges", [])):
+            vals = vr.get("values", [])
+            _header_cache[t] = [h.strip() for h in vals[0]] if vals else []
+    return {t: _header_cache.get(t, []) for t in titles}
+
+def _column_runs(idx: List[int]) -> List[Tuple[int, int]]:
+    """Contiguous 1-based column runs, e.g. [3, 4, 5, 9] -> [(3, 5), (9, 9)]."""
+    runs: List[Tuple[int, int]] = []
+    for i in sorted(set(idx)):
+        if runs and i == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], i)
+        else:
+            runs.append((i, i))
+    return runs
+
+def batch_read(specs: Sequence[Tuple[str, Sequence[str], Optional[Tuple[int, int]]]],
+               typed: bool = True, sh: Optional[gspread.Spreadsheet] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Read several (worksheet, columns, rows) projections in one round trip.
+
+    `rows` is an optional inclusive (first, last) range of data rows (1 = first row
+    under the header). Columns missing from a sheet come back empty, unless the sheet has
+    the legacy name for them (`ticket_id` for `id`, ...). Returns one DataFrame per
+    worksheet title, typed per schema.COLUMN_TYPES when `typed`.
+    """
+    sh = sh or _open()
+    headers = header_rows([s[0] for s in specs], sh)
+    ranges: List[str] = []
+    plan: List[Tuple[str, List[str], List[Tuple[int, int]], Dict[int, List[str]]]] = []
+    for title, columns, rows in specs:
+        hmap = {h: i + 1 for i, h in enumerate(headers[title]) if h}
+        wanted: Dict[int, List[str]] = {}
+        for c in columns:
+            src = c if c in hmap else LEGACY_SOURCES.get(c)
+            if src in hmap:
+                wanted.setdefault(hmap[src], []).append(c)
+        first = (rows[0] if rows else 1) + 1
+        last = (rows[1] + 1) if rows else ""
+        runs = _column_runs(list(wanted))
+        for a, b in runs:
+            ranges.append(_a1(title, f"{_col_letter(a)}{first}:{_col_letter(b)}{last}"))
+        plan.append((title, list(columns), runs, wanted))
+    resp = {"valueRanges": []}
+    if ranges:
+        with span("sheets.values_batch_get"):
+            resp = sh.values_batch_get(ranges)
+    value_ranges = iter(resp.get("valueRanges", []))
+
+    out: Dict[str, pd.DataFrame] = {}
+    for title, columns, runs, wanted in plan:
+        cols: Dict[str, List[str]] = {}
+        for a, b in runs:
+            vals = next(value_ranges, {}).get("values", [])
+            for j in range(b - a + 1):
+                for name in wanted.get(a + j, ()):
+                    cols[name] = [r[j] if j < len(r) else "" for r in vals]
+        height = max((len(v) for v in cols.values()), default=0)
+        data = {c: (cols.get(c, []) + [""] * (height - len(cols.get(c, [])))) for c in columns}
+        out[title] = to_frame(data, typed=typed)
+    return out
+
+def read_columns(base: str, columns: Sequence[str], start: Optional[date] = None,
+                 end: Optional[date] = None, typed: bool = True, keep_undated: bool = False) -> pd.DataFrame:
+    """
+    Column projection over the partitions of `base` covering [start, end] (one batch call
+    for all of them). `created_at` is fetched for date filtering even if not requested;
+    rows without a parseable one are dropped unless `keep_undated`.
+    """
+    import pandas as pd
+
+    sh = _open()
+    titles = partitions_for_range(base, start, end, sh)
+    need = list(columns) + ([] if "created_at" in columns or (start is None and end is None) else ["created_at"])
+    frames = batch_read([(t, need, None) for t in titles], typed=typed, sh=sh)
+    df = pd.concat([frames[t] for t in titles], ignore_index=True) if frames else to_frame({c: [] for c in need})
+    if start is not None or end is not None:
+        ts = pd.to_datetime(df["created_at"], errors="coerce", utc=True)
+        mask = ts.notna()
+        if start is not None:
+            mask &= ts >= pd.Timestamp(start, tz="UTC")
+        if end is not None:
+            mask &= ts < pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1)
+        if keep_undated:
+            mask |= ts.isna()
+        df = df[mask].reset_index(drop=True)
+    return df[list(columns)]
+
+_UPDATED_ROW_RE = re.compile(r"![A-Z]+(\d+)")
+
+def _target_header(sh, ws, title: str, fields: Sequence[str]) -> List[str]:
+    header = header_rows([title], sh)[title]
+    if header and len(header) < len(fields) and header == list(fields[: len(header)]):
+        header = ensure_headers(ws, list(fields))  # partition created before columns were added
+    return header
+
+def _row_values(row: SheetRow, header: List[str]) -> List[Any]:
+    # write by column name when the sheet's layout differs from the row type's (legacy/extended sheets)
+    return row.to_row() if not header or header == list(row.FIELDS) else align_to_header(row.to_dict(), header)
+
+def _append_row(sheet_name: str, row: SheetRow) -> Tuple[str, Optional[int]]:
+    """Append one row (to its time partition); returns (worksheet title, sheet row number if reported)."""
+    sh = _open()
+    title = partition_name(sheet_name, _row_time(row))
+    if title != sheet_name:
+        ws = _partition_ws(sh, title, PARTITIONED[sheet_name])
     else:
-        _ensure_headers(sh.worksheet("users"), USERS_HEADERS)
+        ws = sh.worksheet(sheet_name)
+    header = _target_header(sh, ws, title, row.FIELDS)
+    values = _row_values(row, header)
+    with span(f"sheets.append_row.{sheet_name}"):
+        resp = ws.append_row(values, value_input_option="USER_ENTERED")
+    data_cache.bump(sheet_name)
+    m = _UPDATED_ROW_RE.search(str(((resp or {}).get("updates") or {}).get("updatedRange", "")))
+    return title, (int(m.group(1)) if m else None)
 
-def _append_row(sheet_name: str, headers: List[str], row_dict: Dict[str, Any]):
+def append_rows(sheet_name: str, rows: List[SheetRow], chunk: int = 5000):
+    """Bulk append (imports, re-scoring): one API call per `chunk` rows per target partition."""
     sh = _open()
-    ws = sh.worksheet(sheet_name)
-    row = [str(row_dict.get(h, "")) for h in headers]
-    ws.append_row(row, value_input_option="USER_ENTERED")
+    groups: Dict[str, List[SheetRow]] = {}
+    for r in rows:
+        groups.setdefault(partition_name(sheet_name, _row_time(r)), []).append(r)
+    for title, part in groups.items():
+        ws = _partition_ws(sh, title, PARTITIONED[sheet_name]) if title != sheet_name else sh.worksheet(title)
+        header = _target_header(sh, ws, title, part[0].FIELDS)  # read once per worksheet
+        for i in range(0, len(part), chunk):
+            with span(f"sheets.append_rows.{sheet_name}"):
+                ws.append_rows([_row_values(r, header) for r in part[i:i + chunk]], value_input_option="USER_ENTERED")
+    data_cache.bump(sheet_name)
+
+def read_rows(sheet_name: str) -> List[SheetRow]:
+    """All data rows of a worksheet as compact row objects (one values call, no per-row dicts)."""
+    ws = _open().worksheet(sheet_name)
+    with span("sheets.get_all_values"):
+        values = ws.get_all_values()
+    if not values:
+        return []
+    cls = row_type_for(sheet_name, values[0])
+    if cls is None:
+        raise RuntimeError(f"Unknown header layout in worksheet {sheet_name!r}")
+    return list(iter_rows(values[1:], cls))
 
 def append_ticket_row(row_dict: Dict[str, Any]):
-    _append_row("tickets", TICKETS_HEADERS, row_dict)
+    _append_row("tickets", TicketRow.from_dict(row_dict))
 
 def append_log_row(row_dict: Dict[str, Any]):
     row_dict = dict(row_dict)
@@ -91,27 +447,36 @@ def append_log_row(row_dict: Dict[str, Any]):
         if isinstance(v, (dict, list)):
             import json
             row_dict[k] = json.dumps(v, ensure_ascii=False)
-    _append_row("log", LOG_HEADERS, row_dict)
+        # large payloads go to the local blob store; the cell keeps "blob:<sha256> <preview>"
+        row_dict[k] = blob_store.externalize(row_dict.get(k))
+    _append_row("log", LogRow.from_dict(row_dict))
 
 def _header_index_map(ws: gspread.Worksheet) -> Dict[str, int]:
     hdrs = ws.row_values(1)
     return {h.strip(): i + 1 for i, h in enumerate(hdrs) if h.strip()}
 
+@timed("sheets.get_user_role")
 def get_user_role(email: str) -> str:
-    sh = _open()
-    ws = sh.worksheet("users")
-    data = ws.get_all_records()
+    from app.auth.roles import DEFAULT_ROLE
+    data = data_cache.cached("users", "records", lambda: _open().worksheet("users").get_all_records())
     for r in data:
         if str(r.get("email", "")).lower() == email.lower():
             return str(r.get("role", DEFAULT_ROLE)) or DEFAULT_ROLE
     return DEFAULT_ROLE
 
-def upsert_user(email: str, name: str, role: str = DEFAULT_ROLE, active: bool = True):
+@timed("sheets.upsert_user")
+def upsert_user(email: str, name: str, role: Optional[str] = None, active: bool = True):
+    if role is None:
+        from app.auth.roles import DEFAULT_ROLE
+        role = DEFAULT_ROLE
     sh = _open()
     ws = sh.worksheet("users")
     data = ws.get_all_records()
     for idx, r in enumerate(data, start=2):
         if str(r.get("email", "")).lower() == email.lower():
+            flag = "TRUE" if active else "FALSE"
+            if (str(r.get("name", "")), str(r.get("role", "")), str(r.get("active", "")).upper()) == (name, role, flag):
+                return  # unchanged: no writes, and the cached users data stays valid
             hmap = _header_index_map(ws)
             if "name" in hmap:
                 ws.update_cell(idx, hmap["name"], name)
@@ -119,8 +484,10 @@ def upsert_user(email: str, name: str, role: str = DEFAULT_ROLE, active: bool =
                 ws.update_cell(idx, hmap["role"], role)
             if "active" in hmap:
                 ws.update_cell(idx, hmap["active"], "TRUE" if active else "FALSE")
+            data_cache.bump("users")
             return
     ws.append_row(
-        [email, name, role, "TRUE" if active else "FALSE", pd.Timestamp.utcnow().isoformat()],
+        [email, name, role, "TRUE" if active else "FALSE", datetime.now(timezone.utc).isoformat()],
         value_input_option="USER_ENTERED",
     )
+    data_cache.bump("users")
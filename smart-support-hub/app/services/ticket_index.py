@@ -0,0 +1,382 @@
+# file: smart-support-hub/app/services/ticket_index.py
+"""
+Ticket upsert by id, backed by a persistent id -> (worksheet, row) index.
+
+The index lives in `<data_dir>/ticket_index.sqlite`. Each tickets worksheet
+(base sheet plus time partitions) has a watermark, so a refresh reads only the
+id cells of rows added since the last one, for all worksheets in one batch call.
+An update rewrites only the cells that changed, in one `batch_update` call.
+Callers may pass an idempotency key; a retried save with the same key returns the
+first result without writing again (keys are kept for IDEMPOTENCY_KEEP_S). Every saved row is also applied to the
+per-owner work queue (app.services.work_queue); rows updated in place are
+published to the change feed.
+"""
+from __future__ import annotations
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.services import change_feed, data_cache, work_queue
+from app.services.local_store import connect
+from app.services.metrics import count, span, timed
+from app.services.schema import TICKETS_HEADERS, TicketRow
+from app.services import sheets_client as sc
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticket_rows (id TEXT PRIMARY KEY, title TEXT NOT NULL, row INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS ticket_rows_title ON ticket_rows(title);
+CREATE TABLE IF NOT EXISTS watermarks (title TEXT PRIMARY KEY, last_row INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    ticket_id TEXT NOT NULL,
+    action TEXT NOT NULL,
+    title TEXT,
+    row INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_created_at ON idempotency(created_at);
+CREATE TABLE IF NOT EXISTS ticket_locks (id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+"""
+
+# Fields an update never overwrites once set: the row stays in the partition it was created in.
+KEEP_ON_UPDATE = ("created_at", "created_by")
+ID_COLUMNS = ("id", "ticket_id")  # current layout, legacy intake layout
+# A save holds its ticket's lock (and a 'pending' idempotency key) at most this long; after
+# that a crashed process's lock and key are taken over (a live save renews its lock). Re-running
+# the save is safe: the row is found by id and updated, never appended twice.
+LOCK_S = float(os.getenv("TICKET_LOCK_S", "120"))
+LOCK_WAIT_S = float(os.getenv("TICKET_LOCK_WAIT_S", "60"))
+# Finished idempotency keys are forgotten after this long (a retry comes within minutes).
+IDEMPOTENCY_KEEP_S = float(os.getenv("TICKET_IDEMPOTENCY_KEEP_S", str(7 * 86400)))
+_SHEETS_EPOCH = datetime(1899, 12, 30)  # day 0 of Sheets' date serial numbers
+
+_id_locks: Dict[str, threading.Lock] = {}
+_id_locks_guard = threading.Lock()
+
+
+def _conn() -> sqlite3.Connection:
+    return connect("ticket_index", _SCHEMA)
+
+
+def _lock_for(ticket_id: str) -> threading.Lock:
+    with _id_locks_guard:
+        return _id_locks.setdefault(ticket_id, threading.Lock())
+
+
+def _renew(ticket_id: str, owner: str) -> bool:
+    """Extend this owner's lease on the ticket; False once it expired and someone else took it."""
+    now = time.time()
+    with closing(_conn()) as conn:
+        cur = conn.execute("UPDATE ticket_locks SET expires = ? WHERE id = ? AND owner = ?",
+                           (now + LOCK_S, ticket_id, owner))
+        if cur.rowcount == 0:
+            # expired but not taken over yet: take it back
+            cur = conn.execute("INSERT OR IGNORE INTO ticket_locks (id, owner, expires) VALUES (?, ?, ?)",
+                               (ticket_id, owner, now + LOCK_S))
+    return cur.rowcount == 1
+
+
+def _keep_lock(ticket_id: str, owner: str, done: threading.Event) -> None:
+    while not done.wait(LOCK_S / 3):
+        if not _renew(ticket_id, owner):
+            return
+
+
+@contextmanager
+def _ticket_lock(ticket_id: str) -> Iterator[Callable[[], None]]:
+    """
+    Serialize saves of one ticket across threads (a lock) and processes (a lease row in the
+    index, expiring after LOCK_S so a crashed holder does not block the ticket forever).
+    The lease is renewed while the save runs; the yielded `check` raises TimeoutError if it
+    was lost anyway, and is called right before each Sheets write.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    with _lock_for(ticket_id):
+        deadline = time.time() + LOCK_WAIT_S
+        while True:
+            now = time.time()
+            with closing(_conn()) as conn:
+                conn.execute("DELETE FROM ticket_locks WHERE id = ? AND expires < ?", (ticket_id, now))
+                cur = conn.execute("INSERT OR IGNORE INTO ticket_locks (id, owner, expires) VALUES (?, ?, ?)",
+                                   (ticket_id, owner, now + LOCK_S))
+            if cur.rowcount == 1:
+                break
+            if now > deadline:
+                raise TimeoutError(f"ticket {ticket_id} is being saved by another process")
+            time.sleep(0.05)
+
+        def check() -> None:
+            if not _renew(ticket_id, owner):
+                raise TimeoutError(f"lost the lock on ticket {ticket_id} to another process")
+
+        done = threading.Event()
+        keeper = threading.Thread(target=_keep_lock, args=(ticket_id, owner, done), daemon=True)
+        keeper.start()
+        try:
+            yield check
+        finally:
+            done.set()
+            with closing(_conn()) as conn:
+                conn.execute("DELETE FROM ticket_locks WHERE id = ? AND owner = ?", (ticket_id, owner))
+
+
+def _id_col(header: List[str]) -> Optional[int]:
+    for name in ID_COLUMNS:
+        if name in header:
+            return header.index(name) + 1
+    return None
+
+
+@timed("tickets.index_refresh")
+def refresh(sh=None) -> int:
+    """Index rows appended since the last refresh; returns the number of rows scanned."""
+    sh = sh or sc.open_spreadsheet()
+    sheets = {ws.title: ws for ws in sh.worksheets()}
+    titles = (["tickets"] if "tickets" in sheets else []) + sc.list_partitions("tickets", titles=list(sheets))
+    headers = sc.header_rows(titles, sh)
+    with closing(_conn()) as conn:
+        marks = {r["title"]: int(r["last_row"]) for r in conn.execute("SELECT title, last_row FROM watermarks")}
+        gone = [t for t in marks if t not in sheets]
+        for t in gone:  # archived or deleted worksheets
+            conn.execute("DELETE FROM ticket_rows WHERE title = ?", (t,))
+            conn.execute("DELETE FROM watermarks WHERE title = ?", (t,))
+
+        plan: List[Tuple[str, int]] = []
+        ranges: List[str] = []
+        for t in titles:
+            col = _id_col(headers[t])
+            first = marks.get(t, 1) + 1
+            if col is None or first > getattr(sheets[t], "row_count", first):
+                continue
+            letter = sc._col_letter(col)
+            ranges.append(sc._a1(t, f"{letter}{first}:{letter}"))
+            plan.append((t, first))
+        if not ranges:
+            return 0
+        with span("sheets.values_batch_get"):
+            resp = sh.values_batch_get(ranges)
+
+        scanned = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for (t, first), vr in zip(plan, resp.get("valueRanges", [])):
+                vals = vr.get("values", [])
+                conn.executemany(
+                    "INSERT INTO ticket_rows (id, title, row) VALUES (?, ?, ?)"
+                    " ON CONFLICT(id) DO UPDATE SET title = excluded.title, row = excluded.row",
+                    [(str(v[0]).strip(), t, first + i) for i, v in enumerate(vals) if v and str(v[0]).strip()],
+                )
+                conn.execute(
+                    "INSERT INTO watermarks (title, last_row) VALUES (?, ?)"
+                    " ON CONFLICT(title) DO UPDATE SET last_row = excluded.last_row",
+                    (t, first - 1 + len(vals)),
+                )
+                scanned += len(vals)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return scanned
+
+
+def lookup(ticket_id: str) -> Optional[Tuple[str, int]]:
+    """(worksheet title, sheet row) of the latest row with this id, from the index only."""
+    with closing(_conn()) as conn:
+        row = conn.execute("SELECT title, row FROM ticket_rows WHERE id = ?", (ticket_id,)).fetchone()
+    return (row["title"], int(row["row"])) if row else None
+
+
+def _forget(title: str) -> None:
+    """Drop a worksheet from the index so the next refresh rescans it from the top."""
+    with closing(_conn()) as conn:
+        conn.execute("DELETE FROM ticket_rows WHERE title = ?", (title,))
+        conn.execute("DELETE FROM watermarks WHERE title = ?", (title,))
+
+
+def _read_row(sh, title: str, row: int, width: int) -> List[str]:
+    # unformatted: the display value of a USER_ENTERED number or date ("1,234", "10/1/2026")
+    # never equals what we wrote, and every save would rewrite those cells
+    with span("sheets.values_batch_get"):
+        resp = sh.values_batch_get([sc._a1(title, f"A{row}:{sc._col_letter(width)}{row}")],
+                                   params={"valueRenderOption": "UNFORMATTED_VALUE",
+                                           "dateTimeRenderOption": "SERIAL_NUMBER"})
+    vals = resp.get("valueRanges", [{}])[0].get("values", [])
+    return [_cell(v) for v in (vals[0] if vals else [])] + [""] * width
+
+
+def _cell(v: Any) -> str:
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _as_number(s: str) -> Optional[float]:
+    """What Sheets stores for a USER_ENTERED value: a number, a date serial, or None (text)."""
+    s = s.strip()
+    try:
+        return float(s.replace(",", ""))
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            delta = datetime.strptime(s, fmt) - _SHEETS_EPOCH
+        except ValueError:
+            continue
+        return delta.days + delta.seconds / 86400
+    return None
+
+
+def _same(current: str, new: str) -> bool:
+    """Whether the unformatted cell value `current` already holds what writing `new` would store."""
+    if current == new:
+        return True
+    if current.strip() == "" or new.strip() == "":
+        return False
+    a, b = _as_number(current), _as_number(new)
+    return a is not None and b is not None and abs(a - b) < 1e-6
+
+
+def _enqueue(row: Dict[str, Any]) -> None:
+    # the work queue is derived state (rebuildable from Sheets): never fail a save over it
+    try:
+        work_queue.apply([row])
+    except Exception:
+        count("queue.apply_failed")
+
+
+def _publish(title: str, row: int, merged: Dict[str, Any]) -> None:
+    # in-place updates are invisible to the change-feed poller; live views and other
+    # processes' work queues get them from here (derived state too: never fail a save)
+    try:
+        change_feed.publish("tickets", title, row, merged)
+    except Exception:
+        count("feed.publish_failed")
+
+
+def _claim(key: str, ticket_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Reserve an idempotency key; returns the earlier result if the key was already used.
+    A key left 'pending' for LOCK_S (its process died mid-save) is reserved again.
+    """
+    now = time.time()
+    with closing(_conn()) as conn:
+        conn.execute("DELETE FROM idempotency WHERE action != 'pending' AND created_at < ?",
+                     (now - IDEMPOTENCY_KEEP_S,))
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO idempotency (key, ticket_id, action, created_at) VALUES (?, ?, 'pending', ?)",
+            (key, ticket_id, now),
+        )
+        if cur.rowcount == 1:
+            return None
+        cur = conn.execute(
+            "UPDATE idempotency SET created_at = ? WHERE key = ? AND action = 'pending' AND created_at < ?",
+            (now, key, now - LOCK_S),
+        )
+        if cur.rowcount == 1:
+            return None
+        prev = conn.execute("SELECT * FROM idempotency WHERE key = ?", (key,)).fetchone()
+    return {"id": prev["ticket_id"], "action": "duplicate", "previous": prev["action"], "title": prev["title"],
+            "row": prev["row"]}
+
+
+def _finish(key: Optional[str], result: Dict[str, Any]) -> None:
+    if not key:
+        return
+    with closing(_conn()) as conn:
+        conn.execute("UPDATE idempotency SET action = ?, title = ?, row = ? WHERE key = ?",
+                     (result["action"], result.get("title"), result.get("row"), key))
+
+
+def _release(key: Optional[str]) -> None:
+    if key:
+        with closing(_conn()) as conn:
+            conn.execute("DELETE FROM idempotency WHERE key = ? AND action = 'pending'", (key,))
+
+
+@timed("tickets.upsert")
+def upsert_ticket(row_dict: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Insert the ticket, or update the changed cells of the existing row with the same id.
+    Returns {"id", "action": inserted|updated|unchanged|duplicate, "title", "row"}.
+    """
+    ticket_id = str(row_dict.get("id", "")).strip()
+    if not ticket_id:
+        raise ValueError("Ticket id is required for upsert")
+    with _ticket_lock(ticket_id) as check:
+        if idempotency_key:
+            prev = _claim(idempotency_key, ticket_id)
+            if prev:
+                return prev
+        try:
+            result = _upsert(ticket_id, row_dict, check)
+        except Exception:
+            _release(idempotency_key)
+            raise
+        _finish(idempotency_key, result)
+        return result
+
+
+def _upsert(ticket_id: str, row_dict: Dict[str, Any], check: Callable[[], None]) -> Dict[str, Any]:
+    sh = sc.open_spreadsheet()
+    loc = lookup(ticket_id)
+    if loc is None:
+        refresh(sh)
+        loc = lookup(ticket_id)
+    for attempt in range(2):
+        if loc is None:
+            break
+        title, row = loc
+        header = sc.header_rows([title], sh)[title]
+        current = _read_row(sh, title, row, max(len(header), 1))
+        col = _id_col(header)
+        if col and current[col - 1].strip() == ticket_id:
+            return _update(sh, title, row, header, current, row_dict, check)
+        # rows were moved or deleted by hand: rescan this worksheet once
+        _forget(title)
+        refresh(sh)
+        loc = lookup(ticket_id) if attempt == 0 else None
+
+    check()
+    title, row = sc._append_row("tickets", TicketRow.from_dict(row_dict))
+    if row:
+        with closing(_conn()) as conn:
+            conn.execute(
+                "INSERT INTO ticket_rows (id, title, row) VALUES (?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET title = excluded.title, row = excluded.row",
+                (ticket_id, title, row),
+            )
+    _enqueue(row_dict)
+    return {"id": ticket_id, "action": "inserted", "title": title, "row": row}
+
+
+def _update(sh, title: str, row: int, header: List[str], current: List[str],
+            row_dict: Dict[str, Any], check: Callable[[], None]) -> Dict[str, Any]:
+    updates = []
+    merged = {h: current[i] for i, h in enumerate(header) if h}
+    for field in TICKETS_HEADERS:
+        if field not in row_dict or field not in header:
+            continue
+        i = header.index(field)
+        new = "" if row_dict[field] is None else str(row_dict[field])
+        if field in KEEP_ON_UPDATE and current[i]:
+            continue
+        merged[field] = new
+        if not _same(current[i], new):
+            updates.append({"range": f"{sc._col_letter(i + 1)}{row}", "values": [[new]]})
+    if not updates:
+        _enqueue(merged)
+        return {"id": row_dict["id"], "action": "unchanged", "title": title, "row": row}
+    check()
+    with span("sheets.batch_update.tickets"):
+        sh.worksheet(title).batch_update(updates, value_input_option="USER_ENTERED")
+    data_cache.bump("tickets")
+    _publish(title, row, merged)
+    _enqueue(merged)
+    return {"id": row_dict["id"], "action": "updated", "title": title, "row": row, "cells": len(updates)}
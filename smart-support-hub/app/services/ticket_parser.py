@@ -1,7 +1,9 @@
 # file: smart-support-hub/app/services/ticket_parser.py
 from __future__ import annotations
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from app.services.metrics import timed
 
 _URL_RE = re.compile(r"https?://\S+")
 _WS = re.compile(r"[ \t]+")
@@ -35,6 +37,21 @@ def _guess_issue_type(src: str) -> str:
     return "Other"
 
 
+def classify_issue_types(texts: List[str], hints: Optional[List[str]] = None) -> List[str]:
+    """
+    Batch issue types: the trained local model on `texts` (issue_classifier.ticket_text, as in
+    training) where confident, else `_guess_issue_type` on `hints` (e.g. the whole pasted ticket).
+    """
+    hints = hints or texts
+    try:
+        from app.services.issue_classifier import classify
+        got = classify(texts, lambda t: "")
+        return [label if source == "model" else _guess_issue_type(h) for (label, _, source), h in zip(got, hints)]
+    except Exception:
+        # a missing or unreadable model must never block parsing
+        return [_guess_issue_type(h) for h in hints]
+
+
 def _extract_id(text: str) -> str | None:
     for pat in [
         r"\bT[_\- ]?(\d{4,})\b",  # T_2123860
@@ -61,6 +78,19 @@ def _extract_observers(block: str) -> List[str]:
     return [x for x in clean if x and len(x) < 80]
 
 
+_SEVERITY_RE = re.compile(r"\b(?:Severity|Priority)\s*:\s*(?:[SP]([0-3])\b|(\w+))", re.IGNORECASE)
+_SEVERITY_WORDS = {"blocker": "S0", "critical": "S0", "urgent": "S1", "high": "S1", "medium": "S2", "normal": "S2",
+                   "low": "S3", "minor": "S3"}
+
+
+def _severity_from_text(text: str) -> str:
+    """"Severity: S1" / "Priority: P1" / "Priority: High" -> "S1"; "" when the block has none."""
+    m = _SEVERITY_RE.search(text)
+    if not m:
+        return ""
+    return f"S{m.group(1)}" if m.group(1) else _SEVERITY_WORDS.get(m.group(2).lower(), "")
+
+
 def _status_from_text(text: str) -> str:
     s = text.lower()
     if any(x in s for x in ("solution approved", "solved", "fixed", "resolved")):
@@ -68,19 +98,20 @@ def _status_from_text(text: str) -> str:
     return "Open"
 
 
+@timed("parser.parse_ticket_text")
 def parse_ticket_text(raw: str) -> Dict[str, str]:
     """
     Parse pasted ticket block into our form fields.
     Returns keys (optional if not found):
     id, title, issue_type, description, links_attachments, involved_teams_people,
-    requester, status, notes
+    requester, status, severity, notes, issue_type_suggested (the issue_type guess, kept to tell
+    whether the agent changed it)
     """
     text = (raw or "").replace("\u00A0", " ").strip()
 
     title = _find(r"Service Title\s*:\s*(.+)", text) or _find(r"^\s*(.+)$", text)
 
     stype = _find(r"Please select service type\s*:\s*(.+)", text)
-    issue_type = _guess_issue_type((stype or "") + " " + (title or "") + " " + text)
 
     m = re.search(
         r"3\)\s*Description\s*:\s*(.+?)(?:\n\s*4\)|\n\s*5\)|\n\s*Created:|\Z)",
@@ -93,6 +124,10 @@ def parse_ticket_text(raw: str) -> Dict[str, str]:
         m2 = re.search(r"Description\s*:\s*(.+)", text, flags=re.IGNORECASE | re.DOTALL)
         desc = _clean(m2.group(1)) if m2 else ""
 
+    from app.services.issue_classifier import ticket_text
+    issue_type = classify_issue_types([ticket_text(title or "", desc or "")],
+                                      hints=[(stype or "") + " " + (title or "") + " " + text])[0]
+
     urls = list(dict.fromkeys(_URL_RE.findall(text)))
     attaches = []
     if re.search(r"Attachment\\?s\s*:\s*Attached document", text, re.IGNORECASE):
@@ -128,10 +163,12 @@ def parse_ticket_text(raw: str) -> Dict[str, str]:
         "id": id_guess or "",
         "title": title or "",
         "issue_type": issue_type,
+        "issue_type_suggested": issue_type,
         "description": desc or "",
         "links_attachments": links_attachments,
         "involved_teams_people": involved,
         "requester": requester or "",
         "status": status,
+        "severity": _severity_from_text(text),
         "notes": notes,
     }
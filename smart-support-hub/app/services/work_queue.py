@@ -0,0 +1,221 @@
+# file: smart-support-hub/app/services/work_queue.py
+"""
+Per-owner work queue of open tickets, kept in `<data_dir>/work_queue.sqlite`.
+
+Only open tickets are stored, one row per ticket id with its owner, status and a
+precomputed priority (severity rank, then issue-type rank); age breaks ties, the
+oldest first. The (owner, priority, created_ts) index keeps every owner's queue
+in priority order, so "next N for this agent" is an index seek plus N rows,
+never a sheet read or a DataFrame filter; (owner, status, priority, created_ts)
+does the same per status. Severity comes from the `severity` column, which the
+intake form and the agent form (from the pasted ticket) fill; a ticket without one
+ranks as S2.
+
+The queue is updated as tickets are saved (ticket_index.upsert_ticket and the
+intake form call `apply`) and from the change feed for rows appended elsewhere.
+`rebuild()` re-reads the owner/status columns from Sheets once, on first use or
+on demand (status edits made directly in Sheets are only seen then).
+"""
+from __future__ import annotations
+import heapq
+import re
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from app.services import change_feed
+from app.services.local_store import connect
+from app.services.metrics import timed
+
+OPEN_STATUSES = ("New", "Open", "In Progress", "Waiting External", "Pending Customer")
+SEVERITY_RANK = {"S0": 0, "S1": 1, "S2": 2, "S3": 3}
+DEFAULT_SEVERITY = "S2"
+# Blocked users and broken syncs before bugs, reports and wishes.
+ISSUE_TYPE_RANK = {"Access": 0, "Sync": 1, "Bug": 1, "Report": 2, "Other": 2, "Enhancement": 3}
+COLUMNS = ["id", "ticket_id", "title", "severity", "issue_type", "owner", "status", "notes", "created_at", "date"]
+
+_SEVERITY_RE = re.compile(r"\bS([0-3])\b")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    status TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    issue_type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    created_ts REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS queue_owner ON queue(owner, priority, created_ts);
+CREATE INDEX IF NOT EXISTS queue_owner_status ON queue(owner, status, priority, created_ts);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def _conn() -> sqlite3.Connection:
+    return connect("work_queue", _SCHEMA)
+
+
+def is_open(status: Any) -> bool:
+    return str(status or "").strip() in OPEN_STATUSES
+
+
+def severity_of(row: Dict[str, Any]) -> str:
+    """Severity from the `severity` cell, or the "Severity: S1" note of tickets saved before it existed."""
+    m = _SEVERITY_RE.search(str(row.get("severity") or ""))
+    if not m:
+        notes = str(row.get("notes") or "")
+        i = notes.find("Severity:")
+        m = _SEVERITY_RE.search(notes, i) if i >= 0 else None
+    return f"S{m.group(1)}" if m else DEFAULT_SEVERITY
+
+
+def priority(severity: str, issue_type: str) -> int:
+    """Lower is more urgent."""
+    return SEVERITY_RANK.get(severity, SEVERITY_RANK[DEFAULT_SEVERITY]) * 10 + ISSUE_TYPE_RANK.get(issue_type, 2)
+
+
+def _ts(row: Dict[str, Any]) -> float:
+    for field in ("created_at", "date", "timestamp"):
+        raw = str(row.get(field) or "").strip()
+        if not raw:
+            continue
+        try:
+            dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+    return time.time()
+
+
+def _apply(conn: sqlite3.Connection, row: Dict[str, Any], now: float) -> None:
+    ticket_id = str(row.get("id") or row.get("ticket_id") or "").strip()
+    if not ticket_id:
+        return
+    status = str(row.get("status") or "").strip()
+    if not is_open(status):
+        conn.execute("DELETE FROM queue WHERE id = ?", (ticket_id,))
+        return
+    sev = severity_of(row)
+    issue_type = str(row.get("issue_type") or "Other").strip() or "Other"
+    conn.execute(
+        "INSERT INTO queue (id, owner, status, severity, issue_type, title, priority, created_ts, updated_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, status = excluded.status,"
+        " severity = excluded.severity, issue_type = excluded.issue_type, title = excluded.title,"
+        " priority = excluded.priority, updated_at = excluded.updated_at",  # created_ts stays: age is since creation
+        (ticket_id, str(row.get("owner") or "").strip(), status, sev, issue_type, str(row.get("title") or ""),
+         priority(sev, issue_type), _ts(row), now),
+    )
+
+
+def apply(rows: Iterable[Dict[str, Any]]) -> None:
+    """Enqueue, re-prioritise or drop (closed) the given ticket rows, in one transaction."""
+    now = time.time()
+    with closing(_conn()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                _apply(conn, row, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def _set_meta(conn: sqlite3.Connection, key: str, value: Any) -> None:
+    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                 (key, str(value)))
+
+
+@timed("queue.rebuild")
+def rebuild() -> int:
+    """Replace the queue with the open tickets currently in Sheets; returns how many are open."""
+    from app.services import sheets_client as sc
+
+    # cursor first: rows appended while reading are applied again by sync(), never lost
+    seq = change_feed.latest_seq()
+    df = sc.read_columns("tickets", COLUMNS, typed=False)
+    rows = df.to_dict("records")
+    now = time.time()
+    with closing(_conn()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM queue")
+            for row in rows:  # sheet order: a later row for the same id wins
+                _apply(conn, row, now)
+            _set_meta(conn, "feed_seq", seq)
+            _set_meta(conn, "built_at", now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return int(conn.execute("SELECT COUNT(*) FROM queue").fetchone()[0])
+
+
+def sync() -> int:
+    """Apply tickets appended since the last sync (change feed); builds the queue on first use."""
+    with closing(_conn()) as conn:
+        seq = _meta(conn, "feed_seq")
+    if seq is None:
+        return rebuild()
+    new_seq, events, resync = change_feed.since(int(seq), ["tickets"])
+    if resync:
+        return rebuild()  # the feed pruned events this queue had not applied yet
+    rows = events["tickets"]
+    if rows:
+        apply(rows)
+    if new_seq != int(seq):
+        with closing(_conn()) as conn:
+            _set_meta(conn, "feed_seq", new_seq)
+    return len(rows)
+
+
+def next_for(owner: str, n: int = 10, statuses: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """The `n` most urgent open tickets of `owner` ("" = unassigned), most urgent and oldest first."""
+    sql = "SELECT * FROM queue WHERE owner = ?{} ORDER BY priority, created_ts LIMIT ?"
+    with closing(_conn()) as conn:
+        if not statuses:
+            rows = conn.execute(sql.format(""), (owner.strip(), n)).fetchall()
+        else:
+            # one index seek per status (each already in priority order), merged: filtering an
+            # owner's whole queue by status would scan every row of it
+            per_status = [conn.execute(sql.format(" AND status = ?"), (owner.strip(), s, n)).fetchall()
+                          for s in dict.fromkeys(statuses)]
+            rows = heapq.nsmallest(n, (r for rs in per_status for r in rs),
+                                   key=lambda r: (r["priority"], r["created_ts"]))
+    return [dict(r) for r in rows]
+
+
+def depth_by_owner() -> List[Dict[str, Any]]:
+    """Queue depth per owner: open tickets, how many are S0/S1, per-status counts and the oldest one's age."""
+    with closing(_conn()) as conn:
+        rows = conn.execute(
+            "SELECT owner, status, COUNT(*) AS n, SUM(severity IN ('S0', 'S1')) AS urgent,"
+            " MIN(created_ts) AS oldest FROM queue GROUP BY owner, status"
+        ).fetchall()
+    now = time.time()
+    out: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        d = out.setdefault(r["owner"], {"owner": r["owner"], "open": 0, "urgent": 0, "oldest_days": 0.0})
+        d["open"] += r["n"]
+        d["urgent"] += r["urgent"] or 0
+        d[r["status"]] = r["n"]
+        d["oldest_days"] = max(d["oldest_days"], round((now - r["oldest"]) / 86400, 1))
+    return sorted(out.values(), key=lambda d: (-d["urgent"], -d["open"]))
+
+
+def stats() -> Dict[str, Any]:
+    with closing(_conn()) as conn:
+        n = int(conn.execute("SELECT COUNT(*) FROM queue").fetchone()[0])
+        built = _meta(conn, "built_at")
+    return {"open": n, "built_at": float(built) if built else None}
@@ -1,31 +1,84 @@
 # file: smart-support-hub/app/ui/pages.py
 from __future__ import annotations
-import json
+import os
+import time
 from typing import Dict, Any
-from datetime import datetime
 import streamlit as st
 
 from app.ui.components import checklist, header
-from app.services.validators import sanitize_prompt_payload
-from app.services.gemini_client import evaluate_strict
-from app.services.sheets_client import (
-    ensure_sheets_and_headers,
-    append_ticket_row,
-    append_log_row,
-    upsert_user,
-)
-from app.services.ticket_parser import parse_ticket_text
+from app.services import agent_flow, eval_queue
+
+# A job nobody has claimed after this long is failed with a message instead of polling forever.
+EVAL_WAIT_S = float(os.getenv("EVAL_QUEUE_WAIT_S", "120"))
 
 
 def _prefill_session(fields: Dict[str, Any]) -> None:
     for k, v in fields.items():
         st.session_state[f"form_{k}"] = v
+    # the parser's issue-type guess belongs to this ticket only
+    st.session_state["issue_type_suggested_for"] = fields.get("id", "")
+
+
+def _drop_stale_suggestion(ticket_id: str) -> None:
+    """Forget the parsed issue-type guess once the form holds another ticket (it would mislabel it)."""
+    if "form_issue_type_suggested" not in st.session_state:
+        return
+    owner = st.session_state.get("issue_type_suggested_for", "")
+    if not owner and ticket_id:
+        st.session_state["issue_type_suggested_for"] = ticket_id  # parsed without an id: the first one typed
+    elif ticket_id != owner:
+        st.session_state.pop("form_issue_type_suggested", None)
+        st.session_state.pop("issue_type_suggested_for", None)
 
 
 def _get(key: str, default=""):
     return st.session_state.get(f"form_{key}", default)
 
 
+@st.fragment(run_every=2)
+def _poll_evaluation(job_id: int) -> None:
+    """Poll the queued evaluation; trigger a full rerun once a worker has finished it."""
+    job = eval_queue.get_job(job_id)
+    if job is None:
+        st.session_state["eval_job_id"] = None
+        return
+    if job["status"] == eval_queue.QUEUED and not job["attempts"]:
+        from app.workers.eval_worker import ensure_worker
+        ensure_worker()  # the in-process worker may have died with its thread
+        if time.time() - job["created_at"] > EVAL_WAIT_S and eval_queue.expire(
+                job_id, f"No evaluation worker picked the job up within {EVAL_WAIT_S:.0f}s"):
+            job = eval_queue.get_job(job_id)
+    if job["status"] in (eval_queue.QUEUED, eval_queue.RUNNING):
+        attempt = max(job["attempts"], 1)
+        note = f" — retrying after: {job['error']}" if job.get("error") else ""
+        st.info(f"Evaluation {job['status']} (attempt {attempt}/{job['max_attempts']}){note}")
+        return
+    st.session_state["eval_job_id"] = None
+    st.session_state["eval_outcome"] = job
+    st.rerun()
+
+
+def _render_outcome(job: Dict[str, Any]) -> bool:
+    """Show a finished evaluation job. Returns True when the ticket may be saved."""
+    if job["status"] == eval_queue.FAILED:
+        st.error(f"Evaluation failed after {job['attempts']} attempts: {job.get('error', '')}")
+        return False
+    res = job["result"] or {}
+    if not res.get("ok"):
+        st.error(f"Rejected — {res.get('message','Model error')}")
+        missing = res.get("missing", [])
+        if missing:
+            st.info("Please include the following sections:")
+            st.code("\n".join(missing))
+        return False
+    st.success("Accepted — structured summary ready.")
+    st.json(res["summary"])
+    if st.session_state.get("last_eval") is None:
+        st.session_state["can_save_ticket"] = True
+        st.session_state["last_eval"] = res
+    return True
+
+
 def main_page(user: Dict[str, str]):
     header(user["name"], user["email"])
 
@@ -34,38 +87,9 @@ def main_page(user: Dict[str, str]):
         raw = st.text_area("Paste the ticket block here", height=220, key="raw_ticket_text")
         if st.button("Parse ticket"):
             try:
-                ensure_sheets_and_headers()
-                upsert_user(user["email"], user["name"])
-
-                parsed = parse_ticket_text(raw or "")
-                _prefill_session(parsed)
-
-                append_log_row(
-                    {
-                        "ticket_id": parsed.get("id", "") or "N/A",
-                        "user_email": user["email"],
-                        "prompt": sanitize_prompt_payload((raw or "")[:5000]),
-                        "model_response": json.dumps(parsed, ensure_ascii=False),
-                        "result_status": "Parsed",
-                        "missing_sections": "",
-                        "compliance_score": "",
-                        "created_at": datetime.utcnow().isoformat(),
-                    }
-                )
+                _prefill_session(agent_flow.parse(user, raw or ""))
                 st.success("Ticket parsed and form pre-filled.")
             except Exception as e:
-                append_log_row(
-                    {
-                        "ticket_id": "",
-                        "user_email": user["email"],
-                        "prompt": sanitize_prompt_payload((raw or "")[:5000]),
-                        "model_response": f"ParseError: {e}",
-                        "result_status": "ParseError",
-                        "missing_sections": "",
-                        "compliance_score": "",
-                        "created_at": datetime.utcnow().isoformat(),
-                    }
-                )
                 st.error(f"Parse failed: {e}")
 
     # ---------- Strict Summary (Agent Journal) ----------
@@ -85,6 +109,7 @@ def main_page(user: Dict[str, str]):
         c1, c2, c3 = st.columns(3)
         with c1:
             ticket_id = st.text_input("id", value=_get("id"), key="form_id")
+            _drop_stale_suggestion(ticket_id)
             date = st.date_input("date")
             requester = st.text_input("requester", value=_get("requester"), key="form_requester")
         with c2:
@@ -97,7 +122,17 @@ def main_page(user: Dict[str, str]):
                 ),
                 key="form_issue_type",
             )
+            st.checkbox("issue type verified", key="form_issue_type_confirmed",
+                        help="Tick when the suggested type is right; a changed type counts as verified.")
             owner = st.text_input("owner", value=user["email"], key="form_owner")
+            severity = st.selectbox(
+                "severity",
+                ["", "S0", "S1", "S2", "S3"],
+                index=["", "S0", "S1", "S2", "S3"].index(_get("severity", "")),
+                format_func=lambda s: s or "(keep / S2)",
+                key="form_severity",
+                help="From the pasted ticket when it names one; left empty, an existing ticket keeps its severity.",
+            )
         with c3:
             status = st.selectbox(
                 "status",
@@ -132,93 +167,44 @@ def main_page(user: Dict[str, str]):
             st.error("Ticket id and Draft are required.")
             return
 
-        ensure_sheets_and_headers()
-        upsert_user(user["email"], user["name"])
-        payload = sanitize_prompt_payload(draft)
-
-        append_log_row(
-            {
-                "ticket_id": ticket_id,
-                "user_email": user["email"],
-                "prompt": payload,
-                "model_response": "",
-                "result_status": "Pending",
-                "missing_sections": "",
-                "compliance_score": "",
-                "created_at": datetime.utcnow().isoformat(),
-            }
-        )
-
-        res = evaluate_strict(draft)
-
-        if not res.get("ok"):
-            st.error(f"Rejected — {res.get('message','Model error')}")
-            missing = res.get("missing", [])
-            if missing:
-                st.info("Please include the following sections:")
-                st.code("\n".join(missing))
-            append_log_row(
-                {
-                    "ticket_id": ticket_id,
-                    "user_email": user["email"],
-                    "prompt": payload,
-                    "model_response": json.dumps(res, ensure_ascii=False),
-                    "result_status": "Rejected",
-                    "missing_sections": "; ".join(missing) if missing else "",
-                    "compliance_score": "",
-                    "created_at": datetime.utcnow().isoformat(),
-                }
-            )
+        st.session_state["eval_job_id"] = agent_flow.submit_evaluation(user, ticket_id, draft)
+        st.session_state["eval_outcome"] = None
+        st.session_state["can_save_ticket"] = False
+        st.session_state["last_eval"] = None
+
+    if st.session_state.get("eval_job_id"):
+        _poll_evaluation(st.session_state["eval_job_id"])
+    elif ticket_id and not st.session_state.get("eval_outcome"):
+        # Work survives closed tabs: offer the last result a worker produced for this ticket.
+        last = eval_queue.latest_job(user["email"], ticket_id)
+        if last and last["status"] != eval_queue.QUEUED:
+            if st.button(f"Show last evaluation for {ticket_id} ({last['status']})"):
+                if last["status"] == eval_queue.RUNNING:
+                    st.session_state["eval_job_id"] = last["id"]
+                else:
+                    st.session_state["eval_outcome"] = last
+                st.rerun()
+
+    outcome = st.session_state.get("eval_outcome")
+    if outcome:
+        if not _render_outcome(outcome):
             return
-        else:
-            st.success("Accepted — structured summary ready.")
-            st.json(res["summary"])
-            st.session_state["can_save_ticket"] = True
-            st.session_state["last_eval"] = res
-
-            append_log_row(
-                {
-                    "ticket_id": ticket_id,
-                    "user_email": user["email"],
-                    "prompt": payload,
-                    "model_response": json.dumps(res, ensure_ascii=False),
-                    "result_status": "Accepted",
-                    "missing_sections": "",
-                    "compliance_score": res.get("compliance_score", 100),
-                    "created_at": datetime.utcnow().isoformat(),
-                }
-            )
 
     # ---------- Save ----------
     if st.session_state.get("can_save_ticket") and st.session_state.get("last_eval"):
         if st.button("Confirm Save Ticket"):
             res = st.session_state["last_eval"]
-            summary = res["summary"]
-            append_ticket_row(
-                {
-                    "id": st.session_state.get("form_id", ticket_id),
-                    "date": str(date),
-                    "requester": st.session_state.get("form_requester", ""),
-                    "title": st.session_state.get("form_title", ""),
-                    "issue_type": st.session_state.get("form_issue_type", "Other"),
-                    "description": st.session_state.get("form_description", ""),
-                    "links_attachments": st.session_state.get("form_links_attachments", ""),
-                    "involved_teams_people": st.session_state.get("form_involved_teams_people", ""),
-                    "investigation_steps": st.session_state.get("form_investigation_steps", ""),
-                    "resolution_workaround": st.session_state.get("form_resolution_workaround", ""),
-                    "owner": st.session_state.get("form_owner", user["email"]),
-                    "status": st.session_state.get("form_status", "Open"),
-                    "notes": st.session_state.get("form_notes", ""),
-                    "structured_summary_problem": summary.get("problem", ""),
-                    "structured_summary_cause": summary.get("cause", ""),
-                    "structured_summary_steps": summary.get("steps", ""),
-                    "structured_summary_resolution": summary.get("resolution", ""),
-                    "structured_summary_cross_team": summary.get("cross_team", ""),
-                    "compliance_score": res.get("compliance_score", 100),
-                    "created_by": user["email"],
-                    "created_at": datetime.utcnow().isoformat(),
-                }
-            )
-            st.toast(f"Ticket saved successfully. Thank you, {user['name']}.")
+            outcome = st.session_state.get("eval_outcome") or {}
+            form = {f: st.session_state.get(f"form_{f}", "") for f in agent_flow.FORM_FIELDS}
+            form.update(id=form["id"] or ticket_id, date=str(date),
+                        issue_type_suggested=_get("issue_type_suggested"),
+                        issue_type_confirmed=_get("issue_type_confirmed", False))
+            saved = agent_flow.save_ticket(form, res, user, job=outcome or None)
+            if saved["action"] == "duplicate":
+                st.toast("This evaluation was already saved.")
+            else:
+                verb = "updated" if saved["action"] in ("updated", "unchanged") else "saved"
+                st.toast(f"Ticket {verb} successfully. Thank you, {user['name']}.")
             st.session_state["can_save_ticket"] = False
             st.session_state["last_eval"] = None
+            st.session_state["eval_outcome"] = None
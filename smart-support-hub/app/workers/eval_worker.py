@@ -0,0 +1,193 @@
+# file: smart-support-hub/app/workers/eval_worker.py
+"""
+Evaluation workers: drain the SQLite job queue (app.services.eval_queue), run
+`evaluate_strict` with retries and write the Accepted/Rejected log rows.
+
+A result is stored in the queue first; the Sheets log row is written afterwards
+from the queue's outbox and retried with backoff, so a Sheets outage never costs
+a finished evaluation. While a job runs its lease is renewed, and only the lease
+holder can complete it. Workers heartbeat in the queue; when none has, the app
+starts one in-process (`ensure_worker`), so a job is never left with no one to run it.
+
+    python -m app.workers.eval_worker --procs 4
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import os
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+PKG_ROOT = Path(__file__).resolve().parents[2]
+if str(PKG_ROOT) not in sys.path:
+    sys.path.insert(0, str(PKG_ROOT))
+
+from app.services import eval_queue  # noqa: E402
+from app.services.metrics import span  # noqa: E402
+
+
+def _log_result(job: Dict[str, Any], res: Dict[str, Any]) -> None:
+    from app.services.sheets_client import append_log_row
+
+    ok = bool(res.get("ok"))
+    missing = res.get("missing", []) or []
+    append_log_row(
+        {
+            "ticket_id": job["ticket_id"],
+            "user_email": job["user_email"],
+            "prompt": job["payload"].get("payload", ""),
+            "model_response": json.dumps(res, ensure_ascii=False),
+            "result_status": "Accepted" if ok else "Rejected",
+            "missing_sections": "" if ok else "; ".join(missing),
+            "compliance_score": res.get("compliance_score", 100) if ok else "",
+            "created_at": datetime.utcnow().isoformat(),
+        }
+    )
+
+
+def _log_error(job: Dict[str, Any], error: str) -> None:
+    from app.services.sheets_client import append_log_row
+
+    append_log_row(
+        {
+            "ticket_id": job["ticket_id"],
+            "user_email": job["user_email"],
+            "prompt": job["payload"].get("payload", ""),
+            "model_response": f"EvalError: {error}",
+            "result_status": "EvalError",
+            "missing_sections": "",
+            "compliance_score": "",
+            "created_at": datetime.utcnow().isoformat(),
+        }
+    )
+
+
+def process(job: Dict[str, Any], evaluate: Optional[Callable[[str], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    if evaluate is None:
+        from app.services.gemini_client import evaluate_strict as evaluate
+
+    with span("gemini.evaluate_strict"):
+        return evaluate(job["payload"]["draft"])
+
+
+def _keep_lease(job_id: int, worker: str, done: threading.Event, lease_s: float) -> None:
+    while not done.wait(lease_s / 3):
+        if not eval_queue.renew(job_id, worker, lease_s):
+            return
+
+
+def run_job(job: Dict[str, Any], worker: str, evaluate: Optional[Callable[[str], Dict[str, Any]]] = None,
+            lease_s: float = eval_queue.LEASE_S) -> bool:
+    """Evaluate one claimed job under a renewed lease and store the outcome; False if the lease was lost."""
+    done = threading.Event()
+    keeper = threading.Thread(target=_keep_lease, args=(job["id"], worker, done, lease_s), daemon=True)
+    keeper.start()
+    try:
+        res = process(job, evaluate)
+    except Exception as e:
+        eval_queue.fail(job["id"], f"{type(e).__name__}: {e}", worker)
+        return True
+    finally:
+        done.set()
+    return eval_queue.complete(job["id"], res, worker)
+
+
+def flush_logs(limit: int = 20) -> int:
+    """Write pending Sheets log rows of finished jobs; failures are retried later. Returns rows written."""
+    written = 0
+    for job in eval_queue.claim_logs(limit):
+        try:
+            if job["status"] == eval_queue.DONE:
+                _log_result(job, job["result"] or {})
+            else:
+                _log_error(job, job.get("error") or "")
+        except Exception as e:
+            eval_queue.log_failed(job["id"], f"{type(e).__name__}: {e}")
+            continue
+        eval_queue.log_written(job["id"])
+        written += 1
+    return written
+
+
+def run_worker(poll_s: float = 1.0, once: bool = False, evaluate: Optional[Callable[[str], Dict[str, Any]]] = None,
+               stop: Optional[threading.Event] = None) -> None:
+    """Claim → evaluate → complete → log, forever (until the queue is empty with `once`, or `stop` is set)."""
+    name = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    stop = stop or threading.Event()
+    beat = 0.0
+    while not stop.is_set():
+        if time.time() - beat >= eval_queue.HEARTBEAT_S / 3:
+            eval_queue.heartbeat(name)
+            beat = time.time()
+        job = eval_queue.claim(name)
+        if job is not None:
+            run_job(job, name, evaluate)
+        try:
+            flush_logs()
+        except Exception:
+            pass  # the outbox keeps them; next round
+        if job is None:
+            if once:
+                return
+            stop.wait(poll_s)
+
+
+_inline: Optional[threading.Thread] = None
+_inline_stop = threading.Event()
+_inline_lock = threading.Lock()
+
+
+def ensure_worker(evaluate: Optional[Callable[[str], Dict[str, Any]]] = None) -> bool:
+    """
+    Start a worker thread in this process when no worker has heartbeated recently (nobody
+    ran `python -m app.workers.eval_worker`). Returns True if one was started.
+    """
+    global _inline
+    with _inline_lock:
+        if _inline is not None and _inline.is_alive():
+            return False
+        if eval_queue.workers_alive():
+            return False
+        _inline_stop.clear()
+        _inline = threading.Thread(target=run_worker, kwargs={"evaluate": evaluate, "stop": _inline_stop},
+                                   name="eval-worker-inline", daemon=True)
+        _inline.start()
+        return True
+
+
+def stop_inline_worker(timeout: float = 5.0) -> None:
+    _inline_stop.set()
+    if _inline is not None:
+        _inline.join(timeout)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Run evaluation queue workers.")
+    ap.add_argument("--procs", type=int, default=int(os.getenv("EVAL_WORKERS", "2")), help="worker processes")
+    ap.add_argument("--poll", type=float, default=1.0, help="seconds between polls when idle")
+    ap.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = ap.parse_args(argv)
+
+    if args.procs <= 1:
+        run_worker(args.poll, args.once)
+        return 0
+    procs = [mp.Process(target=run_worker, args=(args.poll, args.once), daemon=False) for _ in range(args.procs)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
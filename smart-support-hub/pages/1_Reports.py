@@ -1,6 +1,7 @@
 # file: smart-support-hub/pages/1_Reports.py
 # Standalone page: robust imports + works with our ticket schema.
 import sys
+from datetime import date, timedelta
 from pathlib import Path
 import streamlit as st
 import pandas as pd
@@ -10,39 +11,71 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.services.sheets_client import ensure_sheets_and_headers, open_spreadsheet  # type: ignore
+from app.services.sheets_client import ensure_sheets_and_headers, get_df_range  # type: ignore
+from app.ui import live  # type: ignore
 
 st.set_page_config(page_title="Reports", page_icon="📈", layout="wide")
 st.title("📈 Reports / Analytics")
 
+# Only the monthly `tickets_YYYY_MM` partitions covering this range are read, and only
+# these columns (long description / structured_summary_* text never leaves Sheets).
+REPORT_COLUMNS = ["id", "title", "issue_type", "status", "requester", "created_at"]
+
+c1, c2 = st.columns(2)
+start = c1.date_input("From", value=date.today() - timedelta(days=90))
+end = c2.date_input("To", value=date.today())
+
 try:
     ensure_sheets_and_headers()
-    sh = open_spreadsheet()
-    df = pd.DataFrame(sh.worksheet("tickets").get_all_records())
+    # loaded once per session and range; afterwards only new rows arrive through the change feed
+    # rows without a parseable created_at (old imports, hand edits) are kept and counted below
+    state = live.start(f"reports_{start}_{end}", lambda: get_df_range("tickets", start, end, columns=REPORT_COLUMNS,
+                                                                      keep_undated=True))
 except Exception as e:
     st.error(f"Cannot load tickets yet: {e}")
     st.stop()
 
-if df.empty:
-    st.info("No tickets yet.")
-    st.stop()
 
-# Map our columns -> legacy expected for charts (so مفيش KeyError تاني)
-df_out = pd.DataFrame()
-df_out["timestamp"]    = df.get("created_at", "")
-df_out["ticket_id"]    = df.get("id", "")
-df_out["title"]        = df.get("title", "")
-df_out["description"]  = df.get("description", "")
-df_out["severity"]     = df.get("issue_type", "")
-df_out["product"]      = "TMS"
-df_out["module"]       = ""
-df_out["locale"]       = ""
-df_out["reporter"]     = df.get("requester", "")
-df_out["attachments"]  = df.get("links_attachments", "")
-df_out["status"]       = df.get("status", "")
-
-st.subheader("Mix by severity (mapped from issue_type)")
-st.bar_chart(df_out["severity"].value_counts())
-
-st.subheader("Recent tickets (mapped view)")
-st.dataframe(df_out.tail(200), use_container_width=True)
+def _in_range(row) -> bool:
+    d = str(row.get("created_at", ""))[:10]
+    return str(start) <= d <= str(end)
+
+
+@st.fragment(run_every=live.REFRESH_S)
+def report() -> None:
+    try:
+        live.pull(state, "tickets", columns=REPORT_COLUMNS, keep=_in_range, typed=True, unique="id")
+    except Exception as e:
+        st.caption(f"Live updates paused: {e}")
+    df = state["df"]
+    if df.empty:
+        st.info("No tickets yet.")
+        return
+
+    # Map our columns -> legacy expected for charts (so مفيش KeyError تاني)
+    df_out = pd.DataFrame()
+    df_out["timestamp"]    = df.get("created_at", "")
+    df_out["ticket_id"]    = df.get("id", "")
+    df_out["title"]        = df.get("title", "")
+    df_out["severity"]     = df.get("issue_type", "")
+    df_out["product"]      = "TMS"
+    df_out["reporter"]     = df.get("requester", "")
+    df_out["status"]       = df.get("status", "")
+
+    st.subheader("Mix by severity (mapped from issue_type)")
+    st.bar_chart(df_out["severity"].value_counts())
+
+    st.subheader("Tickets by status")
+    st.bar_chart(df_out["status"].value_counts())
+
+    st.subheader("Tickets per week")
+    dated = df.dropna(subset=["created_at"])
+    st.line_chart(dated.set_index("created_at").resample("W")["id"].count())
+    if len(dated) < len(df):
+        st.caption(f"{len(df) - len(dated)} tickets without a readable created_at are included above but not in this chart.")
+
+    st.subheader("Recent tickets (mapped view)")
+    st.dataframe(df_out.tail(200), use_container_width=True)
+
+
+report()
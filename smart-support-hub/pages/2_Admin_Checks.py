@@ -10,6 +10,9 @@ if str(ROOT) not in sys.path:
 
 from app.services.sheets_client import ensure_sheets_and_headers, open_spreadsheet  # type: ignore
 from app.services.sheets_client import TICKETS_HEADERS, LOG_HEADERS, USERS_HEADERS  # type: ignore
+from app.services.sheets_client import PARTITIONED, list_partitions, partition_scheme, header_rows  # type: ignore
+from app.services.archive import list_archived  # type: ignore
+from app.services import blob_store, data_cache, exporter  # type: ignore
 
 st.set_page_config(page_title="Admin Checks", page_icon="🛠️", layout="wide")
 st.title("🛠️ Admin Checks")
@@ -21,8 +24,10 @@ if st.button("Run Checks"):
         sh = open_spreadsheet()
         ws = [w.title for w in sh.worksheets()]
         st.success(f"Found worksheets: {', '.join(ws)}")
+        # all header rows in one batch call
+        hdrs = header_rows([t for t in ("tickets", "log", "users", "evaluations") if t in ws], sh, refresh=True)
         # tickets
-        t_hdr = sh.worksheet("tickets").row_values(1)
+        t_hdr = hdrs["tickets"]
         if t_hdr[: len(TICKETS_HEADERS)] == TICKETS_HEADERS:
             st.success("tickets headers OK (Smart Support Hub schema).")
         else:
@@ -30,13 +35,78 @@ if st.button("Run Checks"):
                 "tickets headers differ from legacy schema. This is OK — app uses its own schema "
                 "and pages map columns as needed."
             )
+        # time partitions
+        for base in sorted(PARTITIONED):
+            parts = list_partitions(base, titles=ws)
+            archived = list_archived(base)
+            st.info(
+                f"{base} partitions ({partition_scheme()}): {', '.join(parts) or 'none yet'}"
+                + (f" | archived locally: {', '.join(archived)}" if archived else "")
+            )
+        for name, expected in (("log", LOG_HEADERS), ("users", USERS_HEADERS)):
+            if hdrs.get(name, [])[: len(expected)] == expected:
+                st.success(f"{name} headers OK.")
+            else:
+                st.warning(f"{name} headers differ from the expected schema.")
         # evaluations (optional)
-        try:
-            e_hdr = sh.worksheet("evaluations").row_values(1)
+        if "evaluations" in hdrs:
             st.success("evaluations sheet present.")
-        except Exception:
+        else:
             st.info("evaluations sheet not found (optional).")
     except Exception as e:
         st.error(f"Check failed: {e}")
 else:
     st.info("Click **Run Checks** to validate.")
+
+st.divider()
+st.subheader("Shared data cache")
+st.caption(
+    "Sheets reads are cached across sessions and processes and invalidated by version bumps on every "
+    "write made through the app. Invalidate manually after editing the Google Sheet by hand."
+)
+cs = data_cache.stats()
+st.write(f"Versions: {cs['versions'] or '{}'} | entries: {cs['entries']} | {cs['bytes'] / 1024:.0f} KiB")
+if st.button("Invalidate caches"):
+    data_cache.invalidate_all()
+    st.success("All cached datasets invalidated.")
+
+st.divider()
+st.subheader("Bulk export")
+st.caption(
+    "Streams tickets, log, users and evaluations (with time partitions) in chunks to `.data/exports/`. "
+    "Incremental runs write only rows appended since the last export, plus rows the app updated in place."
+)
+c1, c2 = st.columns(2)
+fmt = c1.selectbox("Format", list(exporter.FORMATS), index=0)
+full = c2.checkbox("Full re-export (ignore last export)", value=False)
+if st.button("Export now"):
+    try:
+        with st.spinner("Exporting..."):
+            results = exporter.export_all(fmt, incremental=not full)
+        st.success(f"Exported {sum(r['rows'] for r in results)} new and {sum(r['updated'] for r in results)} updated rows.")
+        st.dataframe(
+            [{"sheet": r["sheet"], "rows": r["rows"], "updated": r["updated"], "through_row": r["last_row"], "files": len(r["files"])}
+             for r in results],
+            use_container_width=True,
+        )
+    except Exception as e:
+        st.error(f"Export failed: {e}")
+
+st.divider()
+st.subheader("Log payloads")
+st.caption(
+    "Long prompts and model responses are kept in the local blob store; the log sheet holds "
+    "`blob:<sha256> <preview>`. Paste a log cell or hash to view the full payload."
+)
+bs = blob_store.stats()
+st.write(f"Stored payloads: {bs['blobs']} | {bs['bytes'] / 1024:.0f} KiB compressed")
+ref = st.text_input("Log cell or blob hash")
+if ref:
+    digest = blob_store.ref_of(ref) or blob_store.ref_of(f"{blob_store.PREFIX}{ref.strip()}")
+    if not digest:
+        st.warning("Not a blob reference.")
+    else:
+        try:
+            st.code(blob_store.get(digest), language="json")
+        except KeyError as e:
+            st.error(f"Payload not found on this host: {e}")
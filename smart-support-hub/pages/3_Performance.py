@@ -0,0 +1,45 @@
+# file: smart-support-hub/pages/3_Performance.py
+# Latency percentiles per operation, collected in-process by app.services.metrics.
+import sys
+from pathlib import Path
+import streamlit as st
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.metrics import counters, snapshot, prometheus_text, reset, start_exporter  # type: ignore
+
+st.set_page_config(page_title="Performance", page_icon="⏱️", layout="wide")
+st.title("⏱️ Performance")
+st.caption(
+    "Latency of Sheets, Gemini, parsing and rerun phases for this server process "
+    "(recent window per operation). Set METRICS_PORT to expose /metrics for Prometheus."
+)
+
+exporting = start_exporter()
+rows = snapshot()
+if not rows:
+    st.info("No operations recorded yet in this process. Use the app, then refresh.")
+else:
+    df = pd.DataFrame(rows).set_index("operation")
+    st.dataframe(df, use_container_width=True)
+    st.subheader("p95 by operation (ms)")
+    st.bar_chart(df["p95_ms"])
+
+events = counters()
+if events:
+    st.subheader("Event counters")
+    st.dataframe(pd.DataFrame({"count": events}), use_container_width=True)
+
+c1, c2 = st.columns(2)
+if c1.button("Refresh"):
+    st.rerun()
+if c2.button("Reset counters"):
+    reset()
+    st.rerun()
+
+with st.expander("Prometheus text"):
+    st.caption("Exporter running." if exporting else "Exporter disabled (METRICS_PORT not set).")
+    st.code(prometheus_text(), language="text")
@@ -0,0 +1,68 @@
+# file: smart-support-hub/pages/4_My_Queue.py
+# Next open tickets per agent, served from the local work-queue index (no sheet read per rerun).
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+import streamlit as st
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import change_feed, work_queue  # type: ignore
+from app.ui import live  # type: ignore
+
+st.set_page_config(page_title="My Queue", page_icon="📋", layout="wide")
+st.title("📋 My Queue")
+st.caption("Open tickets by severity, issue type and age. Updated as tickets are saved; no sheet read per refresh. "
+           "Tickets without a severity (saved from the agent form) rank as S2.")
+
+user = st.session_state.get("user") or {}
+c1, c2, c3 = st.columns([2, 1, 2])
+owner = c1.text_input("Owner", value=user.get("email", ""), help="Leave empty for unassigned tickets.")
+n = c2.number_input("Next", min_value=1, max_value=200, value=10)
+statuses = c3.multiselect("Status", list(work_queue.OPEN_STATUSES), default=[])
+
+
+def _frame(rows):
+    now = datetime.now(timezone.utc).timestamp()
+    df = pd.DataFrame(rows, columns=["id", "severity", "issue_type", "status", "title", "owner", "created_ts"])
+    df["age_days"] = ((now - df["created_ts"]) / 86400).round(1)
+    return df.drop(columns=["created_ts"])
+
+
+@st.fragment(run_every=live.REFRESH_S)
+def queue() -> None:
+    try:
+        change_feed.ensure_poller()
+        work_queue.sync()
+    except Exception as e:
+        st.caption(f"Queue updates paused: {e}")
+    rows = work_queue.next_for(owner, int(n), statuses or None)
+    if not rows:
+        st.info("Nothing open in this queue.")
+    else:
+        st.dataframe(_frame(rows), use_container_width=True, hide_index=True)
+
+    st.subheader("Queue depth per agent")
+    depth = work_queue.depth_by_owner()
+    if depth:
+        df = pd.DataFrame(depth).fillna(0)
+        df["owner"] = df["owner"].replace("", "(unassigned)")
+        st.bar_chart(df.set_index("owner")[["open", "urgent"]])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+queue()
+
+info = work_queue.stats()
+built = info["built_at"]
+st.caption(
+    f"{info['open']} open tickets indexed"
+    + (f"; rebuilt from Sheets {datetime.fromtimestamp(built, timezone.utc):%Y-%m-%d %H:%M} UTC" if built else "")
+    + ". Status edits made directly in Sheets appear after a rebuild."
+)
+if st.button("Rebuild from Sheets"):
+    with st.spinner("Reading owner/status columns..."):
+        st.success(f"{work_queue.rebuild()} open tickets.")
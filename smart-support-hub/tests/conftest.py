@@ -0,0 +1,19 @@
+# file: smart-support-hub/tests/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Every test gets its own local state directory (SQLite stores, blobs, models)."""
+    from app.services import local_store
+
+    monkeypatch.setenv("SSH_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(local_store, "_initialized", set())
+    return tmp_path / "data"
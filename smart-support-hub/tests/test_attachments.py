@@ -0,0 +1,75 @@
+# file: smart-support-hub/tests/test_attachments.py
+import io
+
+from app.services import attachments, log_scan
+
+LOG = b"""2026-10-01 10:00:00 [Error] Connection refused to db:5432
+2026-10-01 10:00:01 worker 3 Error: timeout after 30s
+2026-10-01 10:00:02 level=Error msg="disk full"
+2026-10-01 10:00:03 INFO ErrorCode table loaded, 0 Errors
+2026-10-01 10:00:04 ValueError: bad value
+"""
+
+
+def test_error_level_tokens_are_matched(tmp_path):
+    p = tmp_path / "app.log"
+    p.write_bytes(LOG)
+    out = log_scan.scan(p)
+    assert out["errors"] == 4
+    assert {s["sample"][20:40] for s in out["signatures"]} >= {"[Error] Connection r", "worker 3 Error: time"}
+
+
+def test_staged_upload_is_linked_only_when_the_save_succeeds():
+    a = attachments.ingest(io.BytesIO(LOG), "a.log")
+    attachments.discard_staged([a["id"]])  # save failed
+    assert attachments._lookup(a["id"]) is None
+
+    b = attachments.ingest(io.BytesIO(LOG), "a.log")
+    attachments.attach_to_ticket("T1", [b["id"]])
+    assert [m["id"] for m in attachments.for_ticket("T1")] == [b["id"]]
+    assert attachments.for_ticket("") == []
+
+
+def test_known_upload_is_not_scanned_again(monkeypatch):
+    first = attachments.ingest(io.BytesIO(LOG), "a.log", ticket_id="T1")
+
+    def no_scan(path):
+        raise AssertionError("re-scanned an upload already stored")
+
+    monkeypatch.setattr(log_scan, "scan", no_scan)
+    again = attachments.ingest(io.BytesIO(LOG), "a.log", ticket_id="T2")
+    assert again["summary_text"] == first["summary_text"] and again["id"] == first["id"]
+    assert [m["id"] for m in attachments.for_ticket("T2")] == [first["id"]]
+
+
+def test_level_words_match_in_any_case_as_whole_words(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_scan, "_CHUNK", 64)  # keywords straddle chunk boundaries too
+    p = tmp_path / "app.log"
+    p.write_bytes(b"2026-10-01 10:00:00 error: disk full\n"
+                  b"2026-10-01 10:00:01 Fatal signal 11\n"
+                  b"2026-10-01 10:00:02 severity=info terror_level=low errors=0 critical_path ok\n"
+                  b"2026-10-01 10:00:03 exception handler installed\n"
+                  b"2026-10-01 10:00:04 java.lang.IllegalStateException: closed\n")
+    out = log_scan.scan(p)
+    assert out["errors"] == 3
+    assert {s["sample"][20:30] for s in out["signatures"]} == {"error: dis", "Fatal sign", "java.lang."}
+
+
+def test_indented_lines_after_an_error_are_not_frames(tmp_path):
+    p = tmp_path / "app.log"
+    p.write_bytes(b"2026-10-01 10:00:00 ERROR request failed\n"
+                  b"    retrying in 5s\n"
+                  b"    cache ERROR: stale entry\n"
+                  b"2026-10-01 10:00:01 Traceback (most recent call last):\n"
+                  b'  File "app.py", line 3, in main\n'
+                  b"    run()\n"
+                  b"    ^^^^^\n"
+                  b"    unrelated indented text\n"
+                  b"ValueError: bad\n")
+    out = log_scan.scan(p)
+    assert out["errors"] == 4  # the indented cache error and the ValueError are their own lines
+    sigs = out["signatures"]
+    plain = next(s for s in sigs if "request failed" in s["sample"])
+    assert plain["frames"] == []
+    tb = next(s for s in sigs if s["sample"].endswith("last):"))
+    assert tb["frames"] == ['File "app.py", line 3, in main']
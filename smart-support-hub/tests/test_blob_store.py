@@ -0,0 +1,31 @@
+# file: smart-support-hub/tests/test_blob_store.py
+import threading
+
+from app.services import blob_store
+
+
+def test_threads_storing_the_same_blob_do_not_share_a_temp_file(monkeypatch):
+    real_replace, both_written = blob_store.os.replace, threading.Barrier(2, timeout=5)
+
+    def replace(src, dst):
+        both_written.wait()  # both writers have their temp file on disk before either renames
+        real_replace(src, dst)
+
+    monkeypatch.setattr(blob_store.os, "replace", replace)
+    payload = b"x" * 10_000
+    errors, digests = [], []
+
+    def put():
+        try:
+            digests.append(blob_store.put_bytes(payload))
+        except Exception as e:  # pragma: no cover - the failure being reproduced
+            errors.append(e)
+
+    threads = [threading.Thread(target=put) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(set(digests)) == 1 and blob_store.get_bytes(digests[0]) == payload
+    assert not list(blob_store.data_dir("blobs").glob("*/*.tmp"))
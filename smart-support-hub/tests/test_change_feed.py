@@ -0,0 +1,94 @@
+# file: smart-support-hub/tests/test_change_feed.py
+from contextlib import closing
+
+from app.services import change_feed
+from tools.fakes import FakeSpreadsheet, LatencyModel
+
+
+class _WriterBetweenReads:
+    """Connection wrapper: another process publishes an event right after the first read of `events`."""
+
+    def __init__(self, conn, fired):
+        self._conn, self._fired = conn, fired
+
+    def execute(self, sql, *args):
+        cur = self._conn.execute(sql, *args)
+        if "FROM events" in sql and not self._fired:
+            self._fired.append(True)
+            cur = _Materialized(cur.fetchall())
+            with closing(change_feed.connect("change_feed")) as other:
+                other.execute("INSERT INTO events (dataset, title, row, payload, created_at)"
+                              " VALUES ('tickets', 'tickets', 3, '{\"id\": \"T2\"}', 0)")
+        return cur
+
+    def close(self):
+        self._conn.close()
+
+
+class _Materialized:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+
+def test_event_committed_between_reads_is_not_skipped(monkeypatch):
+    change_feed.publish("tickets", "tickets", 2, {"id": "T1"})
+    real, fired = change_feed._conn, []
+    monkeypatch.setattr(change_feed, "_conn", lambda: _WriterBetweenReads(real(), fired))
+    seq, first, _ = change_feed.since(0, ["tickets"])
+    monkeypatch.setattr(change_feed, "_conn", real)
+    _, second, _ = change_feed.since(seq, ["tickets"])
+    assert fired
+    assert [r["id"] for r in first["tickets"] + second["tickets"]] == ["T1", "T2"]
+
+
+def test_blank_rows_are_not_published():
+    sh = FakeSpreadsheet(LatencyModel(scale=0))
+    ws = sh.add_worksheet("evaluations")
+    ws.append_row(["timestamp", "ticket_id"])
+    change_feed.poll_once(sh, ["evaluations"])  # baseline
+    ws.append_row(["2026-10-01", "T1"])
+    ws.append_row(["", ""])
+    ws.append_row(["2026-10-02", "T2"])
+    assert change_feed.poll_once(sh, ["evaluations"]) == 2
+    _, out, _ = change_feed.since(0, ["evaluations"])
+    assert [r["ticket_id"] for r in out["evaluations"]] == ["T1", "T2"]
+
+
+def test_status_change_by_upsert_reaches_the_feed(monkeypatch):
+    from app.services import sheets_client as sc, ticket_index
+    from app.services.schema import TICKETS_HEADERS
+
+    sh = FakeSpreadsheet(LatencyModel(scale=0))
+    sh.add_worksheet("tickets").append_row(TICKETS_HEADERS)
+    monkeypatch.setenv("SHEETS_PARTITIONING", "none")
+    monkeypatch.setattr(sc, "open_spreadsheet", lambda: sh)
+    monkeypatch.setattr(sc, "_open", lambda: sh)
+    sc.clear_header_cache()
+
+    ticket_index.upsert_ticket({"id": "T1", "title": "t", "status": "Open"})
+    seq = change_feed.latest_seq()
+    assert ticket_index.upsert_ticket({"id": "T1", "status": "Closed"})["action"] == "updated"
+    _, out, _ = change_feed.since(seq, ["tickets"])
+    assert [(r["id"], r["status"]) for r in out["tickets"]] == [("T1", "Closed")]
+
+
+def test_cursor_behind_pruned_events_asks_for_resync():
+    for i in range(5):
+        change_feed.publish("tickets", "tickets", i + 2, {"id": f"T{i}"})
+    with closing(change_feed._conn()) as conn:
+        conn.execute("DELETE FROM events WHERE seq <= 3")  # what poll_once does past KEEP_EVENTS
+    seq, out, resync = change_feed.since(1, ["tickets"])
+    assert resync and out["tickets"] == [] and seq == 5
+    _, out, resync = change_feed.since(3, ["tickets"])
+    assert not resync and [r["id"] for r in out["tickets"]] == ["T3", "T4"]
+
+
+def test_latest_by_keeps_blank_ids_apart():
+    rows = [{"id": "T1", "v": 1}, {"id": "", "v": 2}, {"id": "T1", "v": 3}, {"id": " ", "v": 4}, {"v": 5}]
+    assert [r["v"] for r in change_feed.latest_by(rows, "id")] == [3, 2, 4, 5]
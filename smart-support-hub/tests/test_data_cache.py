@@ -0,0 +1,57 @@
+# file: smart-support-hub/tests/test_data_cache.py
+import pytest
+
+from app.services import data_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_local(monkeypatch):
+    monkeypatch.setattr(data_cache, "_local", data_cache.OrderedDict())
+
+
+def test_local_copies_are_bounded_lru(monkeypatch):
+    monkeypatch.setattr(data_cache, "LOCAL_MAX_ENTRIES", 2)
+    for day in ("01", "02"):
+        data_cache.cached("log", f"range:{day}", lambda: day)
+    data_cache.cached("log", "range:01", lambda: "reloaded")  # touch: 02 is now the oldest
+    data_cache.cached("log", "range:03", lambda: "03")
+    assert list(data_cache._local) == ["log:range:01", "log:range:03"]
+
+
+def test_entries_expire_after_max_age_when_set(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(data_cache.time, "time", lambda: now[0])
+    monkeypatch.setattr(data_cache, "MAX_AGE_S", 60.0)
+    assert data_cache.cached("tickets", "all", lambda: "v1") == "v1"
+    now[0] += 30
+    assert data_cache.cached("tickets", "all", lambda: "v2") == "v1"
+    now[0] += 31
+    assert data_cache.cached("tickets", "all", lambda: "v2") == "v2"
+
+
+def test_edits_made_in_sheets_invalidate_through_the_modified_time():
+    assert data_cache.MAX_AGE_S == 0  # no TTL by default
+    assert data_cache.cached("tickets", "all", lambda: "v1") == "v1"
+    assert data_cache.note_remote_stamp("2026-10-01T10:00:00Z")
+    assert data_cache.cached("tickets", "all", lambda: "v2") == "v2"
+    assert not data_cache.note_remote_stamp("2026-10-01T10:00:00Z")  # unchanged: nothing is reloaded
+    assert data_cache.cached("tickets", "all", lambda: "v3") == "v2"
+
+
+def test_poller_notices_a_hand_edit(monkeypatch):
+    import threading
+    from app.services import change_feed, sheets_client
+    from tools.fakes import FakeSpreadsheet, LatencyModel
+
+    sh = FakeSpreadsheet(LatencyModel(scale=0.0))
+    sh.add_worksheet("tickets").append_rows([["id"], ["T1"]])
+    monkeypatch.setattr(sheets_client, "_open", lambda: sh)
+    monkeypatch.setattr(change_feed, "poll_once", lambda **kw: 0)
+    data_cache.note_remote_stamp(sh.get_lastUpdateTime())
+    assert data_cache.cached("tickets", "all", lambda: "before") == "before"
+
+    sh.worksheet("tickets").update_cell(2, 1, "T1-edited")  # by hand, no version bump
+    stop = threading.Event()
+    monkeypatch.setattr(stop, "wait", lambda s: stop.set())  # one loop
+    change_feed.run_poller(stop)
+    assert data_cache.cached("tickets", "all", lambda: "after") == "after"
@@ -0,0 +1,157 @@
+# file: smart-support-hub/tests/test_eval_queue.py
+import threading
+import time
+
+from app.services import eval_queue
+from app.workers import eval_worker
+
+
+def _ok(draft):
+    return {"ok": True, "compliance_score": 100, "summary": {"problem": draft}}
+
+
+def test_result_is_kept_when_the_sheets_log_fails(monkeypatch):
+    job_id = eval_queue.enqueue("T1", "a@local", {"draft": "d", "payload": "d"})
+    written = []
+
+    def down(job, res):
+        raise RuntimeError("Sheets 503")
+
+    monkeypatch.setattr(eval_worker, "_log_result", down)
+    eval_worker.run_worker(poll_s=0, once=True, evaluate=_ok)
+    job = eval_queue.get_job(job_id)
+    assert job["status"] == eval_queue.DONE and job["attempts"] == 1
+    assert job["result"]["ok"]
+    assert eval_queue.counts()["log_pending"] == 1
+
+    monkeypatch.setattr(eval_worker, "_log_result", lambda job, res: written.append(job["id"]))
+    with eval_queue._conn() as conn:
+        conn.execute("UPDATE log_outbox SET next_try = 0")
+    assert eval_worker.flush_logs() == 1
+    assert written == [job_id]
+    assert eval_queue.counts()["log_pending"] == 0
+    assert eval_worker.flush_logs() == 0
+
+
+def test_expired_lease_cannot_complete():
+    job_id = eval_queue.enqueue("T1", "a@local", {"draft": "d"})
+    first = eval_queue.claim("w1", lease_s=0)
+    time.sleep(0.01)
+    second = eval_queue.claim("w2", lease_s=60)
+    assert first["id"] == second["id"] == job_id
+    assert eval_queue.complete(job_id, {"ok": True}, worker="w1") is False
+    assert eval_queue.complete(job_id, {"ok": True, "by": "w2"}, worker="w2") is True
+    assert eval_queue.get_job(job_id)["result"]["by"] == "w2"
+
+
+def test_running_job_keeps_its_lease():
+    job_id = eval_queue.enqueue("T1", "a@local", {"draft": "d"})
+    job = eval_queue.claim("w1", lease_s=0.3)
+    started = threading.Event()
+    stolen = []
+
+    def slow(draft):
+        started.set()
+        time.sleep(0.8)  # well past the original lease
+        return {"ok": True}
+
+    t = threading.Thread(target=lambda: stolen.append(eval_worker.run_job(job, "w1", slow, lease_s=0.3)))
+    t.start()
+    started.wait()
+    for _ in range(8):
+        assert eval_queue.claim("w2", lease_s=60) is None
+        time.sleep(0.1)
+    t.join()
+    assert stolen == [True]
+    assert eval_queue.get_job(job_id)["status"] == eval_queue.DONE
+    assert eval_queue.get_job(job_id)["attempts"] == 1
+
+
+def test_job_that_keeps_losing_its_worker_is_failed():
+    job_id = eval_queue.enqueue("T1", "a@local", {"draft": "d"}, max_attempts=2)
+    for w in ("w1", "w2"):
+        assert eval_queue.claim(w, lease_s=0)["id"] == job_id  # the worker dies mid-job
+        time.sleep(0.01)
+    assert eval_queue.claim("w3", lease_s=60) is None
+    job = eval_queue.get_job(job_id)
+    assert job["status"] == eval_queue.FAILED and job["attempts"] == 2
+    assert eval_queue.counts()["log_pending"] == 1
+
+
+class _ReclaimAfterRead:
+    """Connection wrapper: another worker re-claims the job right after `fail` has read it."""
+
+    def __init__(self, conn, claims):
+        self._conn, self._claims = conn, claims
+
+    def execute(self, sql, *args):
+        cur = self._conn.execute(sql, *args)
+        if sql.startswith("SELECT status, attempts") and not self._claims:
+            cur = _Rows(cur.fetchall())
+            t = threading.Thread(target=lambda: self._claims.append(eval_queue.claim("w2", lease_s=60)))
+            self._claims.append("started")
+            t.start()
+            t.join(0.3)  # blocks on the write lock when `fail` holds it
+        return cur
+
+    def close(self):
+        self._conn.close()
+
+
+class _Rows:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+
+def test_fail_decides_inside_the_write_transaction(monkeypatch):
+    job_id = eval_queue.enqueue("T1", "a@local", {"draft": "d"}, max_attempts=2)
+    eval_queue.claim("w1", lease_s=0)
+    time.sleep(0.01)  # w1's lease is expired: w2 may take the job over
+    real, claims = eval_queue._conn, []
+    monkeypatch.setattr(eval_queue, "_conn", lambda: _ReclaimAfterRead(real(), claims))
+    eval_queue.fail(job_id, "boom")
+    for _ in range(50):
+        if len(claims) == 2:
+            break
+        time.sleep(0.05)
+    job = eval_queue.get_job(job_id)
+    # never a queued job without attempts left, and never a running claim overwritten
+    assert not (job["status"] == eval_queue.QUEUED and job["attempts"] >= job["max_attempts"])
+    assert claims[1] is None or job["worker"] == "w2"
+
+
+def test_inline_worker_runs_jobs_when_no_worker_is_alive():
+    done = threading.Event()
+
+    def evaluate(draft):
+        done.set()
+        return _ok(draft)
+
+    job_id = eval_queue.enqueue("T1", "a@local", {"draft": "d", "payload": "d"})
+    try:
+        assert eval_worker.ensure_worker(evaluate) is True
+        assert done.wait(5)
+        for _ in range(50):
+            if eval_queue.get_job(job_id)["status"] == eval_queue.DONE:
+                break
+            time.sleep(0.05)
+        assert eval_queue.get_job(job_id)["status"] == eval_queue.DONE
+        assert eval_worker.ensure_worker(evaluate) is False  # already running
+    finally:
+        eval_worker.stop_inline_worker()
+
+
+def test_no_inline_worker_while_a_worker_heartbeats():
+    eval_queue.heartbeat("other-host:1:1")
+    assert eval_worker.ensure_worker(_ok) is False
+
+
+def test_unclaimed_job_expires():
+    job_id = eval_queue.enqueue("T1", "a@local", {"draft": "d"})
+    assert eval_queue.expire(job_id, "No evaluation worker picked the job up within 120s")
+    job = eval_queue.get_job(job_id)
+    assert job["status"] == eval_queue.FAILED and "120s" in job["error"]
+    assert eval_queue.claim("w1") is None
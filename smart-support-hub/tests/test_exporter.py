@@ -0,0 +1,120 @@
+# file: smart-support-hub/tests/test_exporter.py
+import csv
+import gzip
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from app.services import change_feed, exporter, sheets_client
+from app.services.schema import TICKETS_HEADERS
+from tools.fakes import FakeSpreadsheet, LatencyModel
+
+
+@pytest.fixture
+def sh(monkeypatch):
+    sh = FakeSpreadsheet(LatencyModel(scale=0.0, seed=1))
+    monkeypatch.setattr(sheets_client, "_open", lambda: sh)
+    sheets_client.clear_header_cache()
+    ws = sh.add_worksheet("tickets")
+    ws.append_rows([TICKETS_HEADERS])
+    yield sh
+    sheets_client.clear_header_cache()
+
+
+def _rows(path):
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as fh:
+        return list(csv.reader(fh))[1:]
+
+
+def _export(sh, **kw):
+    return exporter.export_worksheet("tickets", "csv", chunk_rows=2, sh=sh, **kw)
+
+
+def test_blank_row_at_page_end_does_not_stop_the_export(sh):
+    sh.worksheet("tickets").append_rows([["T1", "2026-10-01"], [""], ["T2", "2026-10-02"], ["T3", "2026-10-03"]])
+    res = _export(sh)
+    assert res["rows"] == 3 and res["last_row"] == 5
+    assert [r[0] for f in res["files"] for r in _rows(f)] == ["T1", "T2", "T3"]
+
+
+def test_rows_updated_in_place_are_exported_again(sh):
+    ws = sh.worksheet("tickets")
+    ws.append_rows([["T1", "2026-10-01"], ["T2", "2026-10-02"]])
+    _export(sh)
+    status = TICKETS_HEADERS.index("status") + 1
+    ws.update_cell(3, status, "Resolved")  # a ticket upsert rewrites row 3 and publishes it
+    change_feed.publish("tickets", "tickets", 3, {"id": "T2", "status": "Resolved"})
+    ws.append_rows([["T3", "2026-10-03"]])
+
+    res = _export(sh)
+    assert res["rows"] == 1 and res["updated"] == 1
+    updates = [f for f in res["files"] if "-updates-" in Path(f).name]
+    (row,) = _rows(updates[0])
+    assert row[0] == "3" and row[1] == "T2" and row[status] == "Resolved"
+    assert _export(sh)["files"] == []  # nothing new the next time
+
+
+def test_update_published_during_a_run_is_exported_by_the_next(sh, monkeypatch):
+    ws = sh.worksheet("tickets")
+    ws.append_rows([["T1", "2026-10-01"]])
+    _export(sh)
+    ws.append_rows([["T2", "2026-10-02"]])
+    read = sh.values_batch_get
+    fired = []
+
+    def racing_read(ranges, params=None):
+        # an upsert of T1 lands after the run took its feed cursor, while it pages new rows
+        if not fired and "!A3:" in ranges[0]:  # the page of new rows
+            fired.append(True)
+            ws.update_cell(2, TICKETS_HEADERS.index("title") + 1, "edited")
+            change_feed.publish("tickets", "tickets", 2, {"id": "T1"})
+        return read(ranges, params)
+
+    monkeypatch.setattr(sh, "values_batch_get", racing_read)
+    assert _export(sh)["updated"] == 0 and fired
+    monkeypatch.setattr(sh, "values_batch_get", read)
+    res = _export(sh)
+    assert res["updated"] == 1
+    (row,) = _rows(res["files"][0])
+    assert row[0] == "2" and row[1 + TICKETS_HEADERS.index("title")] == "edited"
+
+
+def test_pruned_feed_falls_back_to_a_full_export(sh):
+    sh.worksheet("tickets").append_rows([["T1", "2026-10-01"], ["T2", "2026-10-02"]])
+    _export(sh)
+    for i in range(3):
+        change_feed.publish("tickets", "tickets", 2, {"id": "T1"})
+    with closing(change_feed._conn()) as conn:
+        conn.execute("DELETE FROM events WHERE seq < 3")  # KEEP_EVENTS pruned what this export had not seen
+    res = _export(sh)
+    assert res["rows"] == 2 and res["updated"] == 0
+
+
+def test_appended_row_echoed_by_the_poller_is_not_exported_again(sh):
+    ws = sh.worksheet("tickets")
+    ws.append_rows([["T1", "2026-10-01"]])
+    _export(sh)
+    ws.append_rows([["T2", "2026-10-02"]])
+    assert _export(sh)["rows"] == 1
+    # the poller publishes the appended row 3 after the export already paged it
+    change_feed.publish("tickets", "tickets", 3, {"id": "T2"})
+    res = _export(sh)
+    assert res["updated"] == 0 and res["files"] == []
+
+    ws.update_cell(3, TICKETS_HEADERS.index("status") + 1, "Resolved")  # a real change still goes out
+    change_feed.publish("tickets", "tickets", 3, {"id": "T2", "status": "Resolved"})
+    assert _export(sh)["updated"] == 1
+
+
+def test_parquet_columns_are_typed(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    from app.services.schema import arrow_schema, columns_from_values, to_arrow
+
+    fields = ["id", "date", "compliance_score", "created_at"]
+    t = to_arrow(columns_from_values([["T1", "2026-10-01", "95.5", "2026-10-01T10:00:00"],
+                                      ["T2", "not a date", "n/a", ""]], fields))
+    assert t.schema == arrow_schema(fields)
+    assert t.schema.field("date").type == pa.date32() and t.schema.field("compliance_score").type == pa.float64()
+    assert t.column("compliance_score").to_pylist() == [95.5, None]
+    assert t.column("date").null_count == 1 and t.column("created_at").null_count == 1
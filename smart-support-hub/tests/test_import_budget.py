@@ -0,0 +1,43 @@
+# file: smart-support-hub/tests/test_import_budget.py
+import importlib.util
+import os
+
+import pytest
+
+from tools import import_profile
+
+
+def test_startup_set_stops_at_login():
+    mods = import_profile.startup_modules()
+    assert "app.auth.basic_auth" in mods
+    assert "app.services.sheets_client" not in mods
+    assert "app.ui.pages" not in mods
+
+
+def test_forbidden_modules_are_attributed_to_their_root():
+    rows = [
+        (10, 10, 1, "numpy.core"), (5, 900, 0, "numpy"),           # root numpy: forbidden
+        (30, 30, 1, "pandas"), (40, 80, 0, "streamlit"),            # pulled in by streamlit: not budgeted
+        (100, 100, 0, "app.auth.basic_auth"),
+    ]
+    s = import_profile.summarize(rows)
+    assert s["forbidden"] == ["numpy"]
+    assert s["app_ms"] == pytest.approx(1.0)
+
+
+def _installed(module):
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ImportError:
+        return False
+
+
+def test_login_screen_import_budget():
+    # modules missing here (streamlit, app.config, ...) become empty stubs in the child
+    # interpreter, so everything that is present is still measured against the budget
+    mods = import_profile.startup_modules()
+    stubs = [m for m in mods if not _installed(m)]
+    s = import_profile.summarize(import_profile.profile(mods, stubs=stubs))
+    assert s["forbidden"] == [], f"heavy modules imported before login: {s['forbidden']}"
+    budget = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "400"))
+    assert s["app_ms"] <= budget, f"app import time {s['app_ms']:.0f} ms exceeds {budget:.0f} ms"
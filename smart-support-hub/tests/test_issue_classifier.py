@@ -0,0 +1,54 @@
+# file: smart-support-hub/tests/test_issue_classifier.py
+import pytest
+
+from app.services import issue_classifier, ticket_parser
+
+RAW = """Service Title: Cannot log in to the portal
+Please select service type: Report a problem
+3) Description: SSO redirect loops after password reset
+Created: 2026-10-01"""
+
+
+def test_parser_classifies_the_training_text(monkeypatch):
+    seen = []
+
+    def classify(texts, fallback, min_confidence=None):
+        seen.extend(texts)
+        return [("Access", 0.9, "model") for _ in texts]
+
+    monkeypatch.setattr(issue_classifier, "classify", classify)
+    parsed = ticket_parser.parse_ticket_text(RAW)
+    assert seen == [issue_classifier.ticket_text("Cannot log in to the portal", "SSO redirect loops after password reset")]
+    assert parsed["issue_type"] == parsed["issue_type_suggested"] == "Access"
+
+
+def test_heuristic_fallback_sees_the_whole_ticket(monkeypatch):
+    monkeypatch.setattr(issue_classifier, "classify",
+                        lambda texts, fallback, min_confidence=None: [(fallback(t), 0.2, "heuristic") for t in texts])
+    # "report a problem" is only in the service type line, not in title or description
+    assert ticket_parser.classify_issue_types(["Portal\nslow page"], hints=["Report a problem Portal"]) == ["Bug"]
+
+
+def test_training_rows_use_confirmed_labels_only(monkeypatch):
+    pd = pytest.importorskip("pandas")
+    from app.services import sheets_client as sc
+    df = pd.DataFrame({
+        "title": ["a", "b", "c"],
+        "description": ["x", "y", "z"],
+        "issue_type": ["Bug", "Sync", "Access"],
+        "issue_type_confirmed": ["TRUE", "", "true"],
+        "created_by": ["agent@local"] * 3,
+    })
+    monkeypatch.setattr(sc, "read_columns", lambda name, cols, typed=True: df[cols])
+    texts, labels = issue_classifier.training_rows()
+    assert labels == ["Bug", "Access"]
+    assert texts == [issue_classifier.ticket_text("a", "x"), issue_classifier.ticket_text("c", "z")]
+
+
+@pytest.mark.parametrize("line, severity", [
+    ("Severity: S1", "S1"), ("Priority: P0", "S0"), ("priority : High", "S1"), ("Severity: Whatever", ""), ("", ""),
+])
+def test_parser_carries_the_severity(monkeypatch, line, severity):
+    monkeypatch.setattr(issue_classifier, "classify",
+                        lambda texts, fallback, min_confidence=None: [("Access", 0.9, "model") for _ in texts])
+    assert ticket_parser.parse_ticket_text(RAW + "\n" + line)["severity"] == severity
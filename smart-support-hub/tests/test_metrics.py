@@ -0,0 +1,14 @@
+# file: smart-support-hub/tests/test_metrics.py
+from app.services import metrics
+
+
+def test_counters_are_not_latency_samples():
+    metrics.reset()
+    metrics.count("cache.hit.local")
+    metrics.count("cache.hit.local", 2)
+    metrics.observe("sheets.read", 12.0)
+    assert metrics.counters() == {"cache.hit.local": 3}
+    assert [r["operation"] for r in metrics.snapshot()] == ["sheets.read"]
+    assert 'ssh_events_total{event="cache.hit.local"} 3' in metrics.prometheus_text()
+    metrics.reset()
+    assert metrics.counters() == {}
@@ -0,0 +1,99 @@
+# file: smart-support-hub/tests/test_partitions.py
+import threading
+from datetime import date
+
+import pytest
+
+from app.services import sheets_client
+from app.services.schema import LEGACY_TICKETS_HEADERS, LOG_HEADERS, TICKETS_HEADERS, LogRow, TicketRow, columns_from_rows
+from tools.fakes import FakeSpreadsheet, LatencyModel
+
+
+@pytest.fixture
+def sh(monkeypatch):
+    sh = FakeSpreadsheet(LatencyModel(scale=0.01, seed=1))
+    monkeypatch.setattr(sheets_client, "_open", lambda: sh)
+    monkeypatch.setattr(sheets_client, "_known_ws", set())
+    sheets_client.clear_header_cache()
+    yield sh
+    sheets_client.clear_header_cache()
+
+
+def test_concurrent_first_appends_share_one_new_partition(sh):
+    errors = []
+
+    def write(i):
+        try:
+            sheets_client._append_row("log", LogRow(ticket_id=f"T{i}", created_at="2026-10-05T09:00:00"))
+        except Exception as e:  # pragma: no cover - the failure being reproduced
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    values = sh.worksheet("log_2026_10").get_all_values()
+    assert values[0] == LOG_HEADERS
+    assert sorted(r[0] for r in values[1:]) == sorted(f"T{i}" for i in range(8))
+
+
+def test_partition_created_by_another_process_is_reopened(sh, monkeypatch):
+    other = sh.add_worksheet("log_2026_10")
+    other.append_row(LOG_HEADERS)
+    monkeypatch.setattr(sh, "worksheets", lambda: [])  # listing taken before the other process created it
+
+    title, row = sheets_client._append_row("log", LogRow(ticket_id="T1", created_at="2026-10-05T09:00:00"))
+    assert (title, row) == ("log_2026_10", 2)
+    assert other.get_all_values()[0] == LOG_HEADERS
+
+
+def test_legacy_base_rows_read_as_current_tickets(sh):
+    base = sh.add_worksheet("tickets")
+    base.append_row(LEGACY_TICKETS_HEADERS)
+    base.append_row(["2025-02-01T08:00:00", "OLD-1", "Legacy", "", "S1", "TMS", "", "", "cust@x", "", "Closed"])
+    part = sh.add_worksheet("tickets_2026_10")
+    part.append_row(TICKETS_HEADERS)
+    part.append_row(TicketRow(id="NEW-1", created_at="2026-10-02T08:00:00", status="New").to_row())
+
+    rows = sheets_client.read_partitioned("tickets")
+    assert all(type(r) is TicketRow for r in rows)
+    cols = columns_from_rows(rows, TicketRow)
+    assert cols["id"] == ["OLD-1", "NEW-1"] and cols["severity"][0] == "S1" and cols["requester"][0] == "cust@x"
+
+    dated = sheets_client.read_partitioned("tickets", date(2025, 1, 1), date(2025, 12, 31))
+    assert [r.id for r in dated] == ["OLD-1"]
+
+
+def test_report_projection_keeps_legacy_and_undated_rows(sh):
+    pytest.importorskip("pandas")
+    base = sh.add_worksheet("tickets")
+    base.append_row(LEGACY_TICKETS_HEADERS)
+    base.append_row(["2026-09-01T08:00:00", "OLD-1", "Legacy"])
+    base.append_row(["", "OLD-2", "No date"])
+
+    df = sheets_client.read_columns("tickets", ["id", "title", "created_at"], date(2026, 8, 1), date(2026, 10, 1))
+    assert list(df["id"]) == ["OLD-1"]
+    df = sheets_client.read_columns("tickets", ["id", "title", "created_at"], date(2026, 8, 1), date(2026, 10, 1),
+                                    keep_undated=True)
+    assert list(df["id"]) == ["OLD-1", "OLD-2"]
+
+
+def test_bulk_append_writes_by_column_name(sh, monkeypatch):
+    part = sh.add_worksheet("tickets_2026_10")
+    part.append_row(TICKETS_HEADERS[:-2])  # created before the last columns were added
+    sheets_client.append_rows("tickets", [
+        TicketRow(id="NEW-2", created_at="2026-10-03T08:00:00", locale="de", issue_type_confirmed="TRUE"),
+    ])
+    values = part.get_all_values()
+    assert values[0] == TICKETS_HEADERS
+    row = dict(zip(TICKETS_HEADERS, values[1]))
+    assert (row["id"], row["locale"], row["issue_type_confirmed"]) == ("NEW-2", "de", "TRUE")
+
+    monkeypatch.setenv("SHEETS_PARTITIONING", "none")
+    base = sh.add_worksheet("tickets")
+    base.append_row(LEGACY_TICKETS_HEADERS)
+    sheets_client.append_rows("tickets", [TicketRow(id="OLD-2", severity="S1", requester="cust@x", status="New")])
+    legacy = dict(zip(LEGACY_TICKETS_HEADERS, base.get_all_values()[1]))
+    assert (legacy["ticket_id"], legacy["severity"], legacy["reporter"], legacy["status"]) == ("OLD-2", "S1", "cust@x", "New")
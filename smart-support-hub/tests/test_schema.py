@@ -0,0 +1,66 @@
+# file: smart-support-hub/tests/test_schema.py
+from app.services import sheets_client
+from app.services.schema import (
+    LEGACY_TICKETS_HEADERS, TICKETS_HEADERS, TicketRow, align_to_header, row_type_for,
+)
+from tools.fakes import FakeSpreadsheet, LatencyModel
+
+FAST = LatencyModel(scale=0)
+
+
+def _ticket(**kw):
+    return TicketRow(id="T-1", requester="cust@example.com", title="Import fails", status="New",
+                     created_by="agent@local", created_at="2026-10-01T10:00:00+00:00",
+                     severity="S1", product="TMS", module="Connectors", locale="de", **kw)
+
+
+def test_legacy_header_receives_current_fields_by_name():
+    row = align_to_header(_ticket().to_dict(), LEGACY_TICKETS_HEADERS)
+    got = dict(zip(LEGACY_TICKETS_HEADERS, row))
+    assert got["ticket_id"] == "T-1" and got["reporter"] == "cust@example.com"
+    assert got["timestamp"] == "2026-10-01T10:00:00+00:00"
+    assert (got["severity"], got["product"], got["module"], got["locale"]) == ("S1", "TMS", "Connectors", "de")
+
+
+def test_header_created_before_new_columns_still_maps_to_tickets():
+    assert row_type_for("tickets_2026_09", TICKETS_HEADERS[:21]) is TicketRow
+    assert row_type_for("tickets", LEGACY_TICKETS_HEADERS) is not TicketRow
+
+
+def test_ensure_headers_extends_a_prefix_and_keeps_the_legacy_layout():
+    sh = FakeSpreadsheet(FAST)
+    old = sh.add_worksheet("tickets", cols=21)
+    old.append_row(TICKETS_HEADERS[:21])
+    assert sheets_client.ensure_headers(old, TICKETS_HEADERS) == TICKETS_HEADERS
+    assert old.row_values(1) == TICKETS_HEADERS and old.col_count >= len(TICKETS_HEADERS)
+
+    legacy = sh.add_worksheet("legacy")
+    legacy.append_row(LEGACY_TICKETS_HEADERS)
+    sheets_client.ensure_headers(legacy, TICKETS_HEADERS)
+    assert legacy.row_values(1) == LEGACY_TICKETS_HEADERS
+
+
+def test_intake_append_lands_under_the_legacy_columns(monkeypatch):
+    from utils import gsheets
+
+    sh = FakeSpreadsheet(FAST)
+    ws = sh.add_worksheet("tickets")
+    ws.append_row(LEGACY_TICKETS_HEADERS)
+    monkeypatch.setattr(gsheets, "get_gspread_client", lambda: type("C", (), {"open_by_key": lambda self, k: sh})())
+    monkeypatch.setattr(gsheets, "get_sheet_id", lambda: "sheet")
+
+    gsheets.append_ticket(_ticket().to_dict())
+    rec = ws.get_all_records()[0]
+    assert ws.row_values(1) == LEGACY_TICKETS_HEADERS
+    assert rec["ticket_id"] == "T-1" and rec["reporter"] == "cust@example.com" and rec["severity"] == "S1"
+    assert rec["status"] == "New"
+
+
+def test_typed_cells_tolerate_bad_values():
+    from datetime import date, datetime, timezone
+    from app.services.schema import _typed
+
+    assert _typed("date", "2026-10-01") == date(2026, 10, 1)
+    assert _typed("datetime", "2026-10-01T10:00:00") == datetime(2026, 10, 1, 10, tzinfo=timezone.utc)
+    assert (_typed("float", "1,234.5"), _typed("int", "7"), _typed("bool", "true")) == (1234.5, 7, True)
+    assert [_typed(k, v) for k, v in (("date", "soon"), ("int", "1.5"), ("float", ""), ("bool", "maybe"))] == [None] * 4
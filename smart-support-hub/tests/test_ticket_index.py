@@ -0,0 +1,117 @@
+# file: smart-support-hub/tests/test_ticket_index.py
+import time
+from contextlib import closing
+
+import pytest
+
+from app.services import sheets_client as sc, ticket_index
+from app.services.schema import TICKETS_HEADERS
+from tools.fakes import FakeSpreadsheet, LatencyModel
+
+
+@pytest.fixture
+def sh(monkeypatch):
+    sh = FakeSpreadsheet(LatencyModel(scale=0))
+    sh.add_worksheet("tickets").append_row(TICKETS_HEADERS)
+    monkeypatch.setenv("SHEETS_PARTITIONING", "none")
+    monkeypatch.setattr(sc, "open_spreadsheet", lambda: sh)
+    monkeypatch.setattr(sc, "_open", lambda: sh)
+    sc.clear_header_cache()
+    return sh
+
+
+def test_key_left_pending_by_a_crashed_save_is_retried(sh):
+    with closing(ticket_index._conn()) as conn:
+        conn.execute("INSERT INTO idempotency (key, ticket_id, action, created_at) VALUES ('save:7', 'T1', 'pending', ?)",
+                     (time.time() - ticket_index.LOCK_S - 1,))
+    res = ticket_index.upsert_ticket({"id": "T1", "title": "t"}, idempotency_key="save:7")
+    assert res["action"] == "inserted"
+    assert ticket_index.upsert_ticket({"id": "T1", "title": "t"}, idempotency_key="save:7")["action"] == "duplicate"
+
+
+def test_a_fresh_pending_key_is_still_a_duplicate(sh):
+    with closing(ticket_index._conn()) as conn:
+        conn.execute("INSERT INTO idempotency (key, ticket_id, action, created_at) VALUES ('save:8', 'T1', 'pending', ?)",
+                     (time.time(),))
+    assert ticket_index.upsert_ticket({"id": "T1"}, idempotency_key="save:8")["action"] == "duplicate"
+    assert len(sh.worksheet("tickets").get_all_values()) == 1
+
+
+def test_ticket_lock_is_shared_with_other_processes(sh, monkeypatch):
+    monkeypatch.setattr(ticket_index, "LOCK_WAIT_S", 0.2)
+    with closing(ticket_index._conn()) as conn:
+        conn.execute("INSERT INTO ticket_locks (id, owner, expires) VALUES ('T1', 'other-host:1:1', ?)",
+                     (time.time() + 60,))
+    with pytest.raises(TimeoutError):
+        ticket_index.upsert_ticket({"id": "T1"})
+    assert len(sh.worksheet("tickets").get_all_values()) == 1
+
+    with closing(ticket_index._conn()) as conn:  # the other process died: its lease runs out
+        conn.execute("UPDATE ticket_locks SET expires = ? WHERE id = 'T1'", (time.time() - 1,))
+    assert ticket_index.upsert_ticket({"id": "T1"})["action"] == "inserted"
+    with closing(ticket_index._conn()) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ticket_locks").fetchone()[0] == 0
+
+
+def test_numbers_and_dates_the_sheet_reformats_are_unchanged(sh):
+    row = {"id": "T1", "date": "2026-10-01", "compliance_score": 100.0, "title": "t"}
+    assert ticket_index.upsert_ticket(dict(row))["action"] == "inserted"
+    ws = sh.worksheet("tickets")
+    # what an UNFORMATTED_VALUE read returns after the USER_ENTERED write: a date serial, an integer
+    ws.update_cell(2, TICKETS_HEADERS.index("date") + 1, "46296")
+    ws.update_cell(2, TICKETS_HEADERS.index("compliance_score") + 1, "100")
+    seen = []
+    read = sh.values_batch_get
+    sh.values_batch_get = lambda ranges, params=None: seen.append(params) or read(ranges, params)
+    assert ticket_index.upsert_ticket(dict(row))["action"] == "unchanged"
+    assert {"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "SERIAL_NUMBER"} in seen
+    assert ticket_index.upsert_ticket(dict(row, date="2026-10-02"))["cells"] == 1
+
+
+def test_old_idempotency_keys_are_pruned(sh):
+    old = time.time() - ticket_index.IDEMPOTENCY_KEEP_S - 1
+    with closing(ticket_index._conn()) as conn:
+        conn.execute("INSERT INTO idempotency (key, ticket_id, action, created_at) VALUES ('save:T1:1:1.0', 'T1',"
+                     " 'inserted', ?)", (old,))
+    ticket_index.upsert_ticket({"id": "T2"}, idempotency_key="save:T2:1:2.0")
+    with closing(ticket_index._conn()) as conn:
+        keys = [r[0] for r in conn.execute("SELECT key FROM idempotency")]
+    assert keys == ["save:T2:1:2.0"]
+
+
+def _other_process_grabs(ticket_id):
+    now = time.time()
+    with closing(ticket_index._conn()) as conn:
+        conn.execute("DELETE FROM ticket_locks WHERE id = ? AND expires < ?", (ticket_id, now))
+        cur = conn.execute("INSERT OR IGNORE INTO ticket_locks (id, owner, expires) VALUES (?, 'other-host:1:1', ?)",
+                           (ticket_id, now + 60))
+    return cur.rowcount == 1
+
+
+def test_a_slow_save_keeps_its_lock(sh, monkeypatch):
+    monkeypatch.setattr(ticket_index, "LOCK_S", 0.3)
+    read, grabbed = sh.values_batch_get, []
+
+    def slow(ranges, params=None):
+        for _ in range(10):  # 1s, well past LOCK_S: another process keeps trying to take the ticket
+            time.sleep(0.1)
+            grabbed.append(_other_process_grabs("T1"))
+        return read(ranges, params)
+
+    sh.values_batch_get = slow
+    assert ticket_index.upsert_ticket({"id": "T1"})["action"] == "inserted"
+    assert not any(grabbed)
+
+
+def test_a_save_that_lost_its_lock_does_not_write(sh):
+    read = sh.values_batch_get
+
+    def taken_over(ranges, params=None):
+        with closing(ticket_index._conn()) as conn:  # our lease ran out and another process took it
+            conn.execute("UPDATE ticket_locks SET owner = 'other-host:1:1' WHERE id = 'T1'")
+        return read(ranges, params)
+
+    sh.values_batch_get = taken_over
+    with pytest.raises(TimeoutError):
+        ticket_index.upsert_ticket({"id": "T1"})
+    assert len(sh.worksheet("tickets").get_all_values()) == 1
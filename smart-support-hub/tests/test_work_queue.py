@@ -0,0 +1,42 @@
+# file: smart-support-hub/tests/test_work_queue.py
+from contextlib import closing
+
+from app.services import work_queue
+
+
+def _row(i, status="Open", severity="", owner="a@x"):
+    return {"id": f"T{i}", "owner": owner, "status": status, "severity": severity, "issue_type": "Bug",
+            "created_at": f"2026-10-{i + 1:02d}T00:00:00"}
+
+
+def test_status_filter_is_an_index_seek_per_status():
+    work_queue.apply([_row(i, status=("Open", "New", "In Progress")[i % 3]) for i in range(30)])
+    with closing(work_queue._conn()) as conn:
+        plan = " ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM queue WHERE owner = ? AND status = ?"
+            " ORDER BY priority, created_ts LIMIT ?", ("a@x", "New", 5)))
+    assert "queue_owner_status" in plan and "TEMP B-TREE" not in plan
+
+    got = work_queue.next_for("a@x", 4, ["New", "Open"])
+    assert [r["id"] for r in got] == ["T0", "T1", "T3", "T4"]
+
+
+def test_severity_column_ranks_tickets():
+    assert "severity" in work_queue.COLUMNS and "ticket_id" in work_queue.COLUMNS
+    work_queue.apply([_row(1), _row(2, severity="S0"), {"ticket_id": "L3", "owner": "a@x", "status": "New",
+                                                         "severity": "S1", "created_at": "2026-10-03T00:00:00"}])
+    assert [(r["id"], r["severity"]) for r in work_queue.next_for("a@x")] == [("T2", "S0"), ("L3", "S1"), ("T1", "S2")]
+
+
+def test_sync_rebuilds_when_the_feed_pruned_its_cursor(monkeypatch):
+    from app.services import change_feed
+
+    for i in range(3):
+        change_feed.publish("tickets", "tickets", i + 2, _row(i))
+    with closing(work_queue._conn()) as conn:
+        work_queue._set_meta(conn, "feed_seq", 0)
+    with closing(change_feed._conn()) as conn:
+        conn.execute("DELETE FROM events WHERE seq <= 1")
+    monkeypatch.setattr(work_queue, "rebuild", lambda: -1)
+    assert work_queue.sync() == -1
+    assert work_queue.next_for("a@x") == []  # nothing applied from a partial feed
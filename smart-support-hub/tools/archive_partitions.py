@@ -0,0 +1,40 @@
+# file: smart-support-hub/tools/archive_partitions.py
+"""
+Roll old time partitions (`log_2025_07`, `tickets_2025_q3`, ...) into gzipped CSV
+files under <data_dir>/archive/ and delete them from the spreadsheet.
+
+    python tools/archive_partitions.py --keep 3            # keep the 3 newest per sheet
+    python tools/archive_partitions.py --sheet log --dry-run
+"""
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import sheets_client as sc  # noqa: E402
+from app.services.archive import archive_partitions  # noqa: E402
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sheet", action="append", choices=sorted(sc.PARTITIONED), help="base sheet (repeatable)")
+    ap.add_argument("--keep", type=int, default=3, help="newest partitions to keep online")
+    ap.add_argument("--no-delete", action="store_true", help="write archives but keep the worksheets")
+    ap.add_argument("--dry-run", action="store_true", help="only list partitions")
+    args = ap.parse_args(argv)
+
+    for base in args.sheet or sorted(sc.PARTITIONED):
+        if args.dry_run:
+            print(f"{base}: {', '.join(sc.list_partitions(base)) or '(no partitions)'}")
+            continue
+        for res in archive_partitions(base, keep=args.keep, delete=not args.no_delete):
+            print(f"{res['partition']}: {res['rows']} rows -> {res['file']} ({res['bytes']} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
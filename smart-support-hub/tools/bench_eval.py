@@ -0,0 +1,191 @@
+# file: smart-support-hub/tools/bench_eval.py
+"""
+Offline evaluation benchmark over a recorded Gemini cassette (no network, no API key).
+
+Record once against the live API, from the Draft Evaluation tab of app.py (the
+flow that calls evaluate_with_gemini; app/main.py uses a different client):
+
+    GEMINI_CASSETTE=record streamlit run app.py
+
+then replay every recorded evaluation call through the same public function
+(evaluate_with_gemini or evaluate_many, served from the cassette underneath):
+
+    python tools/bench_eval.py --concurrency 8 --latency 1.0
+    python tools/bench_eval.py --cassette /tmp/gemini.sqlite --latency 0 --repeat 20
+
+Reports end-to-end throughput and latency percentiles, how each draft was
+answered (packed, single, error), plus JSON-parsing robustness on the recorded
+responses and on mangled variants of them (code fences, prose around the JSON,
+truncation) the model is known to produce.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import metrics  # noqa: E402
+
+VARIANTS: Dict[str, Callable[[str], str]] = {
+    "as_recorded": lambda t: t,
+    "code_fence": lambda t: f"```json\n{t}\n```",
+    "prose_wrapped": lambda t: f"Here is my evaluation:\n{t}\nLet me know if you need more.",
+    "truncated": lambda t: t[: max(len(t) * 2 // 3, 1)],
+    "empty": lambda t: "",
+}
+
+
+def _calls(recorded: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Distinct recorded evaluation calls, and entries recorded before calls were tagged."""
+    calls: Dict[str, Dict[str, Any]] = {}
+    legacy = []
+    for e in recorded:
+        c = e["request"].get("call")
+        if c is None:
+            legacy.append(e)
+        else:
+            calls.setdefault(json.dumps(c, sort_keys=True), dict(c, model=e["request"]["model"]))
+    return list(calls.values()), legacy
+
+
+def _replay(call: Dict[str, Any]) -> Dict[str, Any]:
+    """One recorded call through the public evaluation function that made it (cassette replay underneath)."""
+    from utils import gemini_eval
+    t0 = time.perf_counter()
+    try:
+        if call["fn"] == "evaluate_many":
+            got = gemini_eval.evaluate_many(**call["inputs"])
+            outcomes = ["error" if r.get("error") else "packed" if r.get("packed") else "single" for r in got]
+        else:
+            got = [gemini_eval.evaluate_with_gemini(**call["inputs"])]
+            outcomes = ["single"]
+    except Exception as e:
+        got, outcomes = [{"verdict": "ERROR"}], [f"error:{type(e).__name__}"]
+    ms = (time.perf_counter() - t0) * 1000.0
+    metrics.observe("bench.eval", ms)
+    return {"ms": ms, "outcomes": outcomes, "verdicts": [str(r.get("verdict", "FAIL")).upper() for r in got]}
+
+
+def _pack_size(prompt: str) -> int:
+    """Drafts in a packed prompt: item headings carrying the pack's tag (a draft cannot forge it)."""
+    m = re.search(r"<ticket-(\w+)>", prompt)
+    return len(re.findall(rf"^## Draft \d+ \[{m.group(1)}\]$", prompt, re.M)) if m else 0
+
+
+def _replay_legacy(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry recorded before calls were tagged: raw model call, parsed the way its system prompt asks for."""
+    from utils.gemini_cassette import make_model
+    from utils import gemini_eval
+    req = entry["request"]
+    model = make_model(req["model"], req["system_instruction"])
+    t0 = time.perf_counter()
+    text = model.generate_content(req["prompt"], generation_config=req["generation_config"]).text
+    if req["system_instruction"] == gemini_eval.PACKED_SYSTEM_PROMPT:
+        got = list(gemini_eval.parse_packed_response(text, _pack_size(req["prompt"])).values())
+        outcomes = ["packed"] * len(got) or ["fallback"]
+    else:
+        data, how = gemini_eval.parse_eval_response(text)
+        got, outcomes = [data], ["single" if how != "fallback" else "fallback"]
+    ms = (time.perf_counter() - t0) * 1000.0
+    metrics.observe("bench.eval", ms)
+    return {"ms": ms, "outcomes": outcomes, "verdicts": [str(r.get("verdict", "FAIL")).upper() for r in got]}
+
+
+def run(concurrency: int, repeat: int) -> Dict[str, Any]:
+    from utils.gemini_cassette import entries
+    recorded = list(entries())
+    if not recorded:
+        raise SystemExit("Cassette is empty — record some calls with GEMINI_CASSETTE=record first.")
+    calls, legacy = _calls(recorded)
+    if calls:
+        # evaluate_* pick the model from GEMINI_MODEL; replay keys include it
+        os.environ["GEMINI_MODEL"] = Counter(c["model"] for c in calls).most_common(1)[0][0]
+    work: List[Tuple[Callable[[Dict[str, Any]], Dict[str, Any]], Dict[str, Any]]] = (
+        [(_replay, c) for c in calls] + [(_replay_legacy, e) for e in legacy]) * repeat
+    metrics.reset()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda w: w[0](w[1]), work))
+    wall = time.perf_counter() - t0
+    lat = [r["ms"] for r in results]
+    drafts = sum(len(r["verdicts"]) for r in results)
+    return {
+        "recorded": len(recorded),
+        "calls": len(results),
+        "legacy_entries": len(legacy),
+        "drafts": drafts,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(results) / wall, 1) if wall else None,
+        "drafts_per_s": round(drafts / wall, 1) if wall else None,
+        "p50_ms": round(metrics.percentile(lat, 50), 2),
+        "p95_ms": round(metrics.percentile(lat, 95), 2),
+        "recorded_p50_ms": metrics.percentile([e["latency_ms"] for e in recorded], 50),
+        "verdicts": dict(Counter(v for r in results for v in r["verdicts"])),
+        "outcomes": dict(Counter(o for r in results for o in r["outcomes"])),
+    }
+
+
+def robustness() -> Dict[str, Dict[str, int]]:
+    """Parse outcome per mangled variant; packed answers go through the array parser, by items recovered."""
+    from utils.gemini_cassette import entries
+    from utils.gemini_eval import PACKED_SYSTEM_PROMPT, parse_eval_response, parse_packed_response
+    out: Dict[str, Dict[str, int]] = {}
+    recorded = list(entries())
+    for name, mangle in VARIANTS.items():
+        counts: Counter = Counter()
+        for e in recorded:
+            text = mangle(e["response"])
+            if e["request"]["system_instruction"] == PACKED_SYSTEM_PROMPT:
+                n = _pack_size(e["request"]["prompt"])
+                got = len(parse_packed_response(text, n))
+                counts["packed_items_ok"] += got
+                counts["packed_items_lost"] += n - got
+            else:
+                counts[parse_eval_response(text)[1]] += 1
+        out[name] = dict(counts)
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cassette", help="cassette file (default: GEMINI_CASSETTE_PATH or <data_dir>/cassettes)")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--repeat", type=int, default=1, help="replay each recorded call this many times")
+    ap.add_argument("--latency", type=float, default=0.0, help="recorded-latency factor (0 = no sleeps, 1 = real)")
+    ap.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = ap.parse_args(argv)
+
+    os.environ["GEMINI_CASSETTE"] = "replay"
+    os.environ["GEMINI_CASSETTE_LATENCY"] = str(args.latency)
+    if args.cassette:
+        os.environ["GEMINI_CASSETTE_PATH"] = args.cassette
+
+    report = {"throughput": run(args.concurrency, args.repeat), "parsing": robustness()}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    t = report["throughput"]
+    print(f"{t['calls']} replayed calls ({t['recorded']} recorded) in {t['wall_s']}s "
+          f"-> {t['throughput_per_s']}/s, p50 {t['p50_ms']} ms, p95 {t['p95_ms']} ms "
+          f"(recorded p50 {t['recorded_p50_ms']} ms)")
+    print(f"{t['drafts']} drafts -> {t['drafts_per_s']}/s; verdicts: {t['verdicts']}; answered: {t['outcomes']}")
+    if t["legacy_entries"]:
+        print(f"({t['legacy_entries']} entries recorded before call tagging were replayed as raw model calls)")
+    print("parse outcome by response variant:")
+    for name, counts in report["parsing"].items():
+        print(f"  {name:<14} {counts}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+# file: smart-support-hub/tools/bench_packed.py
+"""
+Throughput of packed multi-draft evaluation (gemini_eval.evaluate_many) against
+one-by-one evaluate_with_gemini on the same drafts.
+
+Drafts come from a JSONL file (keys: ticket, draft, severity, locale, product,
+module) or are generated (--synthetic N). Runs against the live API, a cassette
+(GEMINI_CASSETTE=record|replay) or, with --fake, an in-process model with
+log-normal call latency plus a per-token cost (tools/fakes.py).
+
+    python tools/bench_packed.py --synthetic 40 --fake --latency-scale 0.1
+    GEMINI_CASSETTE=record python tools/bench_packed.py --items drafts.jsonl
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import metrics  # noqa: E402
+from utils import gemini_eval  # noqa: E402
+
+SECTIONS = ("Problem", "Cause", "Steps", "Resolution")
+
+
+def synthetic(n: int) -> List[Dict[str, Any]]:
+    items = []
+    for i in range(n):
+        sections = SECTIONS if i % 3 else SECTIONS[:2]  # every third draft is incomplete
+        items.append({
+            "ticket": f"TMX import fails with error 500 on project {i}.",
+            "draft": "\n".join(f"{s}: details for project {i}." for s in sections),
+            "severity": "S2", "locale": "en", "product": "TMS", "module": "Import",
+        })
+    return items
+
+
+def _calls() -> int:
+    snap = {r["operation"]: r["count"] for r in metrics.snapshot()}
+    return snap.get("gemini.generate_content", 0) + snap.get("gemini.generate_content.packed", 0)
+
+
+def run(items: List[Dict[str, Any]], rubric: str, max_items: int) -> Dict[str, Any]:
+    metrics.reset()
+    t0 = time.perf_counter()
+    single = [gemini_eval.evaluate_with_gemini(it["ticket"], it["draft"], rubric, it.get("severity", ""),
+                                               it.get("locale", ""), it.get("product", ""), it.get("module", ""))
+              for it in items]
+    single_s, single_calls = time.perf_counter() - t0, _calls()
+
+    metrics.reset()
+    t0 = time.perf_counter()
+    packed = gemini_eval.evaluate_many(items, rubric, max_items=max_items)
+    packed_s, packed_calls = time.perf_counter() - t0, _calls()
+
+    n = len(items)
+    return {
+        "items": n,
+        "single": {"seconds": round(single_s, 2), "items_per_s": round(n / single_s, 2), "calls": single_calls},
+        "packed": {"seconds": round(packed_s, 2), "items_per_s": round(n / packed_s, 2), "calls": packed_calls,
+                   "fell_back": sum(1 for r in packed if not r.get("packed"))},
+        "speedup": round(single_s / packed_s, 2) if packed_s else None,
+        "verdict_agreement": round(sum(a["verdict"] == b["verdict"] for a, b in zip(single, packed)) / n, 3),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--items", type=Path, help="JSONL file of drafts")
+    src.add_argument("--synthetic", type=int, help="generate this many drafts")
+    ap.add_argument("--rubric", type=Path, default=ROOT / "evaluations" / "rubric.yaml")
+    ap.add_argument("--max-items", type=int, default=gemini_eval.PACK_MAX_ITEMS, help="drafts per packed request")
+    ap.add_argument("--fake", action="store_true", help="use the in-process fake model (no network)")
+    ap.add_argument("--latency-scale", type=float, default=1.0, help="fake model latency scale")
+    ap.add_argument("--drop-rate", type=float, default=0.0, help="fake model: share of packed items left out")
+    args = ap.parse_args(argv)
+
+    if args.items:
+        items = [json.loads(line) for line in args.items.read_text(encoding="utf-8").splitlines() if line.strip()]
+    else:
+        items = synthetic(args.synthetic)
+    rubric = args.rubric.read_text(encoding="utf-8")
+    if args.fake:
+        from tools.fakes import FakeGenerativeModel, LatencyModel
+        fake = FakeGenerativeModel(LatencyModel(scale=args.latency_scale, seed=1), drop_rate=args.drop_rate, seed=1)
+        gemini_eval._model = lambda system_instruction=gemini_eval.SYSTEM_PROMPT: (fake, "fake")
+
+    print(json.dumps(run(items, rubric, args.max_items), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,39 @@
+# file: smart-support-hub/tools/export_sheets.py
+"""
+Stream tickets / log / users / evaluations (including time partitions) to Parquet
+or gzipped CSV under <data_dir>/exports/. Incremental by default: only rows
+appended since the last export, and rows the app rewrote in place, are written;
+an interrupted run resumes.
+
+    python tools/export_sheets.py --format parquet
+    python tools/export_sheets.py --format csv --sheet log --full
+"""
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import exporter  # noqa: E402
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--format", choices=exporter.FORMATS, default="parquet")
+    ap.add_argument("--sheet", action="append", help="base sheet name (repeatable); default: all")
+    ap.add_argument("--full", action="store_true", help="ignore the watermark and export everything")
+    ap.add_argument("--chunk", type=int, default=exporter.CHUNK_ROWS, help="rows per Sheets request")
+    args = ap.parse_args(argv)
+
+    for res in exporter.export_all(args.format, not args.full, args.sheet, args.chunk):
+        print(f"{res['sheet']}: {res['rows']} new rows, {res['updated']} updated (through sheet row {res['last_row']})")
+        for f in res["files"]:
+            print(f"  {f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,256 @@
+# file: smart-support-hub/tools/fakes.py
+# In-memory stand-ins for the Google Sheets and Gemini backends, with injected latency.
+from __future__ import annotations
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class LatencyModel:
+    """
+    Log-normal latency per operation, parameterised by median and p95 (ms),
+    which is how the real Sheets/Gemini latencies look in the metrics page.
+    `scale` shrinks every delay (0.1 = 10x faster run, same distribution shape).
+    """
+
+    DEFAULTS = {
+        "sheets.open": (180, 450),
+        "sheets.read": (260, 900),
+        "sheets.write": (320, 1100),
+        "gemini": (2400, 6500),
+    }
+
+    def __init__(self, scale: float = 1.0, error_rate: float = 0.0, seed: Optional[int] = None,
+                 overrides: Optional[Dict[str, tuple]] = None):
+        self.scale = scale
+        self.error_rate = error_rate
+        self.params = dict(self.DEFAULTS, **(overrides or {}))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self, kind: str) -> None:
+        median, p95 = self.params[kind]
+        mu = math.log(median)
+        sigma = max((math.log(p95) - mu) / 1.645, 1e-6)
+        with self._lock:
+            ms = self._rng.lognormvariate(mu, sigma)
+            fail = self._rng.random() < self.error_rate
+        time.sleep(ms * self.scale / 1000.0)
+        if fail:
+            raise RuntimeError(f"Injected {kind} failure (429 RESOURCE_EXHAUSTED)")
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+class FakeWorksheet:
+    def __init__(self, title: str, latency: LatencyModel, rows: int = 2000, cols: int = 26):
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._rows: List[List[str]] = []
+        self._latency = latency
+        self._lock = threading.Lock()
+
+    # --- gspread.Worksheet subset used by the app ---
+    def row_values(self, row: int) -> List[str]:
+        self._latency.sleep("sheets.read")
+        with self._lock:
+            return list(self._rows[row - 1]) if row <= len(self._rows) else []
+
+    def col_values(self, col: int) -> List[str]:
+        self._latency.sleep("sheets.read")
+        with self._lock:
+            return [r[col - 1] if col <= len(r) else "" for r in self._rows]
+
+    def get_all_values(self) -> List[List[str]]:
+        self._latency.sleep("sheets.read")
+        with self._lock:
+            return [list(r) for r in self._rows]
+
+    def get_all_records(self) -> List[Dict[str, Any]]:
+        values = self.get_all_values()
+        if not values:
+            return []
+        hdr = values[0]
+        return [{h: (r[i] if i < len(r) else "") for i, h in enumerate(hdr)} for r in values[1:]]
+
+    def append_row(self, values: List[Any], value_input_option: str = "RAW", **kwargs) -> Dict[str, Any]:
+        self._latency.sleep("sheets.write")
+        with self._lock:
+            self._rows.append(["" if v is None else str(v) for v in values])
+            n = len(self._rows)
+        return {"updates": {"updatedRange": f"{self.title}!A{n}:{n}", "updatedRows": 1}}
+
+    def append_rows(self, values: List[List[Any]], value_input_option: str = "RAW", **kwargs) -> Dict[str, Any]:
+        self._latency.sleep("sheets.write")
+        with self._lock:
+            start = len(self._rows) + 1
+            self._rows.extend(["" if v is None else str(v) for v in row] for row in values)
+            n = len(self._rows)
+        return {"updates": {"updatedRange": f"{self.title}!A{start}:{n}", "updatedRows": n - start + 1}}
+
+    def update_cell(self, row: int, col: int, value: Any) -> None:
+        self._latency.sleep("sheets.write")
+        with self._lock:
+            while len(self._rows) < row:
+                self._rows.append([])
+            r = self._rows[row - 1]
+            while len(r) < col:
+                r.append("")
+            r[col - 1] = str(value)
+
+    def add_cols(self, cols: int) -> None:
+        self._latency.sleep("sheets.write")
+        self.col_count += cols
+
+    def batch_update(self, data: List[Dict[str, Any]], value_input_option: str = "RAW", **kwargs) -> Dict[str, Any]:
+        """Cell/range writes given as {"range": "B5" | "B5:D5", "values": [[...]]}, one call."""
+        self._latency.sleep("sheets.write")
+        with self._lock:
+            for item in data:
+                m = re.match(r"^([A-Z]+)(\d+)", item["range"].rpartition("!")[2])
+                c0, r0 = _col_index(m.group(1)), int(m.group(2))
+                for i, vals in enumerate(item["values"]):
+                    while len(self._rows) < r0 + i:
+                        self._rows.append([])
+                    r = self._rows[r0 + i - 1]
+                    for j, v in enumerate(vals):
+                        while len(r) < c0 + j:
+                            r.append("")
+                        r[c0 + j - 1] = "" if v is None else str(v)
+        return {"totalUpdatedCells": sum(len(v) for d in data for v in d["values"])}
+
+
+class FakeAPIError(Exception):
+    """What gspread raises (APIError, HTTP 400) when e.g. a worksheet title is already taken."""
+
+
+class FakeSpreadsheet:
+    def __init__(self, latency: LatencyModel):
+        self._latency = latency
+        self._sheets: Dict[str, FakeWorksheet] = {}
+        self._lock = threading.Lock()
+
+    def worksheets(self) -> List[FakeWorksheet]:
+        self._latency.sleep("sheets.read")
+        with self._lock:
+            return list(self._sheets.values())
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        with self._lock:
+            if title not in self._sheets:
+                raise LookupError(f"WorksheetNotFound: {title}")
+            return self._sheets[title]
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> FakeWorksheet:
+        self._latency.sleep("sheets.write")
+        with self._lock:
+            if title in self._sheets:
+                raise FakeAPIError(f'Invalid requests[0].addSheet: A sheet with the name "{title}" already exists.')
+            ws = self._sheets[title] = FakeWorksheet(title, self._latency, rows, cols)
+            return ws
+
+    def values_batch_get(self, ranges: List[str], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """A1 subset used by the app: 'title', 'title'!1:1, 'title'!A2:C, 'title'!B5:D9."""
+        self._latency.sleep("sheets.read")
+        out = []
+        for a1 in ranges:
+            title, _, rng = a1.rpartition("!") if "!" in a1 else (a1, "", "")
+            title = title.strip("'").replace("''", "'")
+            ws = self.worksheet(title)
+            with ws._lock:
+                rows = [list(r) for r in ws._rows]
+            m = re.match(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$", rng)
+            c0, r0, c1, r1 = m.groups() if m and rng else ("", "", "", "")
+            r0 = int(r0) if r0 else 1
+            r1 = int(r1) if r1 else len(rows)
+            c0 = _col_index(c0) if c0 else 1
+            c1 = _col_index(c1) if c1 else max((len(r) for r in rows), default=0)
+            values = [r[c0 - 1:c1] for r in rows[r0 - 1:r1]]
+            while values and not any(values[-1]):
+                values.pop()
+            out.append({"range": a1, "values": values})
+        return {"valueRanges": out}
+
+    def get_lastUpdateTime(self) -> str:
+        """Stand-in for the Drive modified time: changes whenever any cell does."""
+        with self._lock:
+            sheets = list(self._sheets.values())
+        return str(hash(tuple((ws.title, tuple(map(tuple, ws._rows))) for ws in sheets)))
+
+    def del_worksheet(self, ws: FakeWorksheet) -> None:
+        self._latency.sleep("sheets.write")
+        with self._lock:
+            self._sheets.pop(ws.title, None)
+
+
+class FakeGemini:
+    """Stand-in for `evaluate_strict`: accepts drafts that cover the journal sections."""
+
+    SECTIONS = ("problem", "cause", "steps", "resolution")
+
+    def __init__(self, latency: LatencyModel):
+        self._latency = latency
+
+    def evaluate_strict(self, draft: str) -> Dict[str, Any]:
+        self._latency.sleep("gemini")
+        low = (draft or "").lower()
+        missing = [s for s in self.SECTIONS if s not in low]
+        if missing:
+            return {"ok": False, "message": "Missing sections", "missing": missing}
+        return {
+            "ok": True,
+            "compliance_score": 100 - 5 * len(missing),
+            "summary": {s: f"{s} summary" for s in self.SECTIONS} | {"cross_team": ""},
+        }
+
+
+class FakeGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel used by utils.gemini_eval: one latency draw per
+    call plus a per-token cost, so packed and one-by-one requests can be compared.
+    Answers packed prompts ("## Draft N [tag]" items, drafts in <draft-tag> blocks) with a
+    JSON array, others with an object.
+    """
+
+    def __init__(self, latency: LatencyModel, ms_per_1k_tokens: float = 150.0, drop_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self._latency = latency
+        self._ms_per_1k = ms_per_1k_tokens
+        self._drop_rate = drop_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _judge(draft: str) -> Dict[str, Any]:
+        low = draft.lower()
+        missing = [s for s in FakeGemini.SECTIONS if s not in low]
+        return {"raw_score": 100 - 20 * len(missing), "verdict": "FAIL" if missing else "PASS",
+                "rationale": "fake", "failures": [f"{s}: missing" for s in missing]}
+
+    def generate_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, **kwargs):
+        import json
+        from types import SimpleNamespace
+        self._latency.sleep("gemini")
+        time.sleep(len(prompt) / 4 / 1000 * self._ms_per_1k * self._latency.scale / 1000.0)
+        tag = re.search(r"<draft-(\w+)>", prompt)
+        if tag and re.search(rf"^## Draft \d+ \[{tag.group(1)}\]\s*$", prompt, flags=re.MULTILINE):
+            out = []
+            bodies = re.findall(rf"^## Draft (\d+) \[{tag.group(1)}\]\s*$.*?<draft-{tag.group(1)}>\n(.*?)\n</draft-{tag.group(1)}>",
+                                prompt, flags=re.MULTILINE | re.DOTALL)
+            for n, body in bodies:
+                with self._lock:
+                    drop = self._rng.random() < self._drop_rate
+                if not drop:
+                    out.append(dict(self._judge(body), item=int(n)))
+            return SimpleNamespace(text=json.dumps(out))
+        draft = prompt.split("### Draft Response to Evaluate", 1)[-1].split("### Rubric", 1)[0]
+        return SimpleNamespace(text=json.dumps(self._judge(draft)))
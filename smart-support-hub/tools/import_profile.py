@@ -0,0 +1,124 @@
+# file: smart-support-hub/tools/import_profile.py
+"""
+Import-time report and budget check for the login screen.
+
+The startup set is every module imported at the top of app/main.py before the
+`require_login()` call (parsed from the source, so new imports are picked up
+automatically). They are imported in a fresh interpreter under `-X importtime`.
+
+    python tools/import_profile.py              # report
+    python tools/import_profile.py --check      # exit 1 if over budget / heavy deps loaded
+"""
+from __future__ import annotations
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+MAIN = ROOT / "app" / "main.py"
+
+# Must never be imported before the login screen renders.
+FORBIDDEN = ("pandas", "numpy", "pyarrow", "gspread", "google.auth", "google.oauth2",
+             "google.generativeai", "tenacity", "pydantic")
+# The Streamlit runtime is a fixed cost we do not control; it is reported but not budgeted.
+BASELINE = ("streamlit",)
+
+
+def startup_modules(main: Path = MAIN) -> List[str]:
+    """Top-level imports of app/main.py that run before require_login()."""
+    src = main.read_text(encoding="utf-8")
+    mods: List[str] = []
+    for node in ast.parse(src).body:
+        if isinstance(node, ast.Import):
+            mods.extend(a.name for a in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and node.level == 0:
+                mods.append(node.module)
+        elif "require_login(" in (ast.get_source_segment(src, node) or ""):
+            break
+    return list(dict.fromkeys(mods))
+
+
+def profile(modules: List[str], stubs: Sequence[str] = ()) -> List[Tuple[int, int, int, str]]:
+    """
+    Run `-X importtime` in a child interpreter; return (self_us, cumulative_us, depth, name) rows.
+    `stubs` are registered as empty modules first (not installed / not in this checkout), so the
+    rest is still measured; their own import cost is not.
+    """
+    stmt = "; ".join(f"import {m}" for m in modules)
+    if stubs:
+        stmt = (f"import sys, types; sys.modules.update({{n: types.ModuleType(n) for n in {list(stubs)!r}}}); "
+                + stmt)
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", stmt], cwd=str(ROOT), env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"Import failed:\n{proc.stderr[-4000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(self_us), int(cum_us), depth, name.strip()))
+    return rows
+
+
+def summarize(rows: List[Tuple[int, int, int, str]]) -> Dict[str, object]:
+    # -X importtime prints children before their parent, so every module up to a
+    # depth-0 row belongs to that root's subtree.
+    roots, owner, pending = [], {}, []
+    for r in rows:
+        pending.append(r[3])
+        if r[2] == 0:
+            roots.append(r)
+            owner.update({m: r[3].split(".")[0] for m in pending})
+            pending = []
+    budgeted = [r for r in roots if r[3].split(".")[0] not in BASELINE]
+    heavy = sorted({
+        f for m, root in owner.items() if root not in BASELINE
+        for f in FORBIDDEN if m == f or m.startswith(f + ".")
+    })
+    return {
+        "total_ms": sum(r[1] for r in roots) / 1000.0,
+        "app_ms": sum(r[1] for r in budgeted) / 1000.0,
+        "modules": len(rows),
+        "forbidden": heavy,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--check", action="store_true", help="fail when the budget is exceeded")
+    ap.add_argument("--max-ms", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "400")),
+                    help="budget for app imports excluding the Streamlit runtime (ms)")
+    ap.add_argument("--top", type=int, default=25, help="rows in the report")
+    args = ap.parse_args(argv)
+
+    modules = startup_modules()
+    rows = profile(modules)
+    s = summarize(rows)
+
+    print(f"Startup modules (app/main.py before require_login): {', '.join(modules)}")
+    print(f"Total import time: {s['total_ms']:.0f} ms across {s['modules']} modules")
+    print(f"App import time (excluding {', '.join(BASELINE)}): {s['app_ms']:.0f} ms (budget {args.max_ms:.0f} ms)")
+    print(f"\n{'cumulative ms':>14}{'self ms':>10}  module")
+    for self_us, cum_us, depth, name in sorted(rows, key=lambda r: -r[1])[: args.top]:
+        print(f"{cum_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {'  ' * depth}{name}")
+
+    failures = []
+    if s["forbidden"]:
+        failures.append(f"heavy modules imported before login: {', '.join(s['forbidden'])}")
+    if s["app_ms"] > args.max_ms:
+        failures.append(f"app import time {s['app_ms']:.0f} ms exceeds budget {args.max_ms:.0f} ms")
+    for f in failures:
+        print(f"\nFAIL: {f}")
+    return 1 if (args.check and failures) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,217 @@
+# file: smart-support-hub/tools/loadtest.py
+"""
+Headless load test of the agent flow against fake Sheets/Gemini backends:
+
+    login -> upsert_user -> parse -> evaluate -> save
+
+Each virtual agent calls app.services.agent_flow, the functions app/ui/pages.py
+runs: evaluations go through the SQLite job queue and are executed by
+app.workers.eval_worker threads (--workers) with a fake `evaluate_strict`, and the
+agent polls for the result like the page does. Local state goes to a temporary
+SSH_DATA_DIR. Closed loop (default): --concurrency agents back-to-back for
+--duration seconds. Open loop: --rate sessions/second (Poisson arrivals) served by
+--concurrency threads; throughput counts sessions finished inside the load window,
+the time to drain the backlog afterwards is reported separately.
+
+    python tools/loadtest.py --concurrency 30 --duration 60 --latency-scale 0.2
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import agent_flow, eval_queue, metrics, sheets_client  # noqa: E402
+from app.workers import eval_worker  # noqa: E402
+from tools.fakes import FakeGemini, FakeSpreadsheet, LatencyModel  # noqa: E402
+
+STEPS = ("login", "parse", "evaluate", "save", "session")
+
+SAMPLE_TICKET = """Service Title: Cannot sync TMX memory {n}
+Please select service type: Report a problem
+3) Description: Import of TMX fails with error 500 after upload on project {n}.
+Attachments: Attached document
+File extension error.log
+Please select observer:
+- Localization Ops
+Created: 2026-10-01 by agent{a}@local
+T_{tid}
+"""
+
+SAMPLE_DRAFT = """Problem: TMX import fails for project {n}.
+Cause: connector times out on large segments.
+Steps: reproduced with the customer file, checked logs.
+Resolution: increased connector timeout, customer re-imported successfully.
+"""
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lat: Dict[str, List[float]] = defaultdict(list)
+        self.err: Dict[str, int] = defaultdict(int)
+        self.ok: Dict[str, int] = defaultdict(int)
+        self.finished: List[float] = []  # perf_counter() at the end of each successful session
+
+    def timed(self, step: str, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            out = fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.err[step] += 1
+            raise
+        t1 = time.perf_counter()
+        with self._lock:
+            self.lat[step].append((t1 - t0) * 1000.0)
+            self.ok[step] += 1
+            if step == "session":
+                self.finished.append(t1)
+        return out
+
+
+def _wait_for(job_id: int, poll_s: float, timeout_s: float) -> Dict[str, Any]:
+    """Poll the job like the page's fragment does; returns the finished job."""
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        job = eval_queue.get_job(job_id)
+        if job and job["status"] in (eval_queue.DONE, eval_queue.FAILED):
+            return job
+        time.sleep(poll_s)
+    raise TimeoutError(f"evaluation job {job_id} not finished after {timeout_s:.0f}s")
+
+
+def run_session(agent: int, n: int, rec: Recorder, poll_s: float = 0.05, timeout_s: float = 120.0) -> None:
+    user = {"email": f"agent{agent}@local", "name": f"agent{agent}"}
+    tid = str(1000000 + agent * 100000 + n)
+
+    def login():
+        agent_flow.register(user)
+        agent_flow.log_event(user["email"], "", "Login", "Login OK", "Login")
+
+    def evaluate():
+        job = _wait_for(agent_flow.submit_evaluation(user, tid, SAMPLE_DRAFT.format(n=n)), poll_s, timeout_s)
+        if job["status"] == eval_queue.FAILED:
+            raise RuntimeError(job.get("error") or "evaluation failed")
+        return job
+
+    def save(parsed, job):
+        form = dict(parsed, id=parsed.get("id") or tid, date=datetime.utcnow().date().isoformat(), owner=user["email"])
+        return agent_flow.save_ticket(form, job["result"], user, job=job)
+
+    def session():
+        rec.timed("login", login)
+        parsed = rec.timed("parse", agent_flow.parse, user, SAMPLE_TICKET.format(n=n, a=agent, tid=tid))
+        job = rec.timed("evaluate", evaluate)
+        if (job["result"] or {}).get("ok"):
+            rec.timed("save", save, parsed, job)
+
+    try:
+        rec.timed("session", session)
+    except Exception:
+        pass
+
+
+def _install_fakes(latency: LatencyModel) -> FakeGemini:
+    sh = FakeSpreadsheet(latency)
+    sheets_client.clear_header_cache()
+
+    def _open():
+        latency.sleep("sheets.open")
+        return sh
+
+    sheets_client._open = _open
+    return FakeGemini(latency)
+
+
+def _report(rec: Recorder, t0: float, window_end: float, end: float, args) -> None:
+    sessions = rec.ok["session"]
+    failed = rec.err["session"]
+    total = sessions + failed
+    window = window_end - t0
+    in_window = sum(1 for t in rec.finished if t <= window_end)
+    mode = f"open loop {args.rate}/s" if args.rate else "closed loop"
+    print(f"\n=== Load test: {args.concurrency} agents, {args.workers} eval workers, {mode}, {window:.1f}s, "
+          f"latency x{args.latency_scale} ===")
+    print(f"sessions ok={sessions} failed={failed} error_rate={(failed / total * 100 if total else 0):.1f}%")
+    print(f"throughput={in_window / window:.2f} sessions/s ({in_window / window * 60:.1f}/min, "
+          f"sessions finished inside the load window)")
+    if end - window_end > 0.05:
+        print(f"drain={end - window_end:.1f}s after arrivals stopped ({sessions - in_window} sessions)")
+    print(f"\n{'step':<10}{'ok':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step in STEPS:
+        vals = rec.lat.get(step, [])
+        print(f"{step:<10}{rec.ok[step]:>7}{rec.err[step]:>6}"
+              f"{metrics.percentile(vals, 50):>10.0f}{metrics.percentile(vals, 95):>10.0f}"
+              f"{metrics.percentile(vals, 99):>10.0f}{(max(vals) if vals else 0):>10.0f}")
+    print("\nPer-operation breakdown (app.services.metrics):")
+    for row in metrics.snapshot():
+        print(f"  {row['operation']:<40} n={row['count']:<6} err={row['errors']:<4} "
+              f"p50={row['p50_ms']:<8} p95={row['p95_ms']:<8} p99={row['p99_ms']}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--concurrency", type=int, default=10, help="concurrent agents / worker threads")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    ap.add_argument("--rate", type=float, default=0.0, help="open-loop arrivals per second (0 = closed loop)")
+    ap.add_argument("--latency-scale", type=float, default=1.0, help="multiply every fake latency")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="probability of an injected backend error per call")
+    ap.add_argument("--workers", type=int, default=4, help="evaluation worker threads draining the job queue")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    os.environ["SSH_DATA_DIR"] = tempfile.mkdtemp(prefix="loadtest-")
+    latency = LatencyModel(scale=args.latency_scale, error_rate=args.error_rate, seed=args.seed)
+    gemini = _install_fakes(latency)
+    rec = Recorder()
+    metrics.reset()
+    stop = threading.Event()
+    workers = [threading.Thread(target=eval_worker.run_worker, args=(0.05, False, gemini.evaluate_strict, stop),
+                                daemon=True) for _ in range(args.workers)]
+    for w in workers:
+        w.start()
+
+    t0 = time.perf_counter()
+    deadline = t0 + args.duration
+    if args.rate:
+        rng = random.Random(args.seed)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            n = 0
+            while time.perf_counter() < deadline:
+                pool.submit(run_session, n % args.concurrency, n, rec)
+                n += 1
+                time.sleep(rng.expovariate(args.rate))
+            window_end = time.perf_counter()
+    else:
+        def agent_loop(agent: int):
+            n = 0
+            while time.perf_counter() < deadline:
+                run_session(agent, n, rec)
+                n += 1
+
+        threads = [threading.Thread(target=agent_loop, args=(a,), daemon=True) for a in range(args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        window_end = deadline
+    stop.set()
+    _report(rec, t0, window_end, time.perf_counter(), args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,43 @@
+# file: smart-support-hub/tools/scan_log.py
+"""
+Print the error-signature summary of one or more log files, exactly as it would
+be attached to a ticket or evaluation prompt, with the scan time.
+
+    python tools/scan_log.py server.log
+    python tools/scan_log.py --json big.log other.log
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import log_scan  # noqa: E402
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="+", type=Path)
+    ap.add_argument("--json", action="store_true", help="print the full scan result instead of the summary text")
+    args = ap.parse_args(argv)
+
+    for path in args.paths:
+        t0 = time.perf_counter()
+        summary = log_scan.scan(path)
+        secs = time.perf_counter() - t0
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            print(log_scan.summary_text(summary))
+        mib = summary["bytes"] / 1_048_576
+        print(f"# scanned {mib:.1f} MiB in {secs:.2f}s ({mib / max(secs, 1e-9):.0f} MiB/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
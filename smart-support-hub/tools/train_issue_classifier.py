@@ -0,0 +1,50 @@
+# file: smart-support-hub/tools/train_issue_classifier.py
+"""
+Retrain the local issue-type classifier from agent-confirmed `tickets` rows and
+report held-out accuracy next to the keyword heuristic. Running parsers pick up
+the new model file automatically.
+
+    python tools/train_issue_classifier.py
+    python tools/train_issue_classifier.py --bench 20000
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import issue_classifier  # noqa: E402
+from app.services.ticket_parser import _guess_issue_type  # noqa: E402
+
+
+def bench(n: int) -> float:
+    """Batch inference throughput (tickets/s) on confirmed ticket texts repeated to `n`."""
+    texts, _ = issue_classifier.training_rows()
+    if not texts:
+        raise SystemExit("No confirmed tickets to benchmark on.")
+    batch = (texts * (n // len(texts) + 1))[:n]
+    t0 = time.perf_counter()
+    issue_classifier.classify(batch, _guess_issue_type)
+    return n / (time.perf_counter() - t0)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--holdout", type=float, default=0.2, help="fraction held out for the accuracy report")
+    ap.add_argument("--bench", type=int, default=0, help="also time batch inference over this many tickets")
+    args = ap.parse_args(argv)
+
+    report = issue_classifier.retrain(holdout=args.holdout)
+    if args.bench:
+        report["tickets_per_s"] = round(bench(args.bench))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+
+"""
+Record/replay transport for Gemini `generate_content` calls.
+
+GEMINI_CASSETTE=record  -> call the live API and store request/response/latency
+GEMINI_CASSETTE=replay  -> serve stored responses, no network (missing entries raise CassetteMiss)
+GEMINI_CASSETTE=off     -> live API only (default)
+
+Entries live in one SQLite file (GEMINI_CASSETTE_PATH, default
+<data_dir>/cassettes/gemini.sqlite), keyed by a hash of model, system prompt,
+prompt and generation config, with zlib-compressed payloads. In replay mode
+GEMINI_CASSETTE_LATENCY=<factor> sleeps for the recorded latency times factor
+(0 = as fast as possible, 1 = realistic).
+
+Recorded requests are tagged with the public evaluation call that made them
+(`call`: evaluate_with_gemini or evaluate_many and its arguments), so
+tools/bench_eval.py can replay whole calls through the same functions.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    request BLOB NOT NULL,
+    response BLOB NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    recorded_at REAL NOT NULL
+);
+"""
+
+_lock = threading.Lock()
+_call: ContextVar[Optional[Dict[str, Any]]] = ContextVar("gemini_cassette_call", default=None)
+
+
+class CassetteMiss(KeyError):
+    """Replay mode got a request that was never recorded."""
+
+
+def mode() -> str:
+    return (os.getenv("GEMINI_CASSETTE") or "off").lower()
+
+
+def latency_factor() -> float:
+    return float(os.getenv("GEMINI_CASSETTE_LATENCY", "0") or 0)
+
+
+def _conn() -> sqlite3.Connection:
+    path = os.getenv("GEMINI_CASSETTE_PATH")
+    if not path:
+        try:
+            # the app's shared local store when it is importable; utils also runs on its own
+            from app.services.local_store import connect, data_dir
+        except ImportError:
+            base = Path(os.getenv("SSH_DATA_DIR") or Path(__file__).resolve().parents[1] / ".data") / "cassettes"
+            base.mkdir(parents=True, exist_ok=True)
+            path = str(base / "gemini.sqlite")
+        else:
+            data_dir("cassettes")
+            return connect("cassettes/gemini", _SCHEMA)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+@contextmanager
+def call(fn: str, **inputs: Any) -> Iterator[None]:
+    """Tag requests recorded inside the block with the evaluation call `fn(**inputs)` (the outermost call wins)."""
+    if mode() != "record" or _call.get() is not None:
+        yield
+        return
+    token = _call.set({"fn": fn, "inputs": inputs})
+    try:
+        yield
+    finally:
+        _call.reset(token)
+
+
+def request_key(model_name: str, system_instruction: str, prompt: str, config: Optional[Dict[str, Any]]) -> str:
+    blob = json.dumps([model_name, system_instruction, prompt, config or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class CassetteResponse:
+    """Minimal stand-in for a GenerateContentResponse: evaluators only read `.text`."""
+
+    def __init__(self, text: str, latency_ms: int):
+        self.text = text
+        self.latency_ms = latency_ms
+        self.candidates = []
+
+
+class CassetteModel:
+    """Drop-in for genai.GenerativeModel(...).generate_content in record or replay mode."""
+
+    def __init__(self, model_name: str, system_instruction: str, live: Any = None, replay: bool = False):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self._live = live
+        self._replay = replay
+
+    def generate_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, **kwargs):
+        key = request_key(self.model_name, self.system_instruction, prompt, generation_config)
+        if self._replay:
+            with closing(_conn()) as conn:
+                row = conn.execute("SELECT response, latency_ms FROM calls WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                raise CassetteMiss(f"No recorded Gemini response for request {key[:12]}")
+            factor = latency_factor()
+            if factor:
+                time.sleep(row["latency_ms"] * factor / 1000.0)
+            return CassetteResponse(zlib.decompress(row["response"]).decode("utf-8"), int(row["latency_ms"]))
+
+        t0 = time.time()
+        resp = self._live.generate_content(prompt, generation_config=generation_config, **kwargs)
+        latency_ms = int((time.time() - t0) * 1000)
+        text = resp.text if hasattr(resp, "text") else (
+            resp.candidates[0].content.parts[0].text if resp.candidates else "{}")
+        request = {"model": self.model_name, "system_instruction": self.system_instruction, "prompt": prompt,
+                   "generation_config": generation_config or {}}
+        if _call.get() is not None:
+            request["call"] = _call.get()
+        with _lock, closing(_conn()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO calls (key, model, request, response, latency_ms, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.model_name, zlib.compress(json.dumps(request, ensure_ascii=False, default=str).encode("utf-8"), 9),
+                 zlib.compress(text.encode("utf-8"), 9), latency_ms, time.time()),
+            )
+        return resp
+
+
+def make_model(model_name: str, system_instruction: str, api_key: Optional[str] = None):
+    """GenerativeModel for the current cassette mode (replay never imports or configures the SDK)."""
+    m = mode()
+    if m == "replay":
+        return CassetteModel(model_name, system_instruction, replay=True)
+    import google.generativeai as genai
+    if api_key:
+        genai.configure(api_key=api_key)
+    live = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+    return CassetteModel(model_name, system_instruction, live=live) if m == "record" else live
+
+
+def entries() -> Iterator[Dict[str, Any]]:
+    """Recorded calls (request dict, response text, latency) for benchmarks."""
+    with closing(_conn()) as conn:
+        for row in conn.execute("SELECT key, request, response, latency_ms FROM calls ORDER BY recorded_at"):
+            yield {
+                "key": row["key"],
+                "request": json.loads(zlib.decompress(row["request"]).decode("utf-8")),
+                "response": zlib.decompress(row["response"]).decode("utf-8"),
+                "latency_ms": int(row["latency_ms"]),
+            }
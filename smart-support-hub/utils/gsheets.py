@@ -1,23 +1,30 @@
 
 import os, time
-import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
+# Unlike utils.gemini_eval, this module is the app's Sheets adapter: it shares the
+# app's cache, schema and header handling, so it needs the `app` package.
+from app.services.metrics import span, timed
+from app.services import data_cache
+from app.services.schema import TICKETS_HEADERS, EVALUATIONS_HEADERS, align_to_header
+
+# gspread, google-auth and pandas are imported lazily (first Sheets call), see
+# tools/import_profile.py for the startup import budget.
 
 SCOPE = [
     "https://www.googleapis.com/auth/spreadsheets",
     "https://www.googleapis.com/auth/drive"
 ]
 
+# Same layouts as app.services.sheets_client (single source: app.services.schema).
 HEADERS = {
-    "tickets": ["timestamp","ticket_id","title","description","severity","product","module","locale","reporter","attachments","status"],
-    "evaluations": ["timestamp","ticket_id","draft_len","rubric_version","model","raw_score","pass","verdict","rationale","failures","evaluator_latency_ms"],
+    "tickets": TICKETS_HEADERS,
+    "evaluations": EVALUATIONS_HEADERS,
 }
 
 def _get_creds_from_streamlit():
     try:
         import streamlit as st
         if "gcp_service_account" in st.secrets:
+            from google.oauth2.service_account import Credentials
             info = dict(st.secrets["gcp_service_account"])
             return Credentials.from_service_account_info(info, scopes=SCOPE)
     except Exception:
@@ -29,13 +36,16 @@ def _get_creds_from_env():
     if not sa_json:
         return None
     import json
+    from google.oauth2.service_account import Credentials
     info = json.loads(sa_json)
     return Credentials.from_service_account_info(info, scopes=SCOPE)
 
+@timed("sheets.auth")
 def get_gspread_client():
     creds = _get_creds_from_streamlit() or _get_creds_from_env()
     if not creds:
         raise RuntimeError("Google Service Account credentials not found. Provide via Streamlit secrets 'gcp_service_account' or env var GOOGLE_SERVICE_ACCOUNT_JSON.")
+    import gspread
     return gspread.authorize(creds)
 
 def get_sheet_id():
@@ -52,34 +62,53 @@ def get_sheet_id():
     return sid
 
 def ensure_worksheets(sh):
-    existing = {ws.title for ws in sh.worksheets()}
+    # Existing sheets get new layout columns appended; a legacy `tickets` header is kept
+    # as is and rows are written by column name (see append_ticket).
+    from app.services.sheets_client import ensure_headers
+    existing = {ws.title: ws for ws in sh.worksheets()}
     for name, headers in HEADERS.items():
         if name not in existing:
             ws = sh.add_worksheet(title=name, rows=2000, cols=len(headers)+5)
             ws.append_row(headers)
+        else:
+            ensure_headers(existing[name], headers)
     return {ws.title: ws for ws in sh.worksheets()}
 
 def open_sheets():
     gc = get_gspread_client()
     sheet_id = get_sheet_id()
-    sh = gc.open_by_key(sheet_id)
-    ws_map = ensure_worksheets(sh)
+    with span("sheets.open"):
+        sh = gc.open_by_key(sheet_id)
+    with span("sheets.ensure_worksheets"):
+        ws_map = ensure_worksheets(sh)
     return sh, ws_map
 
-def append_ticket(ticket_row):
+def append_ticket(ticket):
+    """Append a ticket (field -> value) under the sheet's actual header, legacy layout included."""
     _, ws = open_sheets()
     ws_t = ws["tickets"]
-    ws_t.append_row(ticket_row, value_input_option="USER_ENTERED")
+    header = ws_t.row_values(1) or TICKETS_HEADERS
+    with span("sheets.append_row.tickets"):
+        ws_t.append_row(align_to_header(ticket, header), value_input_option="USER_ENTERED")
+    data_cache.bump("tickets")
 
 def append_evaluation(eval_row):
     _, ws = open_sheets()
     ws_e = ws["evaluations"]
-    ws_e.append_row(eval_row, value_input_option="USER_ENTERED")
+    with span("sheets.append_row.evaluations"):
+        ws_e.append_row(eval_row, value_input_option="USER_ENTERED")
+    data_cache.bump("evaluations")
+
+def read_df(name: str):
+    # Shared across sessions/processes; invalidated by append_ticket/append_evaluation.
+    return data_cache.cached(name, f"read_df:{name}", lambda: _read_df(name))
 
-def read_df(name: str) -> pd.DataFrame:
+def _read_df(name: str):
+    import pandas as pd
     _, ws = open_sheets()
     ws_n = ws[name]
-    data = ws_n.get_all_records()
+    with span("sheets.get_all_records"):
+        data = ws_n.get_all_records()
     if not data:
         return pd.DataFrame(columns=HEADERS[name])
     return pd.DataFrame(data)